@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Endpoint balasan live (SSE / long-poll di tickets/live.py) adalah view async
+yang sebaiknya dilayani lewat ASGI, mis. `uvicorn config.asgi:application`,
+agar koneksi yang menunggu tidak menahan satu thread worker.
 """
 
 import os
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from config.database import sqlite_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,8 +43,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Paling luar agar latensi & query middleware lain ikut terukur
+    'tickets.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Aset statis dilayani sebelum session/auth (lihat tickets/staticfiles.py)
+    'tickets.staticfiles.StaticAssetMiddleware',
+    # Gzip on-the-fly, termasuk response streaming (flush per chunk); SSE dilewati
+    'tickets.streaming.StreamingGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # Perpanjangan sesi "ingat saya" (SESSION_RENEW_SECONDS); tulis DB di-batch
+    'tickets.sessions.SessionRenewalMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -74,13 +84,51 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Profil SQLite (lihat config/database.py): 'production' = WAL, synchronous=NORMAL,
+# busy_timeout, mmap, transaksi IMMEDIATE & koneksi persisten; 'default' = bawaan Django
+DATABASE_PROFILE = 'production'
+
 DATABASES = {
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3', DATABASE_PROFILE),
+}
+
+
+# Cache
+# Default: locmem per proses, dibatasi MAX_ENTRIES (entri paling lama tidak dipakai dibuang dulu).
+# Untuk beberapa worker gunakan backend bersama, mis. django.core.cache.backends.redis.RedisCache.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ticketing',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Cache session (SESSION_CACHE_ALIAS) harus dipakai bersama semua worker,
+    # mis. {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    #       'LOCATION': 'redis://127.0.0.1:6379/1'}.
+    # Tanpa alias ini (atau jika backend-nya LocMem) session hanya di database:
+    # cache per proses membuat logout di satu worker tidak berlaku di worker lain.
 }
 
+# Session dibaca dari cache bersama (jika ada), ditulis ke database + cache (lihat tickets/sessions.py)
+SESSION_ENGINE = 'tickets.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
+# Sesi "ingat saya" diperpanjang jika user aktif dan perpanjangan terakhir lebih
+# lama dari ini (detik). 0 = masa berlaku tetap dua minggu sejak login.
+SESSION_RENEW_SECONDS = 0
+# Perpanjangan ditulis ke database per batch: saat mencapai ukuran ini atau
+# setelah sekian detik sejak perpanjangan tertua yang tertunda
+SESSION_EXPIRY_BATCH_SIZE = 500
+SESSION_EXPIRY_FLUSH_SECONDS = 30
+# Jumlah sesi kedaluwarsa per DELETE di `purge_sessions` / `clearsessions`
+SESSION_PURGE_CHUNK_SIZE = 1000
+
+# Lama (detik) fragmen daftar tiket di-cache; isinya juga diganti saat versi tiket user naik
+FRAGMENT_CACHE_SECONDS = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -117,6 +165,16 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic membuat nama file ber-hash, minify CSS/JS, dan varian .gz/.br;
+# StaticAssetMiddleware melayaninya dengan Cache-Control immutable
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'tickets.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+# Max-age untuk file statis tanpa hash (nama asli hasil collectstatic)
+STATIC_UNHASHED_MAX_AGE = 60
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -139,12 +197,70 @@ EMAIL_HOST_PASSWORD = ''
 # Sekarang Python tahu apa itu EMAIL_HOST_USER
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Outbox email: dikirim oleh worker `python manage.py send_outbox`
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_BACKOFF_SECONDS = 30
+OUTBOX_MAX_BACKOFF_SECONDS = 3600
+OUTBOX_LEASE_SECONDS = 300
+
+# Pool koneksi SMTP yang dipakai worker outbox
+EMAIL_POOL_SIZE = 2
+EMAIL_POOL_IDLE_TIMEOUT = 60
+EMAIL_BATCH_SIZE = 20
+
+# Balasan ke tiket + penerima yang sama dalam jendela ini (detik) digabung
+# menjadi satu email digest. 0 = kirim satu email per balasan (bawaan;
+# digest menunda notifikasi, jadi diaktifkan eksplisit, mis. 120).
+REPLY_DIGEST_WINDOW_SECONDS = 0
+
+# Jumlah tiket per halaman di "Tiket Saya" (keyset pagination; hasil pencarian per posisi peringkat)
+MY_TICKETS_PAGE_SIZE = 20
+# Mode "Tampilkan Semua" (?view=all): baris dikirim streaming per chunk ini
+MY_TICKETS_STREAM_CHUNK_SIZE = 100
+
+# Backend pencarian full-text tiket & balasan (lihat tickets/search.py)
+TICKETS_SEARCH_BACKEND = 'tickets.search.SQLiteFTS5Backend'
+ADMIN_SEARCH_RESULT_LIMIT = 1000
+
+# Pakai view async (tickets/async_views.py) untuk dashboard, daftar & detail tiket.
+# Aktifkan saat dilayani lewat ASGI (config/asgi.py); di bawah WSGI biarkan False.
+PORTAL_ASYNC_VIEWS = False
+
+# Balasan live di halaman detail tiket (SSE + fallback long-poll, dilayani lewat ASGI).
+# Di bawah WSGI setiap tab yang terbuka menahan satu thread worker, jadi bawaannya
+# hanya aktif bersama view async; aktifkan terpisah hanya jika dilayani lewat ASGI.
+REPLY_LIVE_UPDATES = PORTAL_ASYNC_VIEWS
+# DatabasePollingBroker juga meneruskan balasan yang dibuat proses lain (satu query per interval per proses).
+REPLY_STREAM_BROKER = 'tickets.pubsub.InProcessBroker'
+REPLY_STREAM_POLL_SECONDS = 2
+REPLY_STREAM_HEARTBEAT_SECONDS = 15
+REPLY_STREAM_MAX_SECONDS = 300
+REPLY_LONG_POLL_SECONDS = 25
+
+# Knowledge Base: view artikel dikumpulkan di cache lalu ditulis ke database secara batch
+# paling cepat tiap ARTICLE_VIEW_FLUSH_SECONDS (0 = hanya lewat `manage.py flush_article_views`)
+ARTICLE_VIEW_FLUSH_SECONDS = 60
+POPULAR_ARTICLES_LIMIT = 5
+DASHBOARD_ANNOUNCEMENTS_LIMIT = 3
+
+# Endpoint /metrics (format Prometheus): user staff, header `Authorization: Bearer <METRICS_TOKEN>`,
+# atau IP di METRICS_ALLOWED_IPS. Daftar IP kosong secara bawaan: di belakang reverse proxy
+# lokal semua request datang dari 127.0.0.1.
+METRICS_TOKEN = ''
+METRICS_ALLOWED_IPS = []
+
 LOGIN_URL = 'login' 
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
 # Role configuration
 PORTAL_USER_GROUP = 'Portal Users'
+# Lama (detik) keanggotaan grup portal disimpan di cache; dihapus otomatis saat grup user berubah
+PORTAL_ROLE_CACHE_SECONDS = 300
+# Batas umur data yang di-invalidate signal (role, pengumuman, artikel populer) jika
+# cache tidak dipakai bersama: LocMem di worker lain tidak ikut terhapus oleh signal
+LOCAL_CACHE_MAX_SECONDS = 10
 
 # Logging configuration
 LOGGING = {
@@ -1,10 +1,37 @@
 # tickets/admin.py
-from django.contrib import admin
-from .models import Ticket, TicketReply, Department
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.forms.models import BaseInlineFormSet
+from django.utils import timezone
+from .exporting import streaming_export_response
+from .models import Announcement, Article, Ticket, TicketReply, Department, OutboundEmail
+from .pagination import EstimatedCountPaginator
+from .search import get_backend as get_search_backend
+
+
+def _admin_search_limit():
+    return getattr(settings, 'ADMIN_SEARCH_RESULT_LIMIT', 1000)
+
+class PaginatedReplyFormSet(BaseInlineFormSet):
+    """Hanya memuat satu halaman balasan (terbaru dulu), dipilih lewat ?reply_page="""
+    per_page = 50
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, 'page'):
+            queryset = super().get_queryset().select_related('user', 'ticket').order_by('-created_at', '-id')
+            self.paginator = Paginator(queryset, self.per_page)
+            self.page = self.paginator.get_page(self.page_number)
+        return self.page.object_list
+
 
 # Tampilkan balasan langsung di bawah halaman detail Tiket
 class TicketReplyInline(admin.TabularInline):
     model = TicketReply
+    formset = PaginatedReplyFormSet
+    template = 'admin/tickets/edit_inline/paginated_tabular.html'
     extra = 1
     fields = ('message', 'user', 'created_at')
     readonly_fields = ('created_at', 'user') 
@@ -15,15 +42,26 @@ class TicketReplyInline(admin.TabularInline):
     def get_readonly_fields(self, request, obj=None):
         return ('created_at', 'user')
 
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.page_number = request.GET.get('reply_page') or 1
+        return formset
+
 # Kustomisasi tampilan list Tiket di admin
 class TicketAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'status', 'priority', 'created_by', 'department', 'created_at')
-    list_filter = ('status', 'priority', 'department', 'created_at')
+    list_filter = ('status', 'priority', 'department')
+    list_select_related = ('created_by', 'department')
+    date_hierarchy = 'created_at'
+    raw_id_fields = ('created_by',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = ('title', 'description', 'created_by__username', 'created_by__email')
     readonly_fields = ('created_at', 'updated_at')
     inlines = [TicketReplyInline]
     
     list_editable = ('status', 'priority')
+    actions = ['export_csv', 'export_jsonl']
 
     fieldsets = (
         ('Informasi Tiket', {
@@ -38,6 +76,36 @@ class TicketAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_search_results(self, request, queryset, search_term):
+        """Judul/deskripsi/balasan dicari lewat index full-text, bukan LIKE"""
+        if not search_term:
+            return queryset, False
+        limit = _admin_search_limit()
+        ticket_ids = get_search_backend().search(search_term, limit=limit)
+        if len(ticket_ids) >= limit:
+            # Hasil full-text dipotong: beri tahu admin, jangan diam-diam
+            messages.warning(
+                request,
+                f"Pencarian teks hanya menampilkan {limit} tiket paling relevan. "
+                "Persempit kata kunci atau gunakan filter untuk melihat sisanya.",
+            )
+        matches = (
+            Q(pk__in=ticket_ids) |
+            Q(created_by__username__icontains=search_term) |
+            Q(created_by__email__icontains=search_term)
+        )
+        if search_term.isdigit():
+            matches |= Q(pk=int(search_term))
+        return queryset.filter(matches), False
+
+    @admin.action(description='Export tiket terpilih ke CSV')
+    def export_csv(self, request, queryset):
+        return streaming_export_response(queryset, 'csv')
+
+    @admin.action(description='Export tiket terpilih ke JSONL')
+    def export_jsonl(self, request, queryset):
+        return streaming_export_response(queryset, 'jsonl')
+
     def save_formset(self, request, form, formset, change):
         """
         Override untuk auto-set user ketika membuat reply baru di admin
@@ -55,7 +123,11 @@ class TicketAdmin(admin.ModelAdmin):
 
 class TicketReplyAdmin(admin.ModelAdmin):
     list_display = ('id', 'ticket', 'user', 'created_at')
-    list_filter = ('created_at',)
+    list_select_related = ('ticket', 'user')
+    date_hierarchy = 'created_at'
+    raw_id_fields = ('ticket', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = ('ticket__title', 'user__username', 'message')
     readonly_fields = ('created_at',)
     fieldsets = (
@@ -68,11 +140,51 @@ class TicketReplyAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_search_results(self, request, queryset, search_term):
+        """Isi balasan dicari lewat index full-text, bukan LIKE"""
+        if not search_term:
+            return queryset, False
+        reply_ids = get_search_backend().search_replies(search_term, limit=_admin_search_limit())
+        matches = Q(pk__in=reply_ids) | Q(user__username__icontains=search_term)
+        return queryset.filter(matches), False
+
     def save_model(self, request, obj, form, change):
         if not change:  
             obj.user = request.user
         super().save_model(request, obj, form, change)
 
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at')
+    actions = ['requeue']
+
+    @admin.action(description='Kirim ulang email yang dipilih')
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=OutboundEmail.Status.SENT).update(
+            status=OutboundEmail.Status.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} email dimasukkan kembali ke antrean.")
+
+class ArticleAdmin(admin.ModelAdmin):
+    list_display = ('title', 'category', 'is_published', 'views', 'updated_at')
+    list_filter = ('is_published', 'category')
+    search_fields = ('title',)
+    prepopulated_fields = {'slug': ('title',)}
+    # Views ditulis batch oleh flush_article_views, jangan ditimpa dari form
+    readonly_fields = ('views', 'created_at', 'updated_at')
+
+class AnnouncementAdmin(admin.ModelAdmin):
+    list_display = ('title', 'type', 'is_active', 'created_at')
+    list_filter = ('is_active', 'type')
+    search_fields = ('title',)
+
 admin.site.register(Ticket, TicketAdmin)
 admin.site.register(TicketReply, TicketReplyAdmin)
-admin.site.register(Department)
\ No newline at end of file
+admin.site.register(Department)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
+admin.site.register(Article, ArticleAdmin)
+admin.site.register(Announcement, AnnouncementAdmin)
\ No newline at end of file
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class TicketsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tickets'
+
+    def ready(self):
+        # Daftarkan signal untuk data turunan (statistik tiket, dll.)
+        from . import signals  # noqa: F401
+        # Pasang penghitung query metrics di setiap koneksi database baru
+        from . import metrics  # noqa: F401
+
+        # Grup portal dibuat saat migrate, bukan di setiap request login/registrasi
+        from django.db.models.signals import post_migrate
+        from .roles import provision_portal_group
+        post_migrate.connect(provision_portal_group, sender=self)
@@ -0,0 +1,223 @@
+# tickets/async_views.py
+"""
+Versi async (ORM async) dari view portal yang paling sering dibaca.
+
+Dipakai oleh tickets/urls.py jika settings.PORTAL_ASYNC_VIEWS aktif, yaitu saat
+aplikasi dilayani lewat ASGI (config/asgi.py); di bawah WSGI versi sync di
+tickets/views.py lebih efisien. Query data memakai ORM async; render template
+dan pembacaan pesan flash (session) tetap sync, jadi dijalankan lewat
+sync_to_async agar tidak memblokir event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+
+from .caching import aget_fragments, amark_ticket_read, aticket_cache_version, aunread_count, fragment_cache_seconds
+from .knowledge_base import aactive_announcements, apopular_articles
+from .live import live_updates_enabled
+from .models import Ticket, TicketReply, TicketStats
+from .pagination import apaginate_keyset, apaginate_ranked
+from .streaming import arender_rows, stream_template
+from .views import (
+    _amy_tickets_state,
+    _filter_tickets,
+    _has_pending_messages,
+    _my_tickets_total_field,
+    _not_modified,
+    _page_size,
+    _portal_etag,
+    _rank_order,
+    _search_ticket_ids,
+    _set_validators,
+    _stream_chunk_size,
+    _stream_context,
+    portal_user_required,
+)
+
+
+_arender = sync_to_async(render)
+_arender_to_string = sync_to_async(render_to_string)
+_ahas_pending_messages = sync_to_async(_has_pending_messages)
+_anot_modified = sync_to_async(_not_modified)
+_astream_template = sync_to_async(stream_template)
+
+
+async def _aget_ticket(**lookup):
+    try:
+        return await Ticket.objects.select_related('created_by', 'department').aget(**lookup)
+    except Ticket.DoesNotExist:
+        raise Http404('Tiket tidak ditemukan')
+
+
+@login_required
+@portal_user_required
+async def dashboard(request):
+    user = request.user
+    ticket_version = await aticket_cache_version(user.id)
+    fragments = await aget_fragments({
+        'dashboard_stats': [user.id, ticket_version],
+        'dashboard_recent': [user.id, ticket_version],
+    })
+
+    # Query hanya untuk fragmen yang tidak ada di cache
+    stats = None
+    if 'dashboard_stats' not in fragments:
+        stats = await TicketStats.afor_user(user)
+    recent_tickets = []
+    if 'dashboard_recent' not in fragments:
+        recent_tickets = [
+            ticket async for ticket in
+            Ticket.objects.filter(created_by=user).select_related('department').order_by('-created_at')[:5]
+        ]
+
+    context = {
+        'waiting_tickets': stats and stats.waiting,
+        'in_progress_tickets': stats and stats.in_progress,
+        'closed_tickets': stats and stats.closed,
+        'total_tickets': stats and stats.total,
+        'recent_tickets': recent_tickets,
+        'fragments': fragments,
+        'ticket_version': ticket_version,
+        'fragment_seconds': fragment_cache_seconds(),
+        'unread_count': await aunread_count(user.id),
+        'announcements': await aactive_announcements(),
+        'popular_articles': await apopular_articles(),
+    }
+    return await _arender(request, 'tickets/dashboard.html', context)
+
+
+@login_required
+@portal_user_required
+async def ticket_success(request, ticket_id):
+    ticket = await _aget_ticket(id=ticket_id)
+    return await _arender(request, 'tickets/ticket_success.html', {
+        'ticket': ticket
+    })
+
+
+@login_required
+@portal_user_required
+async def my_tickets(request):
+    user = request.user
+
+    list_state = await _amy_tickets_state(user)
+    etag = _portal_etag(request, 'my-tickets', list_state, request.GET.urlencode())
+    not_modified = await _anot_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    search_query = request.GET.get('search', '')
+    status_filter = request.GET.get('status', 'all')
+    priority_filter = request.GET.get('priority', 'all')
+
+    if request.GET.get('view') == 'all' and not search_query:
+        rows = arender_rows(
+            'tickets/partials/ticket_row.html',
+            _filter_tickets(
+                Ticket.objects.filter(created_by=user).select_related('department'),
+                status_filter,
+                priority_filter,
+            ).order_by('-created_at', '-id').aiterator(chunk_size=_stream_chunk_size()),
+            'ticket',
+            chunk_size=_stream_chunk_size(),
+            empty=await _arender_to_string('tickets/partials/ticket_empty.html'),
+        )
+        field = _my_tickets_total_field(search_query, status_filter, priority_filter)
+        total_count = getattr(await TicketStats.afor_user(user), field) if field else None
+        has_messages = await _ahas_pending_messages(request)
+        response = await _astream_template(
+            request,
+            'tickets/my_tickets.html',
+            _stream_context(search_query, status_filter, priority_filter, total_count),
+            rows,
+        )
+        return _set_validators(response, None if has_messages else etag)
+
+    fragments = await aget_fragments({
+        'my_tickets_list': [user.id, list_state, request.GET.urlencode()],
+    })
+    page = None
+    total_count = None
+    if not fragments:
+        tickets = _filter_tickets(
+            Ticket.objects.filter(created_by=user).select_related('department'),
+            status_filter,
+            priority_filter,
+        )
+        if search_query:
+            async def fetch(offset, limit):
+                # Backend pencarian memakai cursor mentah (sync)
+                ranked_ids = await sync_to_async(_search_ticket_ids)(
+                    user, search_query, status_filter, priority_filter, offset, limit,
+                )
+                return _rank_order({t.id: t async for t in tickets.filter(pk__in=ranked_ids)}, ranked_ids)
+            page = await apaginate_ranked(
+                fetch,
+                after=request.GET.get('after'),
+                before=request.GET.get('before'),
+                page_size=_page_size(),
+            )
+        else:
+            page = await apaginate_keyset(
+                tickets,
+                after=request.GET.get('after'),
+                before=request.GET.get('before'),
+                page_size=_page_size(),
+            )
+        field = _my_tickets_total_field(search_query, status_filter, priority_filter)
+        if field:
+            total_count = getattr(await TicketStats.afor_user(user), field)
+
+    context = {
+        'tickets': page,
+        'page': page,
+        'total_count': total_count,
+        'search_query': search_query,
+        'status_filter': status_filter,
+        'priority_filter': priority_filter,
+        'fragments': fragments,
+        'list_state': list_state,
+        'fragment_seconds': fragment_cache_seconds(),
+    }
+    has_messages = await _ahas_pending_messages(request)
+    response = await _arender(request, 'tickets/my_tickets.html', context)
+    return _set_validators(response, None if has_messages else etag)
+
+
+@login_required
+@portal_user_required
+async def ticket_detail(request, ticket_id):
+    user = request.user
+    ticket = await _aget_ticket(id=ticket_id, created_by=user)
+    if request.method == 'GET':
+        await amark_ticket_read(user.id, ticket)
+
+    last_modified = max(filter(None, [ticket.updated_at, ticket.last_reply_at]))
+    etag = _portal_etag(request, 'ticket', ticket.pk, last_modified.isoformat(), ticket.reply_count, ticket.status)
+    not_modified = await _anot_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    if request.method == 'POST':
+        message = request.POST.get('message', '').strip()
+        if message:
+            await TicketReply.objects.acreate(ticket=ticket, user=user, message=message)
+            messages.success(request, 'Balasan Anda berhasil dikirim!')
+            return redirect('ticket-detail', ticket_id=ticket.id)
+        else:
+            messages.error(request, 'Pesan tidak boleh kosong.')
+
+    replies = [reply async for reply in ticket.replies.select_related('user').order_by('created_at')]
+    context = {
+        'ticket': ticket,
+        'replies': replies,
+        'live_updates': live_updates_enabled(),
+    }
+    has_messages = await _ahas_pending_messages(request)
+    response = await _arender(request, 'tickets/ticket_detail.html', context)
+    if request.method != 'GET' or has_messages:
+        return _set_validators(response, None)
+    return _set_validators(response, etag, last_modified)
@@ -0,0 +1,137 @@
+# tickets/caching.py
+"""
+Versi cache per user untuk fragmen daftar tiket (dashboard, Tiket Saya).
+
+Fragmen di-cache dengan kunci yang memuat versi ini. Setiap perubahan tiket
+atau balasan milik user menaikkan versinya (lihat tickets/signals.py), jadi
+fragmen lama otomatis tidak terpakai lagi tanpa perlu dihapus satu per satu.
+Jumlah tiket belum dibaca (badge notifikasi) di-cache dengan versi yang sama.
+
+Data yang di-invalidate lewat signal (versi dan fragmen di sini, role portal,
+pengumuman) memakai cross_process_timeout(): dengan cache per proses (LocMem)
+invalidasi hanya sampai ke proses yang mengubah data, jadi umurnya dibatasi.
+"""
+import functools
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.utils.safestring import mark_safe
+
+from .models import TicketReadMarker
+
+
+# Backend cache yang isinya hanya terlihat oleh satu proses
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    config = settings.CACHES.get(alias)
+    return bool(config) and config['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def cross_process_timeout(timeout):
+    """
+    Timeout cache untuk data yang di-invalidate signal. Tanpa cache bersama,
+    proses lain tidak ikut di-invalidate, jadi dibatasi LOCAL_CACHE_MAX_SECONDS.
+    """
+    if cache_is_shared():
+        return timeout
+    limit = getattr(settings, 'LOCAL_CACHE_MAX_SECONDS', 10)
+    return limit if timeout is None else min(timeout, limit)
+
+
+def _version_key(user_id):
+    return f"ticket-version:{user_id}"
+
+
+def fragment_cache_seconds():
+    return cross_process_timeout(getattr(settings, 'FRAGMENT_CACHE_SECONDS', 300))
+
+
+def ticket_cache_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Mulai dari timestamp, bukan 1: jika kunci versi sempat terbuang dari
+        # cache (LRU), versi baru tetap lebih besar dari semua versi lama
+        cache.add(key, time.time_ns(), cross_process_timeout(None))
+        version = cache.get(key)
+    return version
+
+
+async def aticket_cache_version(user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), cross_process_timeout(None))
+        version = await cache.aget(key)
+    return version
+
+
+async def aget_fragments(fragments):
+    """
+    Ambil beberapa fragmen {% cache %} sekaligus: {nama: [vary_on...]} -> {nama: html}.
+    Dipakai view async untuk melewati query data fragmen yang sudah ada di cache.
+    """
+    keys = {make_template_fragment_key(name, vary_on): name for name, vary_on in fragments.items()}
+    found = await cache.aget_many(list(keys))
+    return {keys[key]: mark_safe(html) for key, html in found.items()}
+
+
+def _unread_key(user_id, version):
+    return f"unread-count:{user_id}:{version}"
+
+
+def unread_count(user_id):
+    """Jumlah tiket dengan balasan staff yang belum dibaca; query hanya saat cache kosong"""
+    key = _unread_key(user_id, ticket_cache_version(user_id))
+    count = cache.get(key)
+    if count is None:
+        count = TicketReadMarker.unread_tickets(user_id).count()
+        cache.set(key, count, fragment_cache_seconds())
+    return count
+
+
+async def aunread_count(user_id):
+    key = _unread_key(user_id, await aticket_cache_version(user_id))
+    count = await cache.aget(key)
+    if count is None:
+        count = await TicketReadMarker.unread_tickets(user_id).acount()
+        await cache.aset(key, count, fragment_cache_seconds())
+    return count
+
+
+def mark_ticket_read(user_id, ticket):
+    # Membaca tiket tidak mengubah fragmen daftar tiket, jadi cukup hapus hitungan
+    # belum dibaca tanpa menaikkan versi
+    if TicketReadMarker.mark_read(user_id, ticket):
+        cache.delete(_unread_key(user_id, ticket_cache_version(user_id)))
+
+
+async def amark_ticket_read(user_id, ticket):
+    if await TicketReadMarker.amark_read(user_id, ticket):
+        await cache.adelete(_unread_key(user_id, await aticket_cache_version(user_id)))
+
+
+def _bump_version(user_id):
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), cross_process_timeout(None))
+
+
+def bump_ticket_cache_version(user_id):
+    # Dinaikkan setelah commit: jika naik lebih dulu, pembaca lain bisa merender
+    # data lama (belum di-commit) lalu menyimpannya di bawah versi baru
+    transaction.on_commit(functools.partial(_bump_version, user_id))
+
+
+def bump_ticket_cache_versions(user_ids):
+    for user_id in user_ids:
+        bump_ticket_cache_version(user_id)
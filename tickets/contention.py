@@ -0,0 +1,72 @@
+# tickets/contention.py
+"""
+Proses penulis untuk `manage.py bench_writes`.
+
+Modul ini di-import ulang oleh proses anak (spawn) sebelum django.setup(),
+jadi di level modul tidak boleh ada import model/app.
+"""
+import random
+import sqlite3
+import time
+
+import django
+
+
+def set_journal_mode(name, mode):
+    # journal_mode tersimpan di file; harus diganti tanpa koneksi lain yang terbuka
+    with sqlite3.connect(name, timeout=30) as conn:
+        conn.execute(f'PRAGMA journal_mode={mode}')
+    conn.close()
+
+
+def run_writer(database, job, barrier, results):
+    """
+    Target multiprocessing (spawn): campuran buat tiket dan balas tiket lewat
+    view, hasilnya dikirim ke queue `results`.
+    """
+    from django.conf import settings as worker_settings
+
+    # Proses baru (spawn): profil database dipasang sebelum koneksi pertama
+    worker_settings.DATABASES['default'] = database
+    django.setup()
+    from django.db import OperationalError, connections as worker_connections
+    from django.test import Client
+    from django.test.utils import override_settings
+    from django.urls import reverse
+
+    rng = random.Random(job['seed'])
+    outcome = {'ok': 0, 'locked': 0, 'errors': 0, 'latencies': [], 'started': None, 'finished': None}
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        client = Client()
+        client.cookies[worker_settings.SESSION_COOKIE_NAME] = job['session_id']
+        create_url = reverse('create-ticket')
+        barrier.wait(timeout=120)
+        outcome['started'] = time.time()
+        for i in range(job['ops']):
+            if job['ticket_ids'] and rng.random() < job['reply_ratio']:
+                url = reverse('ticket-detail', args=[rng.choice(job['ticket_ids'])])
+                data = {'message': f"Balasan benchmark {i}"}
+            else:
+                url = create_url
+                data = {
+                    'title': f"Benchmark tulis {i}",
+                    'department': job['department_id'],
+                    'priority': 'MEDIUM',
+                    'reply_to_email': job['email'],
+                    'description': 'Dibuat oleh bench_writes',
+                }
+            started = time.perf_counter()
+            try:
+                response = client.post(url, data)
+            except OperationalError as e:
+                outcome['locked' if 'locked' in str(e) else 'errors'] += 1
+                continue
+            finally:
+                outcome['latencies'].append((time.perf_counter() - started) * 1000)
+            if response.status_code == 302:
+                outcome['ok'] += 1
+            else:
+                outcome['errors'] += 1
+        outcome['finished'] = time.time()
+    worker_connections.close_all()
+    results.put(outcome)
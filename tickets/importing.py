@@ -0,0 +1,340 @@
+# tickets/importing.py
+"""
+Import tiket & balasan historis secara streaming dari CSV/JSONL.
+
+Setiap record punya `type` ("ticket" atau "reply"). Tiket memakai `ref`
+(ID di sistem lama) dan balasan menunjuk tiketnya lewat `ticket_ref`;
+balasan harus muncul setelah tiketnya. Di JSONL, tiket juga boleh membawa
+daftar `replies` langsung. Data dimasukkan per chunk dengan bulk_create,
+jadi tidak ada email notifikasi dan signal per baris.
+
+`ref` disimpan di Ticket.external_ref. Import ulang file yang sama (mis.
+setelah gagal di tengah jalan) melewati tiket yang sudah ada, dan balasan
+untuk tiket tersebut yang sudah tersimpan tidak dimasukkan lagi.
+"""
+import csv
+import json
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .caching import bump_ticket_cache_versions
+from .models import Department, Ticket, TicketReadMarker, TicketReply, TicketStats
+from .search import get_backend as get_search_backend
+
+CSV_COLUMNS = (
+    'type', 'ref', 'ticket_ref', 'title', 'description', 'created_by', 'department',
+    'status', 'priority', 'reply_to_email', 'created_at', 'updated_at', 'user', 'message',
+)
+
+
+class ImportRecordError(ValueError):
+    pass
+
+
+def read_csv(stream):
+    for line_no, row in enumerate(csv.DictReader(stream), start=2):
+        yield line_no, {key: value for key, value in row.items() if value not in (None, '')}
+
+
+def read_jsonl(stream):
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, ImportRecordError(f"JSON tidak valid: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_no, ImportRecordError(f"record harus berupa objek JSON, bukan {type(record).__name__}")
+            continue
+        yield line_no, record
+
+
+@contextmanager
+def preserve_timestamps():
+    """
+    Matikan auto_now/auto_now_add selama import agar created_at/updated_at
+    dari sistem lama tersimpan. Mengubah atribut field secara global, jadi
+    hanya dipakai di proses command import.
+    """
+    fields = [
+        Ticket._meta.get_field('created_at'),
+        Ticket._meta.get_field('updated_at'),
+        TicketReply._meta.get_field('created_at'),
+    ]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+class TicketImporter:
+    # Jumlah ref tiket dari chunk sebelumnya yang diingat untuk balasan yang datang terlambat
+    RECENT_REFS = 100_000
+
+    def __init__(self, chunk_size=1000, create_departments=True, on_error=None):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise RuntimeError('Database ini tidak mengembalikan ID dari bulk_create')
+        self.chunk_size = chunk_size
+        self.create_departments = create_departments
+        self.on_error = on_error or (lambda line_no, message: None)
+
+        self.users = {}
+        self.departments = {}
+        self.recent_refs = OrderedDict()
+        # Tiket dari import sebelumnya: balasannya dicek duplikat sebelum disimpan
+        self.existing_ticket_ids = set()
+        self.touched_users = set()
+
+        self.pending_tickets = []
+        self.chunk_refs = {}
+        self.pending_replies = []
+        self.pending_rows = 0
+
+        self.tickets_imported = 0
+        self.replies_imported = 0
+        self.tickets_skipped = 0
+        self.replies_skipped = 0
+        self.errors = 0
+
+    # --- Lookup dengan cache -------------------------------------------------
+
+    def resolve_user(self, value):
+        if not value:
+            raise ImportRecordError('user kosong')
+        if not isinstance(value, str):
+            raise ImportRecordError(f"user tidak valid: {value!r}")
+        if value not in self.users:
+            User = get_user_model()
+            user_id = (
+                User.objects
+                .filter(Q(username=value) | Q(email__iexact=value))
+                .order_by('id')
+                .values_list('id', flat=True)
+                .first()
+            )
+            self.users[value] = user_id
+        if self.users[value] is None:
+            raise ImportRecordError(f"user '{value}' tidak ditemukan")
+        return self.users[value]
+
+    def resolve_department(self, name):
+        if not name:
+            return None
+        if not isinstance(name, str):
+            raise ImportRecordError(f"departemen tidak valid: {name!r}")
+        if name not in self.departments:
+            department_id = Department.objects.filter(name=name).values_list('id', flat=True).first()
+            if department_id is None and self.create_departments:
+                department_id = Department.objects.create(name=name).id
+            self.departments[name] = department_id
+        if self.departments[name] is None:
+            raise ImportRecordError(f"departemen '{name}' tidak ditemukan")
+        return self.departments[name]
+
+    # --- Konversi record -----------------------------------------------------
+
+    @staticmethod
+    def parse_timestamp(value, default):
+        if not value:
+            return default
+        try:
+            # None untuk format salah; ValueError untuk format benar tapi di luar
+            # rentang (mis. bulan 13), TypeError untuk nilai bukan string
+            parsed = parse_datetime(value)
+        except (TypeError, ValueError):
+            parsed = None
+        if parsed is None:
+            raise ImportRecordError(f"tanggal tidak valid: {value}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    @staticmethod
+    def parse_choice(value, choices, default):
+        if not value:
+            return default
+        if not isinstance(value, str):
+            raise ImportRecordError(f"nilai tidak dikenal: {value!r}")
+        for choice_value, label in choices:
+            if value.upper() == choice_value or value.lower() == str(label).lower():
+                return choice_value
+        raise ImportRecordError(f"nilai tidak dikenal: {value}")
+
+    def build_ticket(self, record):
+        if not record.get('title'):
+            raise ImportRecordError('title kosong')
+        now = timezone.now()
+        created_at = self.parse_timestamp(record.get('created_at'), now)
+        return Ticket(
+            title=record['title'],
+            description=record.get('description', ''),
+            created_by_id=self.resolve_user(record.get('created_by')),
+            department_id=self.resolve_department(record.get('department')),
+            reply_to_email=record.get('reply_to_email', ''),
+            status=self.parse_choice(record.get('status'), Ticket.Status.choices, Ticket.Status.WAITING),
+            priority=self.parse_choice(record.get('priority'), Ticket.Priority.choices, Ticket.Priority.MEDIUM),
+            created_at=created_at,
+            updated_at=self.parse_timestamp(record.get('updated_at'), created_at),
+        )
+
+    def build_reply(self, record):
+        if not record.get('message'):
+            raise ImportRecordError('message kosong')
+        return TicketReply(
+            user_id=self.resolve_user(record.get('user')),
+            message=record['message'],
+            created_at=self.parse_timestamp(record.get('created_at'), timezone.now()),
+        )
+
+    # --- Streaming -----------------------------------------------------------
+
+    def add(self, line_no, record):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            record_type = record.get('type', 'ticket')
+            if record_type == 'ticket':
+                self.add_ticket(record)
+            elif record_type == 'reply':
+                self.add_reply(record.get('ticket_ref'), self.build_reply(record))
+            else:
+                raise ImportRecordError(f"type tidak dikenal: {record_type}")
+        except ImportRecordError as e:
+            self.errors += 1
+            self.on_error(line_no, str(e))
+            return
+
+        if self.pending_rows >= self.chunk_size:
+            self.flush()
+
+    def add_ticket(self, record):
+        ticket = self.build_ticket(record)
+        replies = record.get('replies', [])
+        if not isinstance(replies, list) or not all(isinstance(reply, dict) for reply in replies):
+            raise ImportRecordError('replies harus berupa daftar objek')
+        replies = [self.build_reply(reply) for reply in replies]
+        ref = record.get('ref')
+        if ref is not None:
+            ref = str(ref)
+            if len(ref) > Ticket._meta.get_field('external_ref').max_length:
+                raise ImportRecordError(f"ref terlalu panjang: {ref}")
+            if ref in self.chunk_refs or ref in self.recent_refs:
+                raise ImportRecordError(f"ref '{ref}' muncul lebih dari sekali")
+            ticket.external_ref = ref
+            self.chunk_refs[ref] = ticket
+        self.pending_tickets.append((ticket, replies))
+        self.pending_rows += 1 + len(replies)
+
+    def add_reply(self, ticket_ref, reply):
+        ticket_ref = str(ticket_ref) if ticket_ref is not None else None
+        if ticket_ref in self.chunk_refs:
+            ticket = self.chunk_refs[ticket_ref]
+            for pending_ticket, replies in self.pending_tickets:
+                if pending_ticket is ticket:
+                    replies.append(reply)
+                    break
+        elif ticket_ref in self.recent_refs:
+            reply.ticket_id = self.recent_refs[ticket_ref]
+            self.pending_replies.append(reply)
+        else:
+            # Tiket dari import sebelumnya (atau sudah keluar dari recent_refs)
+            ticket_id = None
+            if ticket_ref is not None:
+                ticket_id = Ticket.objects.filter(external_ref=ticket_ref).values_list('id', flat=True).first()
+            if ticket_id is None:
+                raise ImportRecordError(f"tiket dengan ref '{ticket_ref}' belum diimport")
+            self.remember_ref(ticket_ref, ticket_id)
+            self.existing_ticket_ids.add(ticket_id)
+            reply.ticket_id = ticket_id
+            self.pending_replies.append(reply)
+        self.pending_rows += 1
+
+    def remember_ref(self, ref, ticket_id):
+        self.recent_refs[ref] = ticket_id
+        self.recent_refs.move_to_end(ref)
+        while len(self.recent_refs) > self.RECENT_REFS:
+            self.recent_refs.popitem(last=False)
+
+    def skip_imported_replies(self, replies):
+        """Buang balasan tiket lama yang sudah tersimpan (import ulang)"""
+        ticket_ids = {reply.ticket_id for reply in replies} & self.existing_ticket_ids
+        if not ticket_ids:
+            return replies
+        stored = set(
+            TicketReply.objects
+            .filter(ticket_id__in=ticket_ids)
+            .values_list('ticket_id', 'user_id', 'created_at', 'message')
+        )
+        kept = [
+            reply for reply in replies
+            if (reply.ticket_id, reply.user_id, reply.created_at, reply.message) not in stored
+        ]
+        self.replies_skipped += len(replies) - len(kept)
+        return kept
+
+    def flush(self):
+        if not self.pending_tickets and not self.pending_replies:
+            return
+
+        with preserve_timestamps(), transaction.atomic():
+            # Tiket yang sudah masuk di import sebelumnya dilewati
+            existing = dict(
+                Ticket.objects
+                .filter(external_ref__in=list(self.chunk_refs))
+                .values_list('external_ref', 'id')
+            ) if self.chunk_refs else {}
+            tickets = []
+            for ticket, _ in self.pending_tickets:
+                if ticket.external_ref in existing:
+                    ticket.pk = existing[ticket.external_ref]
+                    self.existing_ticket_ids.add(ticket.pk)
+                else:
+                    tickets.append(ticket)
+            Ticket.objects.bulk_create(tickets)
+
+            replies = list(self.pending_replies)
+            for ticket, ticket_replies in self.pending_tickets:
+                for reply in ticket_replies:
+                    reply.ticket_id = ticket.pk
+                replies.extend(ticket_replies)
+            replies = self.skip_imported_replies(replies)
+            TicketReply.objects.bulk_create(replies)
+
+            # Data turunan yang biasanya dijaga signal, di transaksi yang sama
+            # dengan chunk-nya supaya tetap konsisten jika import berhenti di tengah
+            ticket_ids = {ticket.pk for ticket in tickets} | {reply.ticket_id for reply in replies}
+            Ticket.refresh_reply_summary(Ticket.objects.filter(pk__in=ticket_ids))
+            TicketReadMarker.mark_all_read(Ticket.objects.filter(pk__in=ticket_ids))
+            get_search_backend().index_ticket_ids(ticket_ids)
+            chunk_users = {ticket.created_by_id for ticket in tickets}
+            TicketStats.rebuild_many(chunk_users)
+            owners = set(Ticket.objects.filter(pk__in=ticket_ids).values_list('created_by_id', flat=True))
+            bump_ticket_cache_versions(owners)
+
+        for ref, ticket in self.chunk_refs.items():
+            self.remember_ref(ref, ticket.pk)
+
+        self.touched_users.update(chunk_users)
+        self.tickets_imported += len(tickets)
+        self.tickets_skipped += len(existing)
+        self.replies_imported += len(replies)
+        self.pending_tickets = []
+        self.pending_replies = []
+        self.chunk_refs = {}
+        self.pending_rows = 0
+
+    def finish(self):
+        self.flush()
@@ -0,0 +1,169 @@
+# tickets/knowledge_base.py
+"""
+Counter views artikel Knowledge Base dengan pola write-behind.
+
+Membuka artikel hanya menaikkan counter di cache (cache.incr, atomik di
+Redis/Memcached). Counter yang terkumpul ditulis ke database secara berkala
+oleh flush_article_views(): satu UPDATE ... CASE per batch artikel. Setelah
+flush, daftar artikel populer dihitung ulang sekali dan disimpan di cache,
+jadi dashboard tidak pernah mengurutkan artikel per request.
+
+Flush dijalankan oleh `manage.py flush_article_views`, dan juga ikut berjalan
+dari request jika sudah lewat ARTICLE_VIEW_FLUSH_SECONDS sejak flush terakhir.
+Command hanya melihat counter milik proses web jika cache-nya dipakai bersama
+(Redis/Memcached); dengan LocMemCache andalkan flush dari request.
+
+Daftar populer dan pengumuman dihapus dari cache oleh signal saat datanya
+berubah; tanpa cache bersama umurnya dibatasi (lihat cross_process_timeout).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from .caching import cross_process_timeout
+from .models import Announcement, Article
+
+logger = logging.getLogger(__name__)
+
+POPULAR_KEY = 'kb:popular-articles'
+ANNOUNCEMENTS_KEY = 'kb:announcements'
+FLUSH_LOCK_KEY = 'kb:flush-lock'
+FLUSH_DUE_KEY = 'kb:flush-due'
+
+
+def _views_key(article_id):
+    return f"kb:article-views:{article_id}"
+
+
+def flush_interval():
+    return getattr(settings, 'ARTICLE_VIEW_FLUSH_SECONDS', 60)
+
+
+def record_article_view(article_id):
+    """Catat satu view di cache; database baru disentuh saat flush"""
+    key = _views_key(article_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter belum ada; jika proses lain membuatnya duluan, ulangi incr
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+    interval = flush_interval()
+    if interval and cache.add(FLUSH_DUE_KEY, 1, interval):
+        flush_article_views()
+
+
+def flush_article_views(batch_size=500):
+    """
+    Tulis counter views yang tertunda ke database. Mengembalikan jumlah view
+    yang ditulis, atau None jika flush lain sedang berjalan.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, 300):
+        return None
+    try:
+        article_ids = list(Article.objects.values_list('pk', flat=True))
+        total = 0
+        for start in range(0, len(article_ids), batch_size):
+            total += _flush_batch(article_ids[start:start + batch_size])
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+    if total:
+        logger.info(f"{total} view artikel ditulis ke database")
+        refresh_popular_articles()
+    return total
+
+
+def _flush_batch(article_ids):
+    keys = {_views_key(article_id): article_id for article_id in article_ids}
+    pending = {keys[key]: count for key, count in cache.get_many(list(keys)).items() if count}
+    if not pending:
+        return 0
+
+    with transaction.atomic():
+        Article.objects.filter(pk__in=pending).update(
+            views=F('views') + Case(
+                *(When(pk=article_id, then=Value(count)) for article_id, count in pending.items()),
+                default=Value(0),
+            )
+        )
+    # Kurangi sebanyak yang sudah ditulis (bukan hapus), supaya view yang masuk
+    # selama flush tidak hilang
+    for article_id, count in pending.items():
+        try:
+            cache.decr(_views_key(article_id), count)
+        except ValueError:
+            pass
+    return sum(pending.values())
+
+
+def pending_views(article_id):
+    return cache.get(_views_key(article_id)) or 0
+
+
+def _popular_limit():
+    return getattr(settings, 'POPULAR_ARTICLES_LIMIT', 5)
+
+
+def _popular_queryset():
+    return (
+        Article.objects
+        .filter(is_published=True)
+        .order_by('-views', '-id')
+        .values('id', 'title', 'slug', 'category', 'views')[:_popular_limit()]
+    )
+
+
+def refresh_popular_articles():
+    articles = list(_popular_queryset())
+    cache.set(POPULAR_KEY, articles, cross_process_timeout(None))
+    return articles
+
+
+def popular_articles():
+    """Daftar artikel populer yang sudah dihitung saat flush terakhir"""
+    articles = cache.get(POPULAR_KEY)
+    if articles is None:
+        articles = refresh_popular_articles()
+    return articles
+
+
+async def apopular_articles():
+    articles = await cache.aget(POPULAR_KEY)
+    if articles is None:
+        articles = [article async for article in _popular_queryset()]
+        await cache.aset(POPULAR_KEY, articles, cross_process_timeout(None))
+    return articles
+
+
+def _announcements_queryset():
+    limit = getattr(settings, 'DASHBOARD_ANNOUNCEMENTS_LIMIT', 3)
+    return Announcement.objects.filter(is_active=True).order_by('-created_at')[:limit]
+
+
+def active_announcements():
+    announcements = cache.get(ANNOUNCEMENTS_KEY)
+    if announcements is None:
+        announcements = list(_announcements_queryset())
+        cache.set(ANNOUNCEMENTS_KEY, announcements, cross_process_timeout(None))
+    return announcements
+
+
+async def aactive_announcements():
+    announcements = await cache.aget(ANNOUNCEMENTS_KEY)
+    if announcements is None:
+        announcements = [announcement async for announcement in _announcements_queryset()]
+        await cache.aset(ANNOUNCEMENTS_KEY, announcements, cross_process_timeout(None))
+    return announcements
+
+
+def forget_popular_articles():
+    cache.delete(POPULAR_KEY)
+
+
+def forget_announcements():
+    cache.delete(ANNOUNCEMENTS_KEY)
@@ -0,0 +1,135 @@
+# tickets/live.py
+"""
+Balasan tiket secara live: endpoint Server-Sent Events dan fallback long-poll.
+
+Kedua view async, jadi di bawah ASGI (config/asgi.py) koneksi yang menunggu
+hanya berupa coroutine yang tidur di asyncio.Queue milik pub/sub, tanpa
+thread dan tanpa query berkala per koneksi. Di bawah WSGI setiap koneksi
+menahan satu thread worker, jadi route dan script-nya hanya dipasang jika
+REPLY_LIVE_UPDATES aktif.
+"""
+import asyncio
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+
+from .models import Ticket, TicketReply
+from .pubsub import get_broker
+from .roles import auser_has_portal_role
+
+
+def reply_event(reply):
+    """Payload satu balasan; reply.user harus sudah dimuat"""
+    return {
+        'id': reply.pk,
+        'ticket_id': reply.ticket_id,
+        'html': render_to_string('tickets/partials/reply.html', {'reply': reply}),
+    }
+
+
+def live_updates_enabled():
+    return getattr(settings, 'REPLY_LIVE_UPDATES', getattr(settings, 'PORTAL_ASYNC_VIEWS', False))
+
+
+def publish_reply(reply):
+    # Dikirim setelah commit agar klien tidak menerima balasan yang di-rollback.
+    # Subscriber dicek saat itu juga: yang subscribe sesudahnya membaca balasan
+    # ini dari database, jadi partial tidak perlu dirender untuk tiket yang tidak ditonton.
+    def publish():
+        broker = get_broker()
+        if broker.has_subscribers(reply.ticket_id):
+            broker.publish(reply.ticket_id, reply_event(reply))
+    transaction.on_commit(publish)
+
+
+def _last_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('after') or 0
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+async def _authorize(request, ticket_id):
+    user = await request.auser()
+    if not await auser_has_portal_role(user):
+        return HttpResponseForbidden('Login sebagai pengguna portal diperlukan.')
+    if not await Ticket.objects.filter(pk=ticket_id, created_by_id=user.pk).aexists():
+        raise Http404('Tiket tidak ditemukan')
+    return None
+
+
+async def _replies_after(ticket_id, last_id):
+    replies = (
+        TicketReply.objects
+        .filter(ticket_id=ticket_id, pk__gt=last_id)
+        .select_related('user')
+        .order_by('pk')
+    )
+    return [reply_event(reply) async for reply in replies]
+
+
+def _sse(event):
+    return f"id: {event['id']}\nevent: reply\ndata: {json.dumps(event)}\n\n"
+
+
+async def _event_stream(ticket_id, last_id):
+    heartbeat = getattr(settings, 'REPLY_STREAM_HEARTBEAT_SECONDS', 15)
+    max_seconds = getattr(settings, 'REPLY_STREAM_MAX_SECONDS', 300)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds
+
+    # Subscribe dulu baru mengejar ketinggalan, supaya tidak ada balasan yang terlewat di antaranya
+    with get_broker().subscribe(ticket_id) as subscription:
+        yield f"retry: {heartbeat * 1000}\n\n"
+        for event in await _replies_after(ticket_id, last_id):
+            last_id = event['id']
+            yield _sse(event)
+
+        while (remaining := deadline - loop.time()) > 0:
+            event = await subscription.get(timeout=min(heartbeat, remaining))
+            if event is None:
+                # Komentar SSE: menjaga koneksi tetap hidup melewati proxy
+                yield ': ping\n\n'
+                continue
+            if event['id'] <= last_id:
+                continue
+            last_id = event['id']
+            yield _sse(event)
+    # Koneksi ditutup berkala; EventSource otomatis menyambung lagi dengan Last-Event-ID
+
+
+async def reply_stream(request, ticket_id):
+    denied = await _authorize(request, ticket_id)
+    if denied is not None:
+        return denied
+    response = StreamingHttpResponse(_event_stream(ticket_id, _last_id(request)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Matikan buffering nginx agar event langsung sampai ke klien
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def reply_poll(request, ticket_id):
+    """Fallback long-poll: tunggu sampai ada balasan baru atau timeout, lalu kembalikan JSON"""
+    denied = await _authorize(request, ticket_id)
+    if denied is not None:
+        return denied
+
+    last_id = _last_id(request)
+    timeout = getattr(settings, 'REPLY_LONG_POLL_SECONDS', 25)
+    with get_broker().subscribe(ticket_id) as subscription:
+        events = await _replies_after(ticket_id, last_id)
+        if not events:
+            event = await subscription.get(timeout=timeout)
+            while event is not None:
+                if event['id'] > last_id:
+                    events.append(event)
+                event = subscription.get_nowait()
+
+    if events:
+        last_id = max(event['id'] for event in events)
+    return JsonResponse({'replies': events, 'last_id': last_id})
@@ -0,0 +1,225 @@
+# tickets/mail_pool.py
+"""
+Pool koneksi SMTP untuk worker outbox.
+
+Koneksi dibuka sekali lalu dipakai ulang untuk banyak batch `send_messages`,
+ditutup dan dibuka kembali jika sudah idle terlalu lama atau diputus server.
+"""
+import smtplib
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import get_connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def is_connection_error(error):
+    """True jika error berarti koneksinya rusak (bukan pesannya), jadi aman untuk reconnect"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException turunan OSError, tapi selain disconnect itu error per pesan
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, (OSError, socket.timeout))
+
+
+class PooledConnection:
+    def __init__(self, backend):
+        self.backend = backend
+        self.last_used = 0.0
+        self.is_open = False
+
+    def open(self):
+        self.backend.open()
+        self.is_open = True
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.backend.close()
+        except Exception:
+            # Server mungkin sudah menutup koneksi lebih dulu
+            pass
+        self.is_open = False
+
+
+class DeliveryStats:
+    """Statistik pengiriman kumulatif, dipakai sebagai metric throughput"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.send_seconds = 0.0
+
+    def record_batch(self, sent, failed, seconds):
+        with self._lock:
+            self.sent += sent
+            self.failed += failed
+            self.batches += 1
+            self.send_seconds += seconds
+
+    def record_open(self, reconnect=False):
+        with self._lock:
+            self.connections_opened += 1
+            if reconnect:
+                self.reconnects += 1
+
+    @property
+    def throughput(self):
+        """Pesan terkirim per detik waktu kirim"""
+        if not self.send_seconds:
+            return 0.0
+        return self.sent / self.send_seconds
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'sent': self.sent,
+                'failed': self.failed,
+                'batches': self.batches,
+                'connections_opened': self.connections_opened,
+                'reconnects': self.reconnects,
+                'send_seconds': self.send_seconds,
+                'messages_per_second': self.throughput,
+            }
+
+
+class SMTPConnectionPool:
+    def __init__(self, size=None, idle_timeout=None, batch_size=None, backend=None):
+        self.size = size or getattr(settings, 'EMAIL_POOL_SIZE', 2)
+        self.idle_timeout = idle_timeout if idle_timeout is not None else getattr(settings, 'EMAIL_POOL_IDLE_TIMEOUT', 60)
+        self.batch_size = batch_size or getattr(settings, 'EMAIL_BATCH_SIZE', 20)
+        self.backend = backend
+        self.stats = DeliveryStats()
+        self._idle = []
+        self._created = 0
+        self._cond = threading.Condition()
+
+    def _new_connection(self):
+        return PooledConnection(get_connection(self.backend, fail_silently=False))
+
+    def _ensure_open(self, conn):
+        if conn.is_open and time.monotonic() - conn.last_used > self.idle_timeout:
+            # Server SMTP biasanya memutus koneksi idle; buka ulang lebih dulu
+            logger.info("Koneksi SMTP idle terlalu lama, membuka ulang")
+            conn.close()
+            conn.open()
+            self.stats.record_open(reconnect=True)
+        elif not conn.is_open:
+            conn.open()
+            self.stats.record_open()
+
+    @contextmanager
+    def connection(self):
+        with self._cond:
+            while not self._idle and self._created >= self.size:
+                self._cond.wait()
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = self._new_connection()
+                self._created += 1
+        try:
+            self._ensure_open(conn)
+            yield conn
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            conn.last_used = time.monotonic()
+            with self._cond:
+                self._idle.append(conn)
+                self._cond.notify()
+
+    def _reconnect(self, conn):
+        conn.close()
+        conn.open()
+        self.stats.record_open(reconnect=True)
+
+    def _send_over(self, conn, messages):
+        """
+        Kirim satu batch lewat satu koneksi dengan `send_messages`. Jika ada
+        pesan yang gagal, pesan sebelumnya tetap dianggap terkirim dan sisa
+        batch dilanjutkan (setelah reconnect jika koneksinya yang rusak).
+        """
+        results = []
+        remaining = list(messages)
+        while remaining:
+            attempted = []
+
+            # send_messages berhenti di pesan pertama yang gagal tanpa memberi
+            # tahu posisinya, jadi catat pesan yang sudah diambil dari iterator
+            def tracked(batch=remaining):
+                for message in batch:
+                    attempted.append(message)
+                    yield message
+
+            try:
+                conn.backend.send_messages(tracked())
+            except Exception as e:
+                if not attempted:
+                    results.extend([e] * len(remaining))
+                    break
+                results.extend([None] * (len(attempted) - 1))
+                results.append(e)
+                remaining = remaining[len(attempted):]
+                if is_connection_error(e):
+                    logger.warning(f"Koneksi SMTP terputus, reconnect: {e}")
+                    try:
+                        self._reconnect(conn)
+                    except Exception as reconnect_error:
+                        # Server tidak bisa dihubungi lagi: sisa batch dianggap gagal
+                        results.extend([reconnect_error] * len(remaining))
+                        break
+            else:
+                results.extend([None] * len(remaining))
+                remaining = []
+        return results
+
+    def send(self, messages):
+        """
+        Kirim daftar `EmailMessage` dalam batch. Mengembalikan list berisi
+        None (terkirim) atau exception untuk tiap pesan, urutan sama dengan input.
+        """
+        results = []
+        for start in range(0, len(messages), self.batch_size):
+            batch = messages[start:start + self.batch_size]
+            started = time.monotonic()
+            try:
+                with self.connection() as conn:
+                    batch_results = self._send_over(conn, batch)
+            except Exception as e:
+                # Gagal membuka koneksi: seluruh batch dianggap gagal
+                batch_results = [e] * len(batch)
+            failed = sum(1 for r in batch_results if r is not None)
+            self.stats.record_batch(len(batch) - failed, failed, time.monotonic() - started)
+            results.extend(batch_results)
+        return results
+
+    def close(self):
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+            self._created = 0
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SMTPConnectionPool()
+        return _pool
@@ -0,0 +1,170 @@
+# tickets/management/commands/bench_concurrency.py
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import include, path, reverse
+
+from tickets.models import Ticket
+from tickets.seeding import seed_portal_data
+from tickets.urls import build_urlpatterns
+
+from .bench_portal import benchmark_database, percentile
+
+# Semua alias (termasuk cache session) diganti DummyCache
+NO_CACHE = {alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in settings.CACHES}
+
+
+def _urlconf(name, use_async_views):
+    """URLconf sementara: sama dengan config.urls, tapi view baca sync atau async"""
+    module = types.ModuleType(name)
+    module.urlpatterns = [
+        path('admin/', admin.site.urls),
+        path('', include(build_urlpatterns(use_async_views))),
+    ]
+    sys.modules[name] = module
+    return name
+
+
+class Command(BaseCommand):
+    help = (
+        'Bandingkan throughput view portal sync lewat WSGI (thread) dengan versi async '
+        'lewat ASGI (asyncio) di bawah klien konkuren. Berjalan di database test sementara '
+        '(file), database asli tidak tersentuh.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--tickets-per-user', type=int, default=100)
+        parser.add_argument('--replies-per-ticket', type=int, default=3)
+        parser.add_argument('--concurrency', type=int, default=20, help='Jumlah klien bersamaan')
+        parser.add_argument('--requests', type=int, default=30, help='Request per klien')
+        parser.add_argument('--no-cache', action='store_true', help='Pakai DummyCache (tanpa cache fragmen/role)')
+        parser.add_argument('--json', dest='json_path', help='Simpan hasil ke file JSON')
+
+    def handle(self, *args, **options):
+        # Database test berbasis file: klien WSGI (thread) dan ORM async memakai
+        # koneksi sendiri, jadi data contoh harus di-commit ke database yang sama
+        with benchmark_database():
+            seeded = seed_portal_data(
+                users=options['users'],
+                tickets_per_user=options['tickets_per_user'],
+                replies_per_ticket=options['replies_per_ticket'],
+            )
+            overrides = {'ALLOWED_HOSTS': ['testserver']}
+            if options['no_cache']:
+                overrides['CACHES'] = NO_CACHE
+            with override_settings(**overrides):
+                clients = self.prepare_clients(seeded)
+                results = {
+                    'wsgi-sync': self.run_wsgi(clients, options),
+                    'asgi-async': self.run_asgi(clients, options),
+                }
+
+        self.print_report(results, options)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({'options': {
+                    key: options[key] for key in ('users', 'tickets_per_user', 'concurrency', 'requests', 'no_cache')
+                }, 'results': results}, f, indent=2)
+            self.stdout.write(f"Hasil disimpan ke {options['json_path']}")
+
+    def prepare_clients(self, seeded):
+        """Cookie sesi + daftar URL per user portal"""
+        clients = []
+        for user in seeded.users:
+            client = Client()
+            client.force_login(user)
+            ticket_id = Ticket.objects.filter(created_by=user).values_list('pk', flat=True).first()
+            urls = [reverse('dashboard'), reverse('my-tickets'), f"{reverse('my-tickets')}?status=closed"]
+            if ticket_id:
+                urls.append(reverse('ticket-detail', args=[ticket_id]))
+            clients.append((client.cookies['sessionid'].value, urls))
+        return clients
+
+    def run_wsgi(self, clients, options):
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def worker(index):
+            session_id, urls = clients[index % len(clients)]
+            client = Client()
+            client.cookies['sessionid'] = session_id
+            local, failed = [], 0
+            try:
+                for i in range(options['requests']):
+                    started = time.perf_counter()
+                    response = client.get(urls[i % len(urls)])
+                    local.append((time.perf_counter() - started) * 1000)
+                    failed += response.status_code != 200
+            finally:
+                connections.close_all()
+            with lock:
+                latencies.extend(local)
+                errors.append(failed)
+
+        with override_settings(ROOT_URLCONF=_urlconf('bench_concurrency_sync_urls', False)):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                list(executor.map(worker, range(options['concurrency'])))
+            elapsed = time.perf_counter() - started
+        return self.summary(latencies, sum(errors), elapsed)
+
+    def run_asgi(self, clients, options):
+        latencies, errors = [], []
+
+        async def worker(index):
+            session_id, urls = clients[index % len(clients)]
+            client = AsyncClient()
+            client.cookies['sessionid'] = session_id
+            for i in range(options['requests']):
+                started = time.perf_counter()
+                response = await client.get(urls[i % len(urls)])
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors.append(response.status_code != 200)
+
+        async def main():
+            await asyncio.gather(*(worker(i) for i in range(options['concurrency'])))
+
+        with override_settings(ROOT_URLCONF=_urlconf('bench_concurrency_async_urls', True)):
+            started = time.perf_counter()
+            asyncio.run(main())
+            elapsed = time.perf_counter() - started
+        return self.summary(latencies, sum(errors), elapsed)
+
+    def summary(self, latencies, errors, elapsed):
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'seconds': elapsed,
+            'requests_per_second': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'mean_ms': statistics.fmean(latencies) if latencies else 0.0,
+        }
+
+    def print_report(self, results, options):
+        self.stdout.write(
+            f"{options['concurrency']} klien x {options['requests']} request"
+            f"{' (tanpa cache)' if options['no_cache'] else ''}"
+        )
+        header = f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'error':>7}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for mode, row in results.items():
+            self.stdout.write(
+                f"{mode:<12}{row['requests_per_second']:>10.1f}{row['p50_ms']:>10.2f}"
+                f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['errors']:>7}"
+            )
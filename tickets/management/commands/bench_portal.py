@@ -0,0 +1,212 @@
+# tickets/management/commands/bench_portal.py
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from tickets.metrics import QueryCounter
+from tickets.models import Ticket
+from tickets.pagination import encode_cursor
+from tickets.seeding import seed_portal_data
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Database test sementara (dimigrasi dari awal) dengan opsi koneksi yang
+    sama dengan 'default'. Data contoh tidak pernah masuk ke database asli,
+    jadi lock tulis dan index pencarian database itu tidak tersentuh.
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    saved_name = test_settings.get('NAME')
+    if connection.vendor == 'sqlite' and not saved_name:
+        # Bawaan test SQLite adalah in-memory; file lebih mewakili produksi
+        test_settings['NAME'] = os.path.join(tempfile.gettempdir(), f"bench-portal-{os.getpid()}.sqlite3")
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        test_name = connection.settings_dict['NAME']
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = saved_name
+        if connection.vendor == 'sqlite':
+            # Koneksi thread lain bisa meninggalkan file WAL/SHM
+            for suffix in ('-wal', '-shm'):
+                if os.path.exists(test_name + suffix):
+                    os.remove(test_name + suffix)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark view portal pada data contoh (bulk_create): latensi p50/p95/p99, '
+        'jumlah query dan memori puncak per view. Berjalan di database test sementara, '
+        'bukan database yang sedang dipakai.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--departments', type=int, default=5)
+        parser.add_argument('--tickets-per-user', type=int, default=200)
+        parser.add_argument('--replies-per-ticket', type=int, default=5)
+        parser.add_argument('--iterations', type=int, default=30, help='Jumlah request terukur per skenario')
+        parser.add_argument('--warmup', type=int, default=3, help='Request pemanasan per skenario (tidak diukur)')
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Pakai DummyCache agar setiap request merender ulang (tanpa cache fragmen/role)',
+        )
+        parser.add_argument('--json', dest='json_path', help='Simpan hasil ke file JSON')
+        parser.add_argument('--compare', dest='compare_path', help='Bandingkan p95 dengan hasil JSON sebelumnya')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations minimal 1')
+        if options['users'] < 1:
+            raise CommandError('--users minimal 1')
+        if options['warmup'] < 0:
+            raise CommandError('--warmup tidak boleh negatif')
+
+        with benchmark_database():
+            started = time.perf_counter()
+            seeded = seed_portal_data(
+                users=options['users'],
+                departments=options['departments'],
+                tickets_per_user=options['tickets_per_user'],
+                replies_per_ticket=options['replies_per_ticket'],
+                prefix='bench',
+            )
+            seed_seconds = time.perf_counter() - started
+            self.stdout.write(f"Data contoh siap dalam {seed_seconds:.1f} detik")
+            results = self.run_scenarios(seeded, options)
+
+        report = {
+            'volumes': {
+                'users': options['users'],
+                'departments': options['departments'],
+                'tickets_per_user': options['tickets_per_user'],
+                'replies_per_ticket': options['replies_per_ticket'],
+            },
+            'iterations': options['iterations'],
+            'seed_seconds': seed_seconds,
+            'views': results,
+        }
+        self.print_report(results)
+
+        if options['compare_path']:
+            with open(options['compare_path']) as f:
+                self.print_comparison(json.load(f)['views'], results)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Hasil disimpan ke {options['json_path']}")
+
+    def scenarios(self, seeded):
+        user = seeded.users[0]
+        tickets = list(Ticket.objects.filter(created_by=user).order_by('-created_at', '-id'))
+        middle = encode_cursor(tickets[len(tickets) // 2]) if tickets else ''
+        ticket_id = tickets[0].id if tickets else 0
+        department_id = seeded.departments[0].id if seeded.departments else ''
+        my_tickets = reverse('my-tickets')
+
+        return user, [
+            ('dashboard', 'GET', reverse('dashboard'), None),
+            ('my-tickets', 'GET', my_tickets, None),
+            ('my-tickets search', 'GET', f"{my_tickets}?search=printer", None),
+            ('my-tickets filter', 'GET', f"{my_tickets}?status=closed&priority=high", None),
+            ('my-tickets deep page', 'GET', f"{my_tickets}?after={middle}", None),
+            ('ticket-detail', 'GET', reverse('ticket-detail', args=[ticket_id]), None),
+            ('create-ticket form', 'GET', reverse('create-ticket'), None),
+            ('create-ticket submit', 'POST', reverse('create-ticket'), {
+                'title': 'Benchmark tiket',
+                'department': department_id,
+                'priority': 'MEDIUM',
+                'reply_to_email': user.email,
+                'description': 'Dibuat oleh bench_portal',
+            }),
+        ]
+
+    def run_scenarios(self, seeded, options):
+        user, scenarios = self.scenarios(seeded)
+        results = {}
+        overrides = {'ALLOWED_HOSTS': ['testserver']}
+        if options['no_cache']:
+            overrides['CACHES'] = {
+                alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in settings.CACHES
+            }
+        with override_settings(**overrides):
+            client = Client()
+            client.force_login(user)
+
+            for name, method, url, data in scenarios:
+                request = (lambda: client.post(url, data)) if method == 'POST' else (lambda: client.get(url))
+                for _ in range(options['warmup']):
+                    request()
+
+                latencies = []
+                query_counts = []
+                for _ in range(options['iterations']):
+                    counter = QueryCounter()
+                    with connection.execute_wrapper(counter):
+                        started = time.perf_counter()
+                        response = request()
+                        latencies.append((time.perf_counter() - started) * 1000)
+                    query_counts.append(counter.count)
+
+                # Memori diukur terpisah karena tracemalloc memperlambat request
+                tracemalloc.start()
+                request()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                results[name] = {
+                    'method': method,
+                    'url': url,
+                    'status': response.status_code,
+                    'p50_ms': percentile(latencies, 50),
+                    'p95_ms': percentile(latencies, 95),
+                    'p99_ms': percentile(latencies, 99),
+                    'mean_ms': statistics.fmean(latencies) if latencies else 0.0,
+                    'queries': max(query_counts) if query_counts else 0,
+                    'peak_memory_kb': peak / 1024,
+                }
+        return results
+
+    def print_report(self, results):
+        header = f"{'view':<24}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'peak KB':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<24}{row['status']:>7}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+                f"{row['p99_ms']:>10.2f}{row['queries']:>9}{row['peak_memory_kb']:>10.0f}"
+            )
+
+    def print_comparison(self, baseline, results):
+        self.stdout.write('\nPerbandingan p95 dan jumlah query terhadap baseline:')
+        for name, row in results.items():
+            old = baseline.get(name)
+            if not old:
+                self.stdout.write(f"{name:<24} (tidak ada di baseline)")
+                continue
+            change = (row['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+            self.stdout.write(
+                f"{name:<24}{old['p95_ms']:>10.2f} -> {row['p95_ms']:>8.2f} ms ({change:+.1f}%), "
+                f"query {old['queries']} -> {row['queries']}"
+            )
@@ -0,0 +1,138 @@
+# tickets/management/commands/bench_writes.py
+import json
+import multiprocessing
+import queue
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from config.database import SQLITE_PROFILES, sqlite_database
+from tickets.contention import run_writer, set_journal_mode
+from tickets.models import Department, OutboundEmail, Ticket
+from tickets.seeding import seed_portal_data
+
+from .bench_portal import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark penulisan bersamaan dari beberapa proses (buat tiket + balasan) '
+        'untuk setiap profil SQLite: throughput dan persentase error `database is locked`. '
+        'Data contoh dihapus setelah selesai.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8, help='Jumlah proses penulis')
+        parser.add_argument('--ops', type=int, default=50, help='Request tulis per proses')
+        parser.add_argument('--reply-ratio', type=float, default=0.5, help='Porsi balasan (sisanya tiket baru)')
+        parser.add_argument(
+            '--profile', action='append', choices=sorted(SQLITE_PROFILES), dest='profiles',
+            help='Profil yang diuji (boleh berulang; default semua)',
+        )
+        parser.add_argument('--json', dest='json_path', help='Simpan hasil ke file JSON')
+
+    def handle(self, *args, **options):
+        name = str(settings.DATABASES['default']['NAME'])
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3' or ':memory:' in name or 'mode=memory' in name:
+            raise CommandError('Benchmark ini butuh database SQLite berbasis file')
+
+        profiles = options['profiles'] or list(SQLITE_PROFILES)
+        prefix = f"benchwrite{int(time.time())}"
+        outbox_before = OutboundEmail.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        seeded = seed_portal_data(
+            users=options['processes'], departments=1, tickets_per_user=5, replies_per_ticket=1, prefix=prefix,
+        )
+        results = {}
+        try:
+            jobs = self.prepare_jobs(seeded, options)
+            for profile in profiles:
+                results[profile] = self.run_profile(name, profile, jobs)
+        finally:
+            connections.close_all()
+            set_journal_mode(name, SQLITE_PROFILES[getattr(settings, 'DATABASE_PROFILE', 'default')].get('pragmas', {}).get('journal_mode', 'DELETE'))
+            get_user_model().objects.filter(username__startswith=prefix).delete()
+            Department.objects.filter(name__startswith=prefix).delete()
+            OutboundEmail.objects.filter(pk__gt=outbox_before, recipients__icontains=prefix).delete()
+
+        self.print_report(results)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({'options': {
+                    key: options[key] for key in ('processes', 'ops', 'reply_ratio')
+                }, 'results': results}, f, indent=2)
+            self.stdout.write(f"Hasil disimpan ke {options['json_path']}")
+
+    def prepare_jobs(self, seeded, options):
+        """Cookie sesi, tiket milik user, dan departemen per proses"""
+        department_id = seeded.departments[0].id
+        jobs = []
+        for index, user in enumerate(seeded.users):
+            client = Client()
+            client.force_login(user)
+            jobs.append({
+                'seed': index,
+                'session_id': client.cookies[settings.SESSION_COOKIE_NAME].value,
+                'email': user.email,
+                'department_id': department_id,
+                'ticket_ids': list(Ticket.objects.filter(created_by=user).values_list('pk', flat=True)),
+                'ops': options['ops'],
+                'reply_ratio': options['reply_ratio'],
+            })
+        return jobs
+
+    def run_profile(self, name, profile, jobs):
+        database = sqlite_database(name, profile)
+        connections.close_all()
+        set_journal_mode(name, SQLITE_PROFILES[profile].get('pragmas', {}).get('journal_mode', 'DELETE'))
+
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(len(jobs))
+        results = context.Queue()
+        processes = [context.Process(target=run_writer, args=(database, job, barrier, results)) for job in jobs]
+        for process in processes:
+            process.start()
+        # Ambil hasil sebelum join: proses tidak keluar selama isi Queue belum dibaca
+        outcomes = []
+        try:
+            while len(outcomes) < len(processes):
+                try:
+                    outcomes.append(results.get(timeout=1))
+                except queue.Empty:
+                    if any(process.exitcode for process in processes):
+                        raise CommandError(f"Proses penulis gagal (profil {profile})")
+        finally:
+            for process in processes:
+                process.join(timeout=30)
+                if process.is_alive():
+                    process.terminate()
+
+        latencies = [latency for outcome in outcomes for latency in outcome['latencies']]
+        ok = sum(outcome['ok'] for outcome in outcomes)
+        locked = sum(outcome['locked'] for outcome in outcomes)
+        elapsed = max(outcome['finished'] for outcome in outcomes) - min(outcome['started'] for outcome in outcomes)
+        return {
+            'requests': len(latencies),
+            'ok': ok,
+            'locked': locked,
+            'errors': sum(outcome['errors'] for outcome in outcomes),
+            'lock_error_rate': locked / len(latencies) if latencies else 0.0,
+            'writes_per_second': ok / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+        }
+
+    def print_report(self, results):
+        header = f"{'profil':<12} {'request':>8} {'ok':>6} {'locked':>7} {'error':>6} {'lock %':>7} {'tulis/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for profile, row in results.items():
+            self.stdout.write(
+                f"{profile:<12} {row['requests']:>8} {row['ok']:>6} {row['locked']:>7} {row['errors']:>6} "
+                f"{row['lock_error_rate'] * 100:>6.1f}% {row['writes_per_second']:>9.1f} "
+                f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+            )
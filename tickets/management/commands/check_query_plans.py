@@ -0,0 +1,137 @@
+# tickets/management/commands/check_query_plans.py
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from tickets.models import Ticket
+from tickets.pagination import encode_cursor
+from tickets.search import SEARCH_TABLE
+from tickets.seeding import seed_portal_data
+
+# Tabel yang harus selalu diakses lewat index
+CHECKED_TABLES = ('tickets_ticket', 'tickets_ticketreply', 'tickets_ticketstats', 'tickets_ticketreadmarker')
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?! USING)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+
+# Semua alias (termasuk cache session) diganti DummyCache
+NO_CACHE = {alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in settings.CACHES}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Jalankan EXPLAIN QUERY PLAN untuk query setiap view portal pada data contoh '
+        'dan gagal jika ada full scan atau sort TEMP B-TREE pada tabel tiket'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=200, help='Jumlah tiket contoh per user')
+        parser.add_argument('--users', type=int, default=20, help='Jumlah user contoh')
+        parser.add_argument('--verbose-plans', action='store_true', help='Tampilkan semua query plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Pemeriksaan query plan hanya mendukung SQLite')
+
+        problems = []
+        # Data contoh dibuat di dalam transaksi yang selalu di-rollback
+        try:
+            with transaction.atomic():
+                scenarios = self.seed(options['users'], options['tickets'])
+                problems = self.check_views(scenarios, options['verbose_plans'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        if problems:
+            for view_name, sql, detail in problems:
+                self.stderr.write(f"[{view_name}] {detail}\n    {sql}")
+            raise CommandError(f"{len(problems)} query plan bermasalah")
+        self.stdout.write(self.style.SUCCESS('Semua query view memakai index'))
+
+    def seed(self, user_count, ticket_count):
+        seeded = seed_portal_data(
+            users=max(user_count, 1),
+            departments=1,
+            tickets_per_user=ticket_count,
+            replies_per_ticket=3,
+            prefix='queryplan',
+        )
+
+        user = seeded.users[0]
+        tickets = list(Ticket.objects.filter(created_by=user).order_by('-created_at', '-id'))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        ticket = tickets[0]
+        cursor_value = encode_cursor(tickets[len(tickets) // 2])
+        return user, [
+            ('dashboard', reverse('dashboard')),
+            ('my-tickets', reverse('my-tickets')),
+            ('my-tickets status', reverse('my-tickets') + '?status=closed'),
+            ('my-tickets priority', reverse('my-tickets') + '?priority=high'),
+            ('my-tickets search', reverse('my-tickets') + '?search=printer'),
+            ('my-tickets page', reverse('my-tickets') + f'?after={cursor_value}'),
+            ('my-tickets previous', reverse('my-tickets') + f'?before={cursor_value}'),
+            ('my-tickets all', reverse('my-tickets') + '?view=all&status=closed'),
+            ('ticket-detail', reverse('ticket-detail', args=[ticket.id])),
+            ('ticket-success', reverse('ticket-success', args=[ticket.id])),
+            ('create-ticket', reverse('create-ticket')),
+        ]
+
+    def check_views(self, scenarios, verbose):
+        user, urls = scenarios
+        captured = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                captured.append((sql, params))
+            return execute(sql, params, many, context)
+
+        # DummyCache: fragmen tidak diambil dari cache, jadi semua query view ikut diperiksa
+        with override_settings(ALLOWED_HOSTS=['testserver'], CACHES=NO_CACHE):
+            client = Client()
+            client.force_login(user)
+            problems = []
+            for view_name, url in urls:
+                captured.clear()
+                with connection.execute_wrapper(capture):
+                    response = client.get(url)
+                    if response.streaming:
+                        # Baris halaman streaming baru di-query saat isinya dibaca
+                        b''.join(response.streaming_content)
+                if response.status_code != 200:
+                    raise CommandError(f"{view_name} ({url}) mengembalikan status {response.status_code}")
+                for sql, params in list(captured):
+                    problems.extend(
+                        (view_name, sql, detail)
+                        for detail in self.plan_problems(sql, params, view_name, verbose)
+                    )
+            return problems
+
+    def plan_problems(self, sql, params, view_name, verbose):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            details = [row[-1] for row in cursor.fetchall()]
+
+        if verbose:
+            self.stdout.write(f"[{view_name}] {sql}")
+            for detail in details:
+                self.stdout.write(f"    {detail}")
+
+        for detail in details:
+            scan = FULL_SCAN.match(detail)
+            if scan and scan.group(1) in CHECKED_TABLES:
+                yield f"Full scan: {detail}"
+            # Hasil full-text memang harus diurutkan menurut relevansi
+            elif TEMP_SORT.search(detail) and SEARCH_TABLE not in sql and any(table in sql for table in CHECKED_TABLES):
+                yield f"Sort tanpa index: {detail}"
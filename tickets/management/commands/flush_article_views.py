@@ -0,0 +1,29 @@
+# tickets/management/commands/flush_article_views.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from tickets.knowledge_base import flush_article_views, flush_interval
+
+
+class Command(BaseCommand):
+    help = 'Tulis counter views artikel dari cache ke database dan hitung ulang daftar artikel populer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Jalankan terus setiap --interval detik')
+        parser.add_argument('--interval', type=float, default=None, help='Detik antar flush (default ARTICLE_VIEW_FLUSH_SECONDS)')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or flush_interval() or 60
+        try:
+            while True:
+                written = flush_article_views()
+                if written is None:
+                    self.stdout.write('Flush lain sedang berjalan, dilewati')
+                elif written or not options['loop']:
+                    self.stdout.write(f"{written} view artikel ditulis ke database")
+                if not options['loop']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
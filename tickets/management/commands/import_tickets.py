@@ -0,0 +1,66 @@
+# tickets/management/commands/import_tickets.py
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.importing import TicketImporter, read_csv, read_jsonl
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+class Command(BaseCommand):
+    help = 'Import tiket dan balasan historis dari CSV/JSONL secara streaming (tanpa email notifikasi)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File CSV/JSONL, atau '-' untuk stdin")
+        parser.add_argument('--format', choices=sorted(READERS), help='Default: dari ekstensi file')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Jumlah baris per transaksi bulk_create')
+        parser.add_argument(
+            '--no-create-departments', action='store_true',
+            help='Tolak baris dengan departemen yang belum ada, bukan membuatnya',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format']
+        if fmt is None:
+            if path.endswith('.csv'):
+                fmt = 'csv'
+            elif path.endswith(('.jsonl', '.ndjson')):
+                fmt = 'jsonl'
+            else:
+                raise CommandError('Format tidak bisa ditebak dari nama file, gunakan --format')
+
+        def report_error(line_no, message):
+            self.stderr.write(f"Baris {line_no}: {message}")
+
+        try:
+            importer = TicketImporter(
+                chunk_size=options['chunk_size'],
+                create_departments=not options['no_create_departments'],
+                on_error=report_error,
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            last_report = 0
+            for line_no, record in READERS[fmt](stream):
+                importer.add(line_no, record)
+                if importer.tickets_imported - last_report >= 10 * importer.chunk_size:
+                    last_report = importer.tickets_imported
+                    self.stdout.write(f"{importer.tickets_imported} tiket, {importer.replies_imported} balasan...")
+            importer.finish()
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Import selesai: {importer.tickets_imported} tiket, {importer.replies_imported} balasan, "
+            f"{importer.tickets_skipped} tiket dan {importer.replies_skipped} balasan sudah ada, "
+            f"{importer.errors} baris dilewati ({elapsed:.1f} detik)"
+        ))
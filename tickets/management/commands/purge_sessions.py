@@ -0,0 +1,25 @@
+# tickets/management/commands/purge_sessions.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tickets.sessions import SessionStore, flush_expiry_updates
+
+
+class Command(BaseCommand):
+    help = 'Hapus sesi kedaluwarsa per chunk (transaksi pendek, tanpa lock tabel yang lama)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None, help='Sesi per DELETE (default SESSION_PURGE_CHUNK_SIZE)')
+        parser.add_argument('--pause', type=float, default=0.0, help='Jeda (detik) antar chunk agar penulis lain mendapat giliran')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size'] or getattr(settings, 'SESSION_PURGE_CHUNK_SIZE', 1000)
+        # Perpanjangan yang masih tertunda di proses ini ditulis dulu agar tidak ikut terhapus
+        flush_expiry_updates(force=True)
+
+        started = time.perf_counter()
+        deleted = SessionStore.clear_expired(chunk_size=chunk_size, pause=options['pause'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{deleted} sesi kedaluwarsa dihapus dalam {elapsed:.2f} detik")
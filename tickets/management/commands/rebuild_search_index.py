@@ -0,0 +1,15 @@
+# tickets/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tickets.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Bangun ulang index pencarian full-text tiket dan balasan'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Index pencarian ({type(backend).__name__}) selesai dibangun ulang"))
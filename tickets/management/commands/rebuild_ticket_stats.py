@@ -0,0 +1,46 @@
+# tickets/management/commands/rebuild_ticket_stats.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tickets.models import Ticket, TicketStats
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang atau verifikasi tabel TicketStats terhadap tabel Ticket'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Hanya laporkan selisih, tanpa menulis')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Batasi ke user ID tertentu')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+
+        existing = TicketStats.objects.all()
+        owners = Ticket.objects.values_list('created_by_id', flat=True).distinct().order_by()
+        if user_ids:
+            existing = existing.filter(user_id__in=user_ids)
+            owners = owners.filter(created_by_id__in=user_ids)
+
+        current = {
+            stats.user_id: {field: getattr(stats, field) for field in TicketStats.COUNTER_FIELDS}
+            for stats in existing
+        }
+        all_user_ids = sorted(set(current) | set(owners))
+
+        mismatched = 0
+        for user_id in all_user_ids:
+            expected = TicketStats.compute_for(user_id)
+            if current.get(user_id) == expected:
+                continue
+            mismatched += 1
+            self.stdout.write(f"User {user_id}: tersimpan {current.get(user_id)}, seharusnya {expected}")
+            if not options['verify']:
+                with transaction.atomic():
+                    TicketStats.rebuild_for(user_id)
+
+        if options['verify']:
+            if mismatched:
+                raise CommandError(f"{mismatched} dari {len(all_user_ids)} user tidak sinkron")
+            self.stdout.write(self.style.SUCCESS(f"Semua {len(all_user_ids)} user sinkron"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{mismatched} dari {len(all_user_ids)} user diperbaiki"))
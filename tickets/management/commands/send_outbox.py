@@ -0,0 +1,45 @@
+# tickets/management/commands/send_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from tickets.mail_pool import get_pool
+from tickets.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Worker pengirim email dari outbox dengan retry, exponential backoff, dan dead letter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Proses antrean sampai kosong lalu berhenti')
+        parser.add_argument('--batch-size', type=int, default=None, help='Jumlah email per batch')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Detik menunggu saat antrean kosong')
+
+    def handle(self, *args, **options):
+        pool = get_pool()
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = deliver_batch(options['batch_size'], pool=pool)
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(
+                        f"Batch selesai: {sent} terkirim, {failed} gagal "
+                        f"({pool.stats.throughput:.1f} pesan/detik)"
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.close()
+
+        stats = pool.stats.as_dict()
+        self.stdout.write(self.style.SUCCESS(
+            f"Total: {total_sent} terkirim, {total_failed} gagal, "
+            f"{stats['connections_opened']} koneksi SMTP ({stats['reconnects']} reconnect), "
+            f"{stats['messages_per_second']:.1f} pesan/detik"
+        ))
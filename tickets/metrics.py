@@ -0,0 +1,294 @@
+# tickets/metrics.py
+"""
+Metric request per view (jumlah, latensi, jumlah & durasi query SQL)
+dalam format teks Prometheus.
+
+Metric disimpan per proses; jika aplikasi dijalankan dengan beberapa worker,
+Prometheus perlu men-scrape setiap worker.
+
+Response streaming (daftar tiket penuh, SSE, long-poll) dicatat setelah isi
+terakhir terkirim, jadi latensi dan query selama streaming ikut terhitung.
+"""
+import contextvars
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # Simpan per bucket (bukan kumulatif) supaya observe cukup O(log n)
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.queries = {}
+        self.sql_seconds = {}
+
+    def record(self, view, method, status, seconds, query_count, sql_seconds):
+        key = (view, method, str(status))
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if view not in self.latency:
+                self.latency[view] = Histogram(LATENCY_BUCKETS)
+                self.queries[view] = Histogram(QUERY_COUNT_BUCKETS)
+                self.sql_seconds[view] = 0.0
+            self.latency[view].observe(seconds)
+            self.queries[view].observe(query_count)
+            self.sql_seconds[view] += sql_seconds
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.latency.clear()
+            self.queries.clear()
+            self.sql_seconds.clear()
+
+    def render(self):
+        """Teks exposition format Prometheus 0.0.4"""
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP tickets_http_requests_total Jumlah request per view, method dan status.',
+                '# TYPE tickets_http_requests_total counter',
+            ]
+            for (view, method, status), value in sorted(self.requests.items()):
+                lines.append(f'tickets_http_requests_total{{view="{_escape(view)}",method="{method}",status="{status}"}} {value}')
+
+            lines += _render_histogram(
+                'tickets_http_request_duration_seconds', 'Latensi request per view.', self.latency,
+            )
+            lines += _render_histogram(
+                'tickets_http_request_sql_queries', 'Jumlah query SQL per request.', self.queries,
+            )
+
+            lines += [
+                '# HELP tickets_http_request_sql_seconds_total Total waktu query SQL per view.',
+                '# TYPE tickets_http_request_sql_seconds_total counter',
+            ]
+            for view, value in sorted(self.sql_seconds.items()):
+                lines.append(f'tickets_http_request_sql_seconds_total{{view="{_escape(view)}"}} {value:.6f}')
+
+        lines += _render_email_pool()
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _render_histogram(name, help_text, histograms):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for view, histogram in sorted(histograms.items()):
+        label = f'view="{_escape(view)}"'
+        for bound, total in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {total}')
+        lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{label}}} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{{{label}}} {histogram.count}')
+    return lines
+
+
+def _render_email_pool():
+    # Pool SMTP hanya ada di proses yang mengirim email (worker send_outbox)
+    from . import mail_pool
+
+    if mail_pool._pool is None:
+        return []
+    stats = mail_pool._pool.stats.as_dict()
+    return [
+        '# HELP tickets_email_sent_total Email terkirim lewat pool SMTP.',
+        '# TYPE tickets_email_sent_total counter',
+        f"tickets_email_sent_total {stats['sent']}",
+        '# HELP tickets_email_failed_total Email gagal dikirim lewat pool SMTP.',
+        '# TYPE tickets_email_failed_total counter',
+        f"tickets_email_failed_total {stats['failed']}",
+        '# HELP tickets_email_messages_per_second Throughput pengiriman email.',
+        '# TYPE tickets_email_messages_per_second gauge',
+        f"tickets_email_messages_per_second {stats['messages_per_second']:.3f}",
+    ]
+
+
+registry = MetricsRegistry()
+
+
+class QueryCounter:
+    """execute_wrapper yang menghitung jumlah dan durasi query"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        # Aset statis dilayani middleware sebelum URL resolver
+        if request.path_info.startswith('/' + settings.STATIC_URL.lstrip('/')):
+            return 'static'
+        return 'unmatched'
+    return match.view_name or 'unnamed'
+
+
+# Counter milik request yang sedang berjalan. ContextVar ikut terbawa ke thread
+# sync_to_async, jadi query dari view sync maupun ORM async tetap terhitung.
+_current_counter = contextvars.ContextVar('request_query_counter', default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_queries)
+
+
+class RequestMetricsMiddleware:
+    # Mendukung sync & async agar view async (SSE, long-poll) tidak dipindah ke thread
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        token = _current_counter.set(counter)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_counter.reset(token)
+        return self.finish(request, response, started, counter)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        token = _current_counter.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_counter.reset(token)
+        return self.finish(request, response, started, counter)
+
+    def finish(self, request, response, started, counter):
+        if response.streaming:
+            response.streaming_content = self.measure_stream(request, response, started, counter)
+        else:
+            self.record(request, response, time.perf_counter() - started, counter)
+        return response
+
+    def measure_stream(self, request, response, started, counter):
+        """Bungkus isi streaming: query per chunk dihitung, request dicatat saat stream selesai/putus"""
+        content = response.streaming_content
+        if response.is_async:
+            async def measured():
+                iterator = aiter(content)
+                try:
+                    while True:
+                        token = _current_counter.set(counter)
+                        try:
+                            chunk = await anext(iterator)
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            _current_counter.reset(token)
+                        yield chunk
+                finally:
+                    self.record(request, response, time.perf_counter() - started, counter)
+            return measured()
+
+        def measured():
+            iterator = iter(content)
+            try:
+                while True:
+                    token = _current_counter.set(counter)
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        _current_counter.reset(token)
+                    yield chunk
+            finally:
+                self.record(request, response, time.perf_counter() - started, counter)
+        return measured()
+
+    def record(self, request, response, seconds, counter):
+        registry.record(
+            _view_name(request),
+            request.method,
+            response.status_code,
+            seconds,
+            counter.count,
+            counter.seconds,
+        )
+
+
+def _has_metrics_token(request):
+    expected = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not expected or not header.startswith('Bearer '):
+        return False
+    return hmac.compare_digest(header[len('Bearer '):].encode(), expected.encode())
+
+
+def metrics_view(request):
+    """Endpoint /metrics; hanya untuk user staff, pemegang METRICS_TOKEN, atau IP di METRICS_ALLOWED_IPS"""
+    allowed = (
+        request.user.is_staff
+        or _has_metrics_token(request)
+        or request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', [])
+    )
+    if not allowed:
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_ticket_stats(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketStats = apps.get_model('tickets', 'TicketStats')
+
+    def count(**filters):
+        return models.Count('id', filter=models.Q(**filters))
+
+    rows = (
+        Ticket.objects
+        .values('created_by')
+        .annotate(
+            total=models.Count('id'),
+            waiting=count(status='WAITING'),
+            in_progress=count(status='IN_PROGRESS'),
+            closed=count(status='CLOSED'),
+            low=count(priority='LOW'),
+            medium=count(priority='MEDIUM'),
+            high=count(priority='HIGH'),
+        )
+        .order_by()
+    )
+    TicketStats.objects.bulk_create(
+        [TicketStats(user_id=row.pop('created_by'), **row) for row in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tickets', '0006_outboundemail_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ticket_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0)),
+                ('waiting', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('closed', models.IntegerField(default=0)),
+                ('low', models.IntegerField(default=0)),
+                ('medium', models.IntegerField(default=0)),
+                ('high', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_ticket_stats, migrations.RunPython.noop),
+    ]
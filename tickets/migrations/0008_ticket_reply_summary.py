@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:30
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_reply_summary(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketReply = apps.get_model('tickets', 'TicketReply')
+
+    replies = TicketReply.objects.filter(ticket=models.OuterRef('pk'))
+    latest = replies.order_by('-created_at', '-id')
+    reply_count = replies.order_by().values('ticket').annotate(c=models.Count('id')).values('c')
+
+    Ticket.objects.update(
+        reply_count=Coalesce(models.Subquery(reply_count[:1]), models.Value(0)),
+        last_reply_at=models.Subquery(latest.values('created_at')[:1]),
+        last_reply_by_staff=Coalesce(models.Subquery(latest.values('user__is_staff')[:1]), models.Value(False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0007_ticketstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='last_reply_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='last_reply_by_staff',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_reply_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # Hanya SQLite yang memakai FTS5; database lain memakai backend lain
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_search_index "
+        "USING fts5(title, body, ticket_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    # Ranking bm25 dengan bobot judul 10x isi, dipakai lewat kolom `rank`
+    schema_editor.execute(
+        "INSERT INTO tickets_search_index (tickets_search_index, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"
+    )
+    schema_editor.execute(
+        "INSERT INTO tickets_search_index (rowid, title, body, ticket_id) "
+        "SELECT -id, title, description, id FROM tickets_ticket"
+    )
+    schema_editor.execute(
+        "INSERT INTO tickets_search_index (rowid, title, body, ticket_id) "
+        "SELECT id, '', message, ticket_id FROM tickets_ticketreply"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS tickets_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_ticket_reply_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
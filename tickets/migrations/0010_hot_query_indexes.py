@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='ticket_owner_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_by', 'status', '-created_at', '-id'], name='ticket_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketreply',
+            index=models.Index(fields=['ticket', 'created_at'], name='reply_ticket_created_idx'),
+        ),
+    ]
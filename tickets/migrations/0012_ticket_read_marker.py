@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0011_admin_date_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketReadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_by', 'last_reply_by_staff', 'last_reply_at'], name='ticket_owner_unread_idx'),
+        ),
+        migrations.AddField(
+            model_name='ticketreadmarker',
+            name='ticket',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_markers', to='tickets.ticket'),
+        ),
+        migrations.AddField(
+            model_name='ticketreadmarker',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_read_markers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='ticketreadmarker',
+            constraint=models.UniqueConstraint(fields=('ticket', 'user'), name='read_marker_ticket_user_uniq'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def backfill_read_markers(apps, schema_editor, batch_size=2000):
+    # Tiket tanpa marker dianggap belum dibaca; balasan staff yang sudah ada
+    # sebelum fitur ini dianggap sudah dibaca agar badge tidak menyala untuk semua tiket lama
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketReadMarker = apps.get_model('tickets', 'TicketReadMarker')
+
+    rows = (
+        Ticket.objects
+        .filter(last_reply_by_staff=True, last_reply_at__isnull=False)
+        .values_list('id', 'created_by_id', 'last_reply_at')
+        .iterator(chunk_size=batch_size)
+    )
+    pending = []
+    for ticket_id, user_id, last_reply_at in rows:
+        pending.append(TicketReadMarker(ticket_id=ticket_id, user_id=user_id, last_read_at=last_reply_at))
+        if len(pending) >= batch_size:
+            TicketReadMarker.objects.bulk_create(pending, ignore_conflicts=True)
+            pending = []
+    if pending:
+        TicketReadMarker.objects.bulk_create(pending, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0013_knowledge_base'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_read_markers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0014_backfill_read_markers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='external_ref',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -1,7 +1,10 @@
 # tickets/models.py
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.conf import settings
-from django.core.mail import send_mail
+from django.utils import timezone
+from datetime import timedelta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -40,11 +43,232 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Data balasan yang didenormalisasi, dijaga oleh signal TicketReply
+    # supaya daftar tiket tidak perlu COUNT per baris
+    reply_count = models.PositiveIntegerField(default=0)
+    last_reply_at = models.DateTimeField(null=True, blank=True)
+    last_reply_by_staff = models.BooleanField(default=False)
+
+    # ID tiket di sistem lama (import_tickets); unik supaya import ulang
+    # setelah gagal di tengah jalan tidak menggandakan tiket
+    external_ref = models.CharField(max_length=100, null=True, blank=True, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Daftar tiket user (dashboard, Tiket Saya + keyset pagination)
+            models.Index(fields=['created_by', '-created_at', '-id'], name='ticket_owner_recent_idx'),
+            # Daftar tiket user yang difilter status
+            models.Index(fields=['created_by', 'status', '-created_at', '-id'], name='ticket_owner_status_idx'),
+            # Drill-down tanggal (date_hierarchy) di admin
+            models.Index(fields=['created_at'], name='ticket_created_idx'),
+            # Hitungan balasan belum dibaca (badge notifikasi dashboard)
+            models.Index(fields=['created_by', 'last_reply_by_staff', 'last_reply_at'], name='ticket_owner_unread_idx'),
+        ]
+
     def __str__(self):
         return f"[{self.status}] #{self.id} {self.title}"
+
+    def save(self, *args, **kwargs):
+        # Statistik per user (TicketStats) diperbarui lewat signal post_save,
+        # jadi simpan tiket dan statistiknya dalam satu transaksi
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     def get_reply_count(self):
-        return self.replies.count()
+        return self.reply_count
+
+    @classmethod
+    def refresh_reply_summary(cls, queryset=None):
+        """
+        Hitung ulang reply_count/last_reply_* dengan satu UPDATE, untuk balasan
+        yang dimasukkan lewat bulk_create (tanpa signal).
+        """
+        replies = TicketReply.objects.filter(ticket=models.OuterRef('pk'))
+        latest = replies.order_by('-created_at', '-id')
+        reply_count = replies.order_by().values('ticket').annotate(c=models.Count('id')).values('c')
+        if queryset is None:
+            queryset = cls.objects.all()
+        return queryset.update(
+            reply_count=Coalesce(models.Subquery(reply_count[:1]), models.Value(0)),
+            last_reply_at=models.Subquery(latest.values('created_at')[:1]),
+            last_reply_by_staff=Coalesce(models.Subquery(latest.values('user__is_staff')[:1]), models.Value(False)),
+        )
+
+# Rekap jumlah tiket per user, dijaga oleh signal di tickets/signals.py
+# supaya dashboard cukup membaca satu baris
+class TicketStats(models.Model):
+    STATUS_FIELDS = {
+        Ticket.Status.WAITING: 'waiting',
+        Ticket.Status.IN_PROGRESS: 'in_progress',
+        Ticket.Status.CLOSED: 'closed',
+    }
+    PRIORITY_FIELDS = {
+        Ticket.Priority.LOW: 'low',
+        Ticket.Priority.MEDIUM: 'medium',
+        Ticket.Priority.HIGH: 'high',
+    }
+    COUNTER_FIELDS = ('total', 'waiting', 'in_progress', 'closed', 'low', 'medium', 'high')
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='ticket_stats')
+
+    total = models.IntegerField(default=0)
+    waiting = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    closed = models.IntegerField(default=0)
+    low = models.IntegerField(default=0)
+    medium = models.IntegerField(default=0)
+    high = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats {self.user_id}: {self.total} tiket"
+
+    @classmethod
+    def _aggregates(cls):
+        aggregates = {'total': models.Count('id')}
+        for value, field in cls.STATUS_FIELDS.items():
+            aggregates[field] = models.Count('id', filter=models.Q(status=value))
+        for value, field in cls.PRIORITY_FIELDS.items():
+            aggregates[field] = models.Count('id', filter=models.Q(priority=value))
+        return aggregates
+
+    @classmethod
+    def compute_for(cls, user_id):
+        """Hitung ulang statistik langsung dari tabel Ticket (satu query)"""
+        return Ticket.objects.filter(created_by_id=user_id).aggregate(**cls._aggregates())
+
+    @classmethod
+    def rebuild_for(cls, user_id):
+        stats, _ = cls.objects.update_or_create(user_id=user_id, defaults=cls.compute_for(user_id))
+        return stats
+
+    @classmethod
+    def rebuild_many(cls, user_ids, batch_size=500):
+        """
+        Hitung ulang banyak user sekaligus dengan satu query GROUP BY per batch,
+        untuk data yang dimasukkan lewat bulk_create (tanpa signal).
+        """
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), batch_size):
+            chunk = user_ids[start:start + batch_size]
+            stats = {user_id: cls(user_id=user_id) for user_id in chunk}
+            rows = (
+                Ticket.objects
+                .filter(created_by_id__in=chunk)
+                .values('created_by_id')
+                .annotate(**cls._aggregates())
+                .order_by()
+            )
+            for row in rows:
+                user_id = row.pop('created_by_id')
+                stats[user_id] = cls(user_id=user_id, **row)
+            cls.objects.bulk_create(
+                stats.values(),
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=[*cls.COUNTER_FIELDS, 'updated_at'],
+            )
+
+    @classmethod
+    def for_user(cls, user):
+        try:
+            return cls.objects.get(user=user)
+        except cls.DoesNotExist:
+            return cls.rebuild_for(user.pk)
+
+    @classmethod
+    async def afor_user(cls, user):
+        try:
+            return await cls.objects.aget(user=user)
+        except cls.DoesNotExist:
+            return await sync_to_async(cls.rebuild_for)(user.pk)
+
+    @classmethod
+    def apply_delta(cls, user_id, status, priority, delta):
+        """Tambah/kurangi counter dengan F-expression. Mengembalikan False jika baris belum ada."""
+        changes = {'total': models.F('total') + delta}
+        if status in cls.STATUS_FIELDS:
+            field = cls.STATUS_FIELDS[status]
+            changes[field] = models.F(field) + delta
+        if priority in cls.PRIORITY_FIELDS:
+            field = cls.PRIORITY_FIELDS[priority]
+            changes[field] = models.F(field) + delta
+        return bool(cls.objects.filter(user_id=user_id).update(**changes))
+
+# Penanda sampai kapan user sudah membaca balasan sebuah tiket. Tiket dianggap
+# belum dibaca jika balasan terakhir dari staff lebih baru dari last_read_at.
+class TicketReadMarker(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ticket_read_markers')
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='read_markers')
+    last_read_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ticket', 'user'], name='read_marker_ticket_user_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Read {self.user_id} #{self.ticket_id} s/d {self.last_read_at}"
+
+    @classmethod
+    def unread_tickets(cls, user_id):
+        """Tiket milik user yang punya balasan staff setelah terakhir dibaca"""
+        return (
+            Ticket.objects
+            .filter(created_by_id=user_id, last_reply_by_staff=True)
+            .annotate(marker=models.FilteredRelation('read_markers', condition=models.Q(read_markers__user_id=user_id)))
+            .filter(models.Q(marker__last_read_at__isnull=True) | models.Q(last_reply_at__gt=models.F('marker__last_read_at')))
+        )
+
+    @classmethod
+    def mark_all_read(cls, tickets):
+        """
+        Anggap balasan staff yang sudah ada di `tickets` sudah dibaca pemiliknya;
+        untuk data historis (import) yang tidak boleh menyalakan badge.
+        """
+        rows = tickets.filter(last_reply_by_staff=True, last_reply_at__isnull=False).values_list(
+            'id', 'created_by_id', 'last_reply_at',
+        )
+        cls.objects.bulk_create(
+            [cls(ticket_id=ticket_id, user_id=user_id, last_read_at=last_reply_at) for ticket_id, user_id, last_reply_at in rows],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def mark_read(cls, user_id, ticket):
+        """
+        Tandai balasan tiket sudah dibaca. Dipakai last_reply_at (bukan waktu
+        sekarang) agar balasan yang masuk setelah halaman dimuat tetap terhitung
+        belum dibaca. Mengembalikan True jika marker berubah.
+        """
+        if ticket.last_reply_at is None:
+            return False
+        marker, created = cls.objects.get_or_create(
+            user_id=user_id, ticket=ticket, defaults={'last_read_at': ticket.last_reply_at},
+        )
+        if created or marker.last_read_at >= ticket.last_reply_at:
+            return created
+        return bool(
+            cls.objects
+            .filter(pk=marker.pk, last_read_at__lt=ticket.last_reply_at)
+            .update(last_read_at=ticket.last_reply_at)
+        )
+
+    @classmethod
+    async def amark_read(cls, user_id, ticket):
+        if ticket.last_reply_at is None:
+            return False
+        marker, created = await cls.objects.aget_or_create(
+            user_id=user_id, ticket=ticket, defaults={'last_read_at': ticket.last_reply_at},
+        )
+        if created or marker.last_read_at >= ticket.last_reply_at:
+            return created
+        return bool(
+            await cls.objects
+            .filter(pk=marker.pk, last_read_at__lt=ticket.last_reply_at)
+            .aupdate(last_read_at=ticket.last_reply_at)
+        )
 
 # Tabel untuk menyimpan balasan-balasan di setiap tiket
 class TicketReply(models.Model):
@@ -53,70 +277,229 @@ class TicketReply(models.Model):
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Balasan per tiket diurutkan kronologis (halaman detail tiket)
+            models.Index(fields=['ticket', 'created_at'], name='reply_ticket_created_idx'),
+            # Drill-down tanggal (date_hierarchy) di admin
+            models.Index(fields=['created_at'], name='reply_created_idx'),
+        ]
+
     def __str__(self):
         return f"Reply by {self.user.username} on {self.ticket.title}"
 
     # Kustomisasi fungsi 'save'
     def save(self, *args, **kwargs):
         is_new = not self.pk 
-        super().save(*args, **kwargs)
-
-        # Kirim email hanya jika reply baru dan bukan dari pembuat ticket
-        if is_new and self.user != self.ticket.created_by:
-            recipient_email = self.ticket.reply_to_email
-
-            if not recipient_email:
-                recipient_email = self.ticket.created_by.email
-
-            if not recipient_email:
-                logger.error(f"Tidak ada email untuk ticket {self.ticket.id}. User: {self.ticket.created_by.username}")
-                return
-
-            try:
-                subject = f"RE: [Ticket ID: {self.ticket.id}] {self.ticket.title}"
-                email_message = (
-                    f"Halo {self.ticket.created_by.username},\n\n"
-                    f"Tim support kami ({self.user.get_full_name() or self.user.username}) telah membalas tiket Anda:\n\n"
-                    f"---\n"
-                    f"{self.message}\n"
-                    f"---\n\n"
-                    f"Detail Tiket:\n"
-                    f"ID Tiket: {self.ticket.id}\n"
-                    f"Judul: {self.ticket.title}\n"
-                    f"Status: {self.ticket.get_status_display()}\n\n"
-                    f"Jika Anda ingin memberikan tanggapan atau informasi tambahan, "
-                    f"silakan balas email ini atau hubungi tim support kami.\n\n"
-                    f"Salam,\n"
-                    f"{self.user.get_full_name() or self.user.username}\n"
-                    f"Tim Support"
-                )
-                
-                logger.info(f"=== MENGIRIM EMAIL BALASAN TICKET ===")
-                logger.info(f"Ticket ID: {self.ticket.id}")
-                logger.info(f"To: {recipient_email}")
-                logger.info(f"From: {settings.DEFAULT_FROM_EMAIL}")
-                logger.info(f"Subject: {subject}")
-                logger.info(f"Email Backend: {settings.EMAIL_BACKEND}")
-                logger.info(f"Message Length: {len(email_message)} characters")
-                
-                try:
-                    result = send_mail(
-                        subject,
-                        email_message,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [recipient_email],
-                        fail_silently=False,
-                    )
-                    logger.info(f"Email berhasil dikirim! Result: {result}")
-                    logger.info(f"=== EMAIL TERKIRIM KE: {recipient_email} ===")
-                except Exception as send_error:
-                    logger.error(f"Error saat mengirim email: {send_error}", exc_info=True)
-                    raise
-                
-            except Exception as e:
-                error_msg = f"Error sending reply email untuk ticket {self.ticket.id}: {str(e)}"
-                logger.error(error_msg, exc_info=True)
-                print(error_msg)
+
+        # Simpan reply dan antrekan email notifikasi dalam satu transaksi,
+        # pengiriman SMTP dilakukan oleh worker `send_outbox`
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Kirim email hanya jika reply baru dan bukan dari pembuat ticket
+            if is_new and self.user != self.ticket.created_by:
+                self.enqueue_notification()
+            elif is_new:
+                logger.info(f"Reply tidak mengirim email karena user yang sama (user: {self.user.username}, created_by: {self.ticket.created_by.username})")
+
+    def enqueue_notification(self):
+        recipient_email = self.ticket.reply_to_email
+
+        if not recipient_email:
+            recipient_email = self.ticket.created_by.email
+
+        if not recipient_email:
+            logger.error(f"Tidak ada email untuk ticket {self.ticket.id}. User: {self.ticket.created_by.username}")
+            return None
+
+        window = getattr(settings, 'REPLY_DIGEST_WINDOW_SECONDS', 0)
+        if not window:
+            subject, email_message = self.build_notification([self])
+            outbound = OutboundEmail.enqueue(subject, email_message, [recipient_email])
+            logger.info(f"Email balasan ticket {self.ticket.id} ke {recipient_email} masuk antrean (outbox #{outbound.id})")
+            return outbound
+
+        # Mode digest: balasan dalam jendela waktu yang sama digabung ke satu email
+        coalesce_key = f"reply:{self.ticket.id}:{recipient_email}"
+        pending = OutboundEmail.pending_digest(coalesce_key)
+        if pending is not None:
+            replies = (
+                self.ticket.replies
+                .exclude(user=self.ticket.created_by)
+                .select_related('user')
+                .order_by('-created_at', '-id')[:pending.digest_count + 1]
+            )
+            subject, email_message = self.build_notification(list(reversed(replies)))
+            if pending.merge(subject, email_message):
+                logger.info(f"Email balasan ticket {self.ticket.id} digabung ke digest outbox #{pending.id}")
+                return pending
+
+        subject, email_message = self.build_notification([self])
+        outbound = OutboundEmail.enqueue(
+            subject, email_message, [recipient_email],
+            coalesce_key=coalesce_key, delay=window,
+        )
+        logger.info(f"Email balasan ticket {self.ticket.id} ke {recipient_email} masuk antrean digest (outbox #{outbound.id})")
+        return outbound
+
+    def build_notification(self, replies):
+        """Subject dan isi email untuk satu balasan atau digest beberapa balasan"""
+        ticket = self.ticket
+        last_author = replies[-1].user.get_full_name() or replies[-1].user.username
+
+        if len(replies) == 1:
+            subject = f"RE: [Ticket ID: {ticket.id}] {ticket.title}"
+            opening = (
+                f"Tim support kami ({last_author}) telah membalas tiket Anda:\n\n"
+                f"---\n"
+                f"{replies[0].message}\n"
+                f"---\n\n"
+            )
         else:
-            if is_new:
-                logger.info(f"Reply tidak mengirim email karena user yang sama (user: {self.user.username}, created_by: {self.ticket.created_by.username})")
\ No newline at end of file
+            subject = f"RE: [Ticket ID: {ticket.id}] {ticket.title} ({len(replies)} balasan baru)"
+            opening = f"Tim support kami telah mengirim {len(replies)} balasan untuk tiket Anda:\n\n"
+            for reply in replies:
+                author = reply.user.get_full_name() or reply.user.username
+                opening += (
+                    f"--- {author}, {timezone.localtime(reply.created_at):%d %b %Y %H:%M} ---\n"
+                    f"{reply.message}\n\n"
+                )
+            opening += "---\n\n"
+
+        email_message = (
+            f"Halo {ticket.created_by.username},\n\n"
+            f"{opening}"
+            f"Detail Tiket:\n"
+            f"ID Tiket: {ticket.id}\n"
+            f"Judul: {ticket.title}\n"
+            f"Status: {ticket.get_status_display()}\n\n"
+            f"Jika Anda ingin memberikan tanggapan atau informasi tambahan, "
+            f"silakan balas email ini atau hubungi tim support kami.\n\n"
+            f"Salam,\n"
+            f"{last_author}\n"
+            f"Tim Support"
+        )
+        return subject, email_message
+
+
+# Pengumuman yang tampil di dashboard portal
+class Announcement(models.Model):
+    class Type(models.TextChoices):
+        INFO = 'INFO', 'Info'
+        WARNING = 'WARNING', 'Peringatan'
+
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    type = models.CharField(max_length=20, choices=Type.choices, default=Type.INFO)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', '-created_at'], name='announcement_active_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+# Artikel Knowledge Base. Kolom views diperbarui secara batch oleh
+# tickets/knowledge_base.py, bukan satu UPDATE per halaman dibuka.
+class Article(models.Model):
+    title = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=255, unique=True)
+    category = models.CharField(max_length=100)
+    body = models.TextField()
+    is_published = models.BooleanField(default=True)
+    views = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Daftar artikel populer (dihitung ulang saat flush counter)
+            models.Index(fields=['is_published', '-views', '-id'], name='article_popular_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+# Tabel antrean email keluar (outbox). Baris ditulis di transaksi yang sama
+# dengan perubahan data, lalu dikirim oleh worker `manage.py send_outbox`.
+class OutboundEmail(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        SENT = 'SENT', 'Terkirim'
+        DEAD = 'DEAD', 'Gagal (dead letter)'
+
+    subject = models.CharField(max_length=300)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    # Digest: email dengan coalesce_key sama yang masih dalam jendela
+    # (sebelum digest_until) digabung menjadi satu email
+    coalesce_key = models.CharField(max_length=300, blank=True)
+    digest_until = models.DateTimeField(null=True, blank=True)
+    digest_count = models.PositiveIntegerField(default=1)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+            models.Index(fields=['coalesce_key', 'status'], name='outbox_digest_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.status}] #{self.id} {self.subject}"
+
+    @classmethod
+    def enqueue(cls, subject, body, recipients, from_email=None, coalesce_key='', delay=0):
+        """Masukkan email ke antrean; dipanggil di dalam transaksi pemanggil"""
+        send_at = timezone.now() + timedelta(seconds=delay)
+        return cls.objects.create(
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=list(recipients),
+            next_attempt_at=send_at,
+            coalesce_key=coalesce_key,
+            digest_until=send_at if coalesce_key else None,
+        )
+
+    @classmethod
+    def pending_digest(cls, coalesce_key):
+        """Digest yang masih terbuka (belum jatuh tempo dan belum diambil worker)"""
+        return (
+            cls.objects
+            .filter(
+                coalesce_key=coalesce_key,
+                status=cls.Status.PENDING,
+                attempts=0,
+                digest_until__gt=timezone.now(),
+                next_attempt_at=models.F('digest_until'),
+            )
+            .order_by('-id')
+            .first()
+        )
+
+    def merge(self, subject, body):
+        """
+        Ganti isi digest dengan versi gabungan. Gagal (False) jika worker
+        sudah mengambil email ini, karena lease mengubah next_attempt_at.
+        """
+        updated = type(self).objects.filter(
+            pk=self.pk,
+            status=self.Status.PENDING,
+            next_attempt_at=models.F('digest_until'),
+        ).update(subject=subject, body=body, digest_count=models.F('digest_count') + 1)
+        return bool(updated)
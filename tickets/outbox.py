@@ -0,0 +1,103 @@
+# tickets/outbox.py
+"""Pengiriman email dari tabel outbox (`OutboundEmail`)."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from .mail_pool import get_pool
+from .models import OutboundEmail
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def backoff_delay(attempts):
+    """Jeda sebelum percobaan berikutnya: base * 2^(attempts-1), dibatasi maksimum"""
+    base = _setting('OUTBOX_BACKOFF_SECONDS', 30)
+    maximum = _setting('OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+    return timedelta(seconds=min(base * (2 ** max(attempts - 1, 0)), maximum))
+
+
+def claim_due(batch_size):
+    """
+    Ambil email yang sudah jatuh tempo dan kunci dengan lease, supaya
+    beberapa worker tidak mengirim email yang sama.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=_setting('OUTBOX_LEASE_SECONDS', 300))
+    candidates = (
+        OutboundEmail.objects
+        .filter(status=OutboundEmail.Status.PENDING, next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id')
+        .values_list('id', 'next_attempt_at')[:batch_size]
+    )
+
+    claimed_ids = []
+    for pk, next_attempt_at in candidates:
+        # Update bersyarat: hanya berhasil jika belum diambil worker lain
+        updated = OutboundEmail.objects.filter(
+            pk=pk,
+            status=OutboundEmail.Status.PENDING,
+            next_attempt_at=next_attempt_at,
+        ).update(next_attempt_at=lease_until)
+        if updated:
+            claimed_ids.append(pk)
+
+    return list(OutboundEmail.objects.filter(pk__in=claimed_ids).order_by('id'))
+
+
+def build_message(outbound, connection=None):
+    return EmailMessage(
+        subject=outbound.subject,
+        body=outbound.body,
+        from_email=outbound.from_email,
+        to=outbound.recipients,
+        connection=connection,
+    )
+
+
+def mark_sent(outbound):
+    outbound.status = OutboundEmail.Status.SENT
+    outbound.attempts += 1
+    outbound.sent_at = timezone.now()
+    outbound.last_error = ''
+    outbound.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+    logger.info(f"Outbox #{outbound.id} terkirim ke {', '.join(outbound.recipients)}")
+
+
+def mark_failed(outbound, error):
+    outbound.attempts += 1
+    outbound.last_error = str(error)
+    if outbound.attempts >= _setting('OUTBOX_MAX_ATTEMPTS', 8):
+        outbound.status = OutboundEmail.Status.DEAD
+        logger.error(f"Outbox #{outbound.id} dipindah ke dead letter setelah {outbound.attempts} percobaan: {error}")
+    else:
+        outbound.next_attempt_at = timezone.now() + backoff_delay(outbound.attempts)
+        logger.warning(f"Outbox #{outbound.id} gagal (percobaan {outbound.attempts}), dicoba lagi {outbound.next_attempt_at}: {error}")
+    outbound.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+
+
+def deliver_batch(batch_size=None, pool=None):
+    """Kirim satu batch email jatuh tempo. Mengembalikan (terkirim, gagal)."""
+    batch = claim_due(batch_size or _setting('OUTBOX_BATCH_SIZE', 50))
+    if not batch:
+        return 0, 0
+
+    pool = pool or get_pool()
+    results = pool.send([build_message(outbound) for outbound in batch])
+
+    sent = failed = 0
+    for outbound, error in zip(batch, results):
+        if error is None:
+            mark_sent(outbound)
+            sent += 1
+        else:
+            mark_failed(outbound, error)
+            failed += 1
+    return sent, failed
@@ -0,0 +1,208 @@
+# tickets/pagination.py
+"""
+Keyset (cursor) pagination untuk daftar tiket yang diurutkan (-created_at, -id).
+
+Halaman berikutnya diambil dengan WHERE (created_at, id) < cursor, bukan OFFSET,
+jadi biayanya hanya sebesar satu halaman berapa pun dalamnya user menggulir,
+dan tiket baru yang masuk tidak menggeser isi halaman berikutnya.
+
+Hasil pencarian diurutkan menurut relevansi, yang tidak punya kolom urut
+stabil untuk keyset; paginate_ranked() memakai cursor berisi posisi (offset).
+
+EstimatedCountPaginator dipakai admin: changelist tanpa filter memakai
+estimasi jumlah baris dari database alih-alih COUNT(*) di setiap halaman.
+"""
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+@dataclass
+class KeysetPage:
+    object_list: list = field(default_factory=list)
+    has_next: bool = False
+    has_previous: bool = False
+    next_cursor: str = ''
+    previous_cursor: str = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """Kembalikan (created_at, pk), atau None jika cursor tidak valid"""
+    if not value:
+        return None
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _keyset_query(queryset, after_key, before_key, page_size):
+    """Queryset satu halaman (+1 baris penanda) dan arah pembacaannya"""
+    if before_key and not after_key:
+        created_at, pk = before_key
+        query = (
+            queryset
+            .filter(Q(created_at__gte=created_at), Q(created_at__gt=created_at) | Q(pk__gt=pk))
+            .order_by('created_at', 'id')[:page_size + 1]
+        )
+        return query, True
+    if after_key:
+        created_at, pk = after_key
+        queryset = queryset.filter(Q(created_at__lte=created_at), Q(created_at__lt=created_at) | Q(pk__lt=pk))
+    return queryset.order_by('-created_at', '-id')[:page_size + 1], False
+
+
+def _keyset_page(rows, backwards, after_key, page_size):
+    if backwards:
+        has_previous = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_next = True
+    else:
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_previous = after_key is not None
+
+    return KeysetPage(
+        object_list=rows,
+        has_next=has_next and bool(rows),
+        has_previous=has_previous and bool(rows),
+        next_cursor=encode_cursor(rows[-1]) if rows else '',
+        previous_cursor=encode_cursor(rows[0]) if rows else '',
+    )
+
+
+def paginate_keyset(queryset, after=None, before=None, page_size=20):
+    """
+    Ambil satu halaman dari queryset. `after` = halaman lebih lama,
+    `before` = halaman lebih baru; keduanya cursor dari encode_cursor.
+
+    Kondisi cursor ditulis sebagai `created_at <= x AND (created_at < x OR id < y)`
+    supaya SQLite bisa memakai batas range pada index (created_by, -created_at, -id).
+    """
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before)
+    query, backwards = _keyset_query(queryset, after_key, before_key, page_size)
+    rows = list(query)
+    if backwards and not rows:
+        # Tidak ada yang lebih baru (mis. cursor kedaluwarsa): kembali ke halaman pertama
+        return paginate_keyset(queryset, page_size=page_size)
+    return _keyset_page(rows, backwards, after_key, page_size)
+
+
+async def apaginate_keyset(queryset, after=None, before=None, page_size=20):
+    """Versi async dari paginate_keyset (ORM async)"""
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before)
+    query, backwards = _keyset_query(queryset, after_key, before_key, page_size)
+    rows = [row async for row in query]
+    if backwards and not rows:
+        return await apaginate_keyset(queryset, page_size=page_size)
+    return _keyset_page(rows, backwards, after_key, page_size)
+
+
+def encode_offset(offset):
+    return base64.urlsafe_b64encode(f"rank|{offset}".encode()).decode().rstrip('=')
+
+
+def decode_offset(value):
+    """Posisi dari encode_offset, atau None jika cursor tidak valid"""
+    if not value:
+        return None
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        kind, offset = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return offset if kind == 'rank' and offset >= 0 else None
+
+
+def _ranked_offset(after, before, page_size):
+    after_offset = decode_offset(after)
+    if after_offset is not None:
+        return after_offset
+    before_offset = decode_offset(before)
+    if before_offset is not None:
+        return max(before_offset - page_size, 0)
+    return 0
+
+
+def _ranked_page(rows, offset, page_size):
+    return KeysetPage(
+        object_list=rows[:page_size],
+        has_next=len(rows) > page_size,
+        has_previous=offset > 0,
+        next_cursor=encode_offset(offset + page_size),
+        previous_cursor=encode_offset(offset),
+    )
+
+
+def paginate_ranked(fetch, after=None, before=None, page_size=20):
+    """
+    Satu halaman hasil berperingkat. `fetch(offset, limit)` mengembalikan
+    objek sesuai urutan peringkat; cursor dari encode_offset.
+    """
+    offset = _ranked_offset(after, before, page_size)
+    return _ranked_page(fetch(offset, page_size + 1), offset, page_size)
+
+
+async def apaginate_ranked(fetch, after=None, before=None, page_size=20):
+    """Versi async dari paginate_ranked; `fetch` berupa coroutine function"""
+    offset = _ranked_offset(after, before, page_size)
+    return _ranked_page(await fetch(offset, page_size + 1), offset, page_size)
+
+
+def estimate_row_count(model, using='default'):
+    """Perkiraan jumlah baris tabel tanpa COUNT(*), atau None jika tidak didukung"""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == 'sqlite':
+            # MAX(rowid) dibaca dari ujung B-tree; lebih dari jumlah baris bila ada yang terhapus
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    # Di bawah batas ini COUNT(*) cukup murah dan hasilnya tepat
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where and not query.is_sliced:
+            estimate = estimate_row_count(self.object_list.model, self.object_list.db)
+            if estimate is not None and estimate > self.exact_count_limit:
+                return estimate
+        return super().count
@@ -0,0 +1,172 @@
+# tickets/pubsub.py
+"""
+Pub/sub ringan untuk mendorong balasan tiket baru ke klien SSE/long-poll.
+
+Subscriber adalah asyncio.Queue per koneksi, jadi ribuan penonton yang diam
+hanya berupa entri di dict tanpa thread atau query. Publish boleh dipanggil
+dari thread mana pun (signal ORM berjalan di thread sync).
+
+Backend dipilih lewat settings.REPLY_STREAM_BROKER:
+- InProcessBroker: hanya meneruskan publish dari proses yang sama.
+- DatabasePollingBroker: ditambah satu poller per proses yang membaca balasan
+  baru dari database, sehingga balasan yang dibuat proses lain (worker WSGI,
+  admin, command) ikut terkirim.
+Backend lain (mis. Redis pub/sub) cukup mewarisi BaseBroker.
+"""
+import asyncio
+import logging
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, broker, channel, maxsize=100):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message):
+        # Dipanggil di event loop milik subscriber
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Klien terlalu lambat: buang pesan, klien mengejar lewat Last-Event-ID
+            logger.warning(f"Antrean subscriber channel {self.channel} penuh, pesan dibuang")
+
+    async def get(self, timeout=None):
+        """Pesan berikutnya, atau None jika timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def get_nowait(self):
+        try:
+            return self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BaseBroker:
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def has_subscribers(self, channel):
+        """False jika publish ke channel ini pasti tidak sampai ke siapa pun"""
+        return True
+
+
+class InProcessBroker(BaseBroker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def channels(self):
+        with self._lock:
+            return list(self._subscribers)
+
+    def has_subscribers(self, channel):
+        with self._lock:
+            return channel in self._subscribers
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            if subscription.loop.is_closed():
+                self.unsubscribe(subscription)
+                continue
+            subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+        return len(subscribers)
+
+
+class DatabasePollingBroker(InProcessBroker):
+    """
+    Satu query per interval untuk semua tiket yang sedang ditonton di proses
+    ini (bukan satu query per koneksi). Pesan ganda (publish lokal + poller)
+    disaring oleh stream berdasarkan ID balasan.
+    """
+
+    def __init__(self, interval=None):
+        super().__init__()
+        self.interval = interval or getattr(settings, 'REPLY_STREAM_POLL_SECONDS', 2)
+        self._pollers = {}
+
+    def subscribe(self, channel):
+        subscription = super().subscribe(channel)
+        loop = subscription.loop
+        with self._lock:
+            poller = self._pollers.get(loop)
+            if poller is None or poller.done():
+                self._pollers[loop] = loop.create_task(self._poll())
+        return subscription
+
+    async def _poll(self):
+        from django.db.models import Max
+        from .live import reply_event
+        from .models import TicketReply
+
+        last_id = (await TicketReply.objects.aaggregate(last=Max('id')))['last'] or 0
+        while True:
+            await asyncio.sleep(self.interval)
+            channels = self.channels()
+            if not channels:
+                break
+            try:
+                replies = TicketReply.objects.filter(
+                    pk__gt=last_id, ticket_id__in=channels,
+                ).select_related('user').order_by('pk')
+                async for reply in replies:
+                    last_id = max(last_id, reply.pk)
+                    InProcessBroker.publish(self, reply.ticket_id, reply_event(reply))
+            except Exception:
+                logger.exception('Poller balasan gagal membaca database')
+        with self._lock:
+            self._pollers.pop(asyncio.get_running_loop(), None)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            path = getattr(settings, 'REPLY_STREAM_BROKER', 'tickets.pubsub.InProcessBroker')
+            _broker = import_string(path)()
+    return _broker
@@ -0,0 +1,114 @@
+# tickets/roles.py
+"""
+Keputusan akses portal (grup PORTAL_USER_GROUP) yang di-cache per user.
+
+Keanggotaan grup disimpan di cache backend; signal di tickets/signals.py
+menghapusnya saat grup user berubah, sehingga halaman portal tidak perlu
+query ke auth_user_groups di setiap request.
+
+Signal hanya menghapus cache di proses yang mengubah grup. Dengan cache
+bersama (Redis/Memcached) itu berlaku untuk semua worker; dengan LocMem
+(bawaan) worker lain baru melihat perubahan setelah LOCAL_CACHE_MAX_SECONDS.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+
+from .caching import cross_process_timeout
+
+# Primary key grup portal, dihafal per proses setelah lookup pertama. PK grup
+# tidak berubah selama grupnya ada, jadi tidak perlu cache bersama; signal
+# rename/hapus grup tetap mengosongkannya di proses yang mengubah.
+_portal_group_id = None
+
+
+def portal_group_name():
+    return getattr(settings, 'PORTAL_USER_GROUP', 'Portal Users')
+
+
+def provision_portal_group(using='default', **kwargs):
+    """Buat grup portal sekali saat migrate (dipanggil dari post_migrate)"""
+    global _portal_group_id
+    group, _ = Group.objects.using(using).get_or_create(name=portal_group_name())
+    _portal_group_id = group.pk
+
+
+def portal_group_id():
+    global _portal_group_id
+    if _portal_group_id is None:
+        # Fallback jika post_migrate belum berjalan untuk database ini
+        group, _ = Group.objects.get_or_create(name=portal_group_name())
+        _portal_group_id = group.pk
+    return _portal_group_id
+
+
+async def aportal_group_id():
+    global _portal_group_id
+    if _portal_group_id is None:
+        group, _ = await Group.objects.aget_or_create(name=portal_group_name())
+        _portal_group_id = group.pk
+    return _portal_group_id
+
+
+def forget_portal_group():
+    global _portal_group_id
+    _portal_group_id = None
+
+
+def _cache_key(user_id):
+    return f"portal-role:{user_id}"
+
+
+def _cache_timeout():
+    return cross_process_timeout(getattr(settings, 'PORTAL_ROLE_CACHE_SECONDS', 300))
+
+
+def is_portal_member(user):
+    # Disimpan juga di objek user agar pengecekan kedua dalam request yang sama gratis
+    if not hasattr(user, '_portal_member'):
+        key = _cache_key(user.pk)
+        member = cache.get(key)
+        if member is None:
+            member = get_user_model().groups.through.objects.filter(
+                user_id=user.pk, group_id=portal_group_id(),
+            ).exists()
+            cache.set(key, member, _cache_timeout())
+        user._portal_member = member
+    return user._portal_member
+
+
+async def ais_portal_member(user):
+    if not hasattr(user, '_portal_member'):
+        key = _cache_key(user.pk)
+        member = await cache.aget(key)
+        if member is None:
+            member = await get_user_model().groups.through.objects.filter(
+                user_id=user.pk, group_id=await aportal_group_id(),
+            ).aexists()
+            await cache.aset(key, member, _cache_timeout())
+        user._portal_member = member
+    return user._portal_member
+
+
+def user_has_portal_role(user):
+    if not user.is_authenticated:
+        return False
+    # Admin (staff/superuser) boleh akses kedua dashboard; flag ini sudah ada di baris user
+    if user.is_staff or user.is_superuser:
+        return True
+    # User biasa harus tergabung dalam grup Portal Users
+    return is_portal_member(user)
+
+
+async def auser_has_portal_role(user):
+    """Versi async dari user_has_portal_role untuk view async"""
+    if not user.is_authenticated:
+        return False
+    if user.is_staff or user.is_superuser:
+        return True
+    return await ais_portal_member(user)
+
+
+def invalidate_portal_role(user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,242 @@
+# tickets/search.py
+"""
+Pencarian full-text untuk tiket dan balasannya.
+
+Backend dipilih lewat setting TICKETS_SEARCH_BACKEND. Bawaan memakai tabel
+virtual SQLite FTS5 (`tickets_search_index`); database lain bisa memakai
+SimpleSearchBackend (icontains) atau backend sendiri dengan antarmuka yang sama.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Q, Value, When
+from django.utils.module_loading import import_string
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'tickets_search_index'
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+class BaseSearchBackend:
+    """Antarmuka backend pencarian. Semua method sinkron dan ikut transaksi pemanggil."""
+
+    def is_available(self):
+        return True
+
+    def index_ticket(self, ticket):
+        pass
+
+    def index_reply(self, reply):
+        pass
+
+    def remove_ticket(self, ticket_id):
+        pass
+
+    def remove_reply(self, reply_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def index_ticket_ids(self, ticket_ids):
+        """Index tiket (beserta balasannya) yang dimasukkan lewat bulk_create"""
+        pass
+
+    def search(self, query, owner_id=None, status=None, priority=None, pinned_id=None, limit=100, offset=0):
+        """
+        ID tiket yang cocok, urut dari yang paling relevan. Filter owner/status/
+        prioritas ikut di query yang sama, jadi limit/offset berlaku pada hasil
+        akhir. `pinned_id` (mis. ID tiket yang diketik user) ditaruh paling atas.
+        """
+        raise NotImplementedError
+
+    def search_replies(self, query, limit=100):
+        """ID balasan yang cocok, urut dari yang paling relevan"""
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Fallback tanpa index: LIKE '%x%' seperti perilaku lama"""
+
+    def search(self, query, owner_id=None, status=None, priority=None, pinned_id=None, limit=100, offset=0):
+        from .models import Ticket
+
+        tickets = Ticket.objects.all()
+        if owner_id is not None:
+            tickets = tickets.filter(created_by_id=owner_id)
+        if status is not None:
+            tickets = tickets.filter(status=status)
+        if priority is not None:
+            tickets = tickets.filter(priority=priority)
+
+        matches = Q()
+        for term in search_terms(query):
+            matches &= (
+                Q(title__icontains=term) |
+                Q(description__icontains=term) |
+                Q(replies__message__icontains=term)
+            )
+        if pinned_id is not None:
+            matches = Q(pk=pinned_id) | matches
+        tickets = tickets.filter(matches).annotate(
+            pinned=Case(When(pk=pinned_id, then=Value(0)), default=Value(1)),
+        )
+        ids = tickets.order_by('pinned', '-created_at', '-id').values_list('id', flat=True).distinct()
+        return list(ids[offset:offset + limit])
+
+    def search_replies(self, query, limit=100):
+        from .models import TicketReply
+
+        replies = TicketReply.objects.all()
+        for term in search_terms(query):
+            replies = replies.filter(message__icontains=term)
+        return list(replies.order_by('-created_at').values_list('id', flat=True)[:limit])
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Satu dokumen per tiket (judul + deskripsi) dan per balasan (pesan).
+    rowid dokumen tiket = -ticket_id, rowid dokumen balasan = reply_id,
+    jadi update/hapus cukup lewat rowid tanpa scan.
+    """
+    # Fungsi ranking bawaan tabel (kolom `rank`): kecocokan di judul lebih
+    # penting dari isi. Disimpan di konfigurasi FTS5 oleh migrasi/rebuild.
+    RANK_FUNCTION = 'bm25(10.0, 1.0)'
+
+    def is_available(self):
+        return connection.vendor == 'sqlite'
+
+    @staticmethod
+    def match_expression(query):
+        # Setiap kata jadi frasa dengan prefix match; input user tidak pernah
+        # diteruskan mentah ke sintaks MATCH
+        return ' '.join(f'"{term}"*' for term in search_terms(query))
+
+    def _upsert(self, rowid, title, body, ticket_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [rowid])
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, ticket_id) VALUES (%s, %s, %s, %s)",
+                [rowid, title, body, ticket_id],
+            )
+
+    def _delete(self, rowid):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [rowid])
+
+    def index_ticket(self, ticket):
+        self._upsert(-ticket.pk, ticket.title, ticket.description, ticket.pk)
+
+    def index_reply(self, reply):
+        self._upsert(reply.pk, '', reply.message, reply.ticket_id)
+
+    def remove_ticket(self, ticket_id):
+        self._delete(-ticket_id)
+
+    def remove_reply(self, reply_id):
+        self._delete(reply_id)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, ticket_id) "
+                f"SELECT -id, title, description, id FROM tickets_ticket"
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, ticket_id) "
+                f"SELECT id, '', message, ticket_id FROM tickets_ticketreply"
+            )
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', %s)", [self.RANK_FUNCTION])
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+
+    def index_ticket_ids(self, ticket_ids):
+        ticket_ids = list(ticket_ids)
+        if not ticket_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ticket_ids))
+        negated = [-ticket_id for ticket_id in ticket_ids]
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", negated)
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+                f"(SELECT id FROM tickets_ticketreply WHERE ticket_id IN ({placeholders}))",
+                ticket_ids,
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, ticket_id) "
+                f"SELECT -id, title, description, id FROM tickets_ticket WHERE id IN ({placeholders})",
+                ticket_ids,
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, ticket_id) "
+                f"SELECT id, '', message, ticket_id FROM tickets_ticketreply WHERE ticket_id IN ({placeholders})",
+                ticket_ids,
+            )
+
+    def search(self, query, owner_id=None, status=None, priority=None, pinned_id=None, limit=100, offset=0):
+        match = self.match_expression(query)
+        if not match:
+            return []
+
+        params = [match]
+        pinned = ''
+        if pinned_id is not None:
+            # Skor di bawah semua skor bm25 (negatif): selalu urutan pertama
+            pinned = 'UNION ALL SELECT %s, -1e300'
+            params.append(pinned_id)
+
+        conditions = []
+        for column, value in (('created_by_id', owner_id), ('status', status), ('priority', priority)):
+            if value is not None:
+                conditions.append(f"t.{column} = %s")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params += [limit, offset]
+
+        # Tiket diurutkan menurut dokumen terbaiknya (tiket itu sendiri atau salah satu balasan)
+        sql = (
+            f"SELECT s.ticket_id, MIN(s.score) AS best "
+            f"FROM (SELECT ticket_id, rank AS score "
+            f"      FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s {pinned}) s "
+            f"JOIN tickets_ticket t ON t.id = s.ticket_id "
+            f"{where} "
+            f"GROUP BY s.ticket_id ORDER BY best, s.ticket_id DESC LIMIT %s OFFSET %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def search_replies(self, query, limit=100):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s AND rowid > 0 "
+                f"ORDER BY rank LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        backend_class = import_string(getattr(settings, 'TICKETS_SEARCH_BACKEND', 'tickets.search.SQLiteFTS5Backend'))
+        backend = backend_class()
+        if not backend.is_available():
+            logger.warning(f"Backend pencarian {backend_class.__name__} tidak tersedia untuk database ini, memakai SimpleSearchBackend")
+            backend = SimpleSearchBackend()
+        _backend = backend
+    return _backend
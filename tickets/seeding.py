@@ -0,0 +1,104 @@
+# tickets/seeding.py
+"""Pembuatan data contoh dalam jumlah besar untuk benchmark dan pemeriksaan query plan."""
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+
+from .models import Department, Ticket, TicketReply, TicketStats
+from .search import get_backend as get_search_backend
+
+TOPICS = (
+    ('Printer kantor tidak bisa mencetak', 'Printer di lantai 2 selalu macet saat mencetak dokumen.'),
+    ('Email tidak terkirim', 'Email ke klien tertahan di outbox sejak pagi.'),
+    ('VPN lambat', 'Koneksi VPN sangat lambat saat bekerja dari rumah.'),
+    ('Lupa password', 'Saya tidak bisa login ke portal karena lupa password.'),
+    ('Laptop tidak menyala', 'Laptop mati total setelah update sistem.'),
+    ('Akses folder bersama', 'Mohon akses ke folder bersama tim keuangan.'),
+)
+
+
+@dataclass
+class SeedResult:
+    users: list = field(default_factory=list)
+    agent: object = None
+    departments: list = field(default_factory=list)
+
+
+def seed_portal_data(users=20, departments=5, tickets_per_user=100, replies_per_ticket=3, prefix='seed', batch_size=1000):
+    """
+    Buat user portal, departemen, tiket dan balasan dengan bulk_create, lalu
+    perbarui data turunan (TicketStats, ringkasan balasan, index pencarian)
+    yang biasanya dijaga oleh signal.
+    """
+    User = get_user_model()
+    password = make_password(prefix)
+
+    User.objects.bulk_create([
+        User(username=f"{prefix}-user-{i}", email=f"{prefix}{i}@example.com", password=password)
+        for i in range(users)
+    ], batch_size=batch_size)
+    portal_users = list(User.objects.filter(username__startswith=f"{prefix}-user-").order_by('id'))
+
+    group, _ = Group.objects.get_or_create(name=getattr(settings, 'PORTAL_USER_GROUP', 'Portal Users'))
+    Membership = User.groups.through
+    Membership.objects.bulk_create(
+        [Membership(user_id=user.pk, group_id=group.pk) for user in portal_users],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+    agent = User.objects.create(
+        username=f"{prefix}-agent", email=f"{prefix}-agent@example.com", password=password, is_staff=True,
+    )
+    Department.objects.bulk_create([Department(name=f"{prefix} departemen {i}") for i in range(departments)])
+    department_list = list(Department.objects.filter(name__startswith=f"{prefix} departemen ").order_by('id'))
+
+    statuses = list(Ticket.Status.values)
+    priorities = list(Ticket.Priority.values)
+    pending = []
+    for user in portal_users:
+        for i in range(tickets_per_user):
+            title, description = TOPICS[i % len(TOPICS)]
+            pending.append(Ticket(
+                title=f"{title} #{i}",
+                description=description,
+                created_by=user,
+                department=department_list[i % len(department_list)] if department_list else None,
+                reply_to_email=user.email,
+                status=statuses[i % len(statuses)],
+                priority=priorities[(i // len(statuses)) % len(priorities)],
+            ))
+            if len(pending) >= batch_size:
+                Ticket.objects.bulk_create(pending)
+                pending = []
+    if pending:
+        Ticket.objects.bulk_create(pending)
+
+    seeded_tickets = Ticket.objects.filter(created_by__in=portal_users)
+    if replies_per_ticket:
+        pending = []
+        for ticket_id, owner_id in seeded_tickets.values_list('id', 'created_by_id').iterator(chunk_size=batch_size):
+            for i in range(replies_per_ticket):
+                # Bergantian antara agent dan pembuat tiket
+                pending.append(TicketReply(
+                    ticket_id=ticket_id,
+                    user_id=agent.pk if i % 2 == 0 else owner_id,
+                    message=f"Balasan {i}: sudah kami cek, mohon dicoba lagi.",
+                ))
+                if len(pending) >= batch_size:
+                    TicketReply.objects.bulk_create(pending)
+                    pending = []
+        if pending:
+            TicketReply.objects.bulk_create(pending)
+
+    Ticket.refresh_reply_summary(seeded_tickets)
+    TicketStats.rebuild_many(user.pk for user in portal_users)
+    # Hanya tiket contoh yang di-index; rebuild() akan menulis ulang seluruh index
+    ticket_ids = list(seeded_tickets.values_list('id', flat=True))
+    for start in range(0, len(ticket_ids), batch_size):
+        get_search_backend().index_ticket_ids(ticket_ids[start:start + batch_size])
+
+    return SeedResult(users=portal_users, agent=agent, departments=department_list)
@@ -0,0 +1,237 @@
+# tickets/sessions.py
+"""
+Engine session cache-first dengan write-through ke database
+(SESSION_ENGINE = 'tickets.sessions').
+
+- Sesi dibaca dari cache SESSION_CACHE_ALIAS; database hanya dibaca saat cache miss.
+- Setiap perubahan data ditulis ke database lalu ke cache (seperti cached_db),
+  jadi database tetap sumber kebenaran jika cache dikosongkan.
+- Cache hanya dipakai jika alias tersebut dipakai bersama oleh semua proses
+  (Redis/Memcached/file). Dengan cache per proses (LocMem), logout di satu
+  worker tidak menghapus sesi di cache worker lain; maka tanpa cache bersama
+  engine ini bekerja seperti engine `db` biasa.
+- Perpanjangan masa berlaku sesi persisten ("ingat saya") lewat
+  SessionRenewalMiddleware hanya menulis cache; expire_date di database
+  dikumpulkan dan ditulis sekaligus (satu UPDATE ... CASE per batch).
+- clear_expired() (dipakai `clearsessions` dan `purge_sessions`) menghapus per
+  chunk dengan transaksi pendek, sehingga tabel tidak terkunci lama.
+"""
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from django.utils.http import http_date
+
+from .caching import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+RENEWED_AT_KEY = '_renewed_at'
+
+
+def session_cache_is_shared():
+    return cache_is_shared(settings.SESSION_CACHE_ALIAS)
+
+
+def renew_interval():
+    """Detik minimal antar perpanjangan sesi; 0 = masa berlaku tetap sejak login"""
+    return getattr(settings, 'SESSION_RENEW_SECONDS', 0)
+
+
+class ExpiryBatch:
+    """expire_date yang menunggu ditulis ke database: {session_key: expire_date}"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._oldest = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, session_key, expire_date):
+        with self._lock:
+            self._pending[session_key] = expire_date
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+
+    def discard(self, session_key):
+        with self._lock:
+            self._pending.pop(session_key, None)
+
+    def due(self):
+        if not self._pending:
+            return False
+        return (
+            len(self._pending) >= getattr(settings, 'SESSION_EXPIRY_BATCH_SIZE', 500)
+            or time.monotonic() - self._oldest >= getattr(settings, 'SESSION_EXPIRY_FLUSH_SECONDS', 30)
+        )
+
+    def flush(self):
+        batch_size = getattr(settings, 'SESSION_EXPIRY_BATCH_SIZE', 500)
+        with self._lock:
+            pending, self._pending, self._oldest = self._pending, {}, None
+        if not pending:
+            return 0
+
+        model = SessionStore.get_model_class()
+        items = list(pending.items())
+        updated = 0
+        try:
+            for start in range(0, len(items), batch_size):
+                chunk = dict(items[start:start + batch_size])
+                updated += model.objects.filter(session_key__in=chunk).update(
+                    expire_date=Case(
+                        *(When(session_key=key, then=Value(expire_date)) for key, expire_date in chunk.items()),
+                    )
+                )
+        except Exception:
+            # Kembalikan ke antrean; sesi tetap valid di cache sampai flush berikutnya
+            logger.exception('Gagal menulis perpanjangan sesi ke database')
+            with self._lock:
+                for key, expire_date in items:
+                    self._pending.setdefault(key, expire_date)
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+            return 0
+        return updated
+
+
+expiry_batch = ExpiryBatch()
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'tickets.sessions.'
+
+    def __init__(self, session_key=None):
+        # Lewati __init__ cached_db yang langsung memakai caches[SESSION_CACHE_ALIAS]
+        super(CachedDBStore, self).__init__(session_key)
+        if session_cache_is_shared():
+            self._cache = caches[settings.SESSION_CACHE_ALIAS]
+        else:
+            # Tanpa cache bersama: setiap baca ke database, sama dengan engine `db`
+            self._cache = DummyCache('sessions', {})
+
+    def save(self, must_create=False):
+        # Setiap tulis penuh juga dihitung sebagai perpanjangan
+        if renew_interval() and getattr(self, '_session_cache', None):
+            self._session_cache[RENEWED_AT_KEY] = int(time.time())
+        super().save(must_create)
+        # Sudah tertulis penuh; perpanjangan yang tertunda tidak perlu lagi
+        expiry_batch.discard(self.session_key)
+
+    def delete(self, session_key=None):
+        expiry_batch.discard(session_key or self.session_key)
+        super().delete(session_key)
+
+    def renew(self):
+        """
+        Perpanjang sesi persisten jika perpanjangan terakhir lebih lama dari
+        SESSION_RENEW_SECONDS. Hanya cache yang ditulis sekarang. True jika diperpanjang.
+        """
+        interval = renew_interval()
+        if not interval or self.session_key is None or self.is_empty() or self.get_expire_at_browser_close():
+            return False
+
+        now = int(time.time())
+        session = self._get_session()
+        if now - session.get(RENEWED_AT_KEY, 0) < interval:
+            return False
+
+        if not session_cache_is_shared():
+            # Tidak ada cache untuk menampung perpanjangan: tulis langsung
+            self.save()
+            return True
+
+        # Langsung ke dict agar sesi tidak ditandai modified (yang memicu tulis database)
+        session[RENEWED_AT_KEY] = now
+        self._cache.set(self.cache_key, session, self.get_expiry_age())
+        expiry_batch.add(self.session_key, self.get_expiry_date())
+        return True
+
+    @classmethod
+    def clear_expired(cls, chunk_size=None, pause=0.0):
+        """Hapus sesi kedaluwarsa per chunk; mengembalikan jumlah baris yang dihapus"""
+        chunk_size = chunk_size or getattr(settings, 'SESSION_PURGE_CHUNK_SIZE', 1000)
+        model = cls.get_model_class()
+        total = 0
+        while True:
+            now = timezone.now()
+            expired = model.objects.filter(expire_date__lt=now)
+            keys = list(expired.values_list('session_key', flat=True)[:chunk_size])
+            if not keys:
+                break
+            # Setiap chunk transaksi sendiri (autocommit): lock tulis hanya sebentar.
+            # Syarat kedaluwarsa diulang: sesi yang diperpanjang sejak SELECT tidak ikut terhapus.
+            deleted, _ = expired.filter(session_key__in=keys).delete()
+            total += deleted
+            if len(keys) < chunk_size:
+                break
+            if pause:
+                time.sleep(pause)
+        return total
+
+    @classmethod
+    async def aclear_expired(cls):
+        return await sync_to_async(cls.clear_expired)()
+
+
+class SessionRenewalMiddleware:
+    """
+    Perpanjang sesi persisten dan cookie-nya selama user aktif. Dipasang tepat
+    setelah SessionMiddleware; tidak melakukan apa pun jika SESSION_RENEW_SECONDS = 0.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.renew(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if renew_interval():
+            await sync_to_async(self.renew)(request, response)
+        return response
+
+    def renew(self, request, response):
+        session = getattr(request, 'session', None)
+        # Sesi yang berubah disimpan penuh oleh SessionMiddleware
+        if session is None or not session.accessed or session.modified or response.status_code >= 500:
+            return
+        if not hasattr(session, 'renew') or not session.renew():
+            return
+        max_age = session.get_expiry_age()
+        response.set_cookie(
+            settings.SESSION_COOKIE_NAME,
+            session.session_key,
+            max_age=max_age,
+            expires=http_date(time.time() + max_age),
+            domain=settings.SESSION_COOKIE_DOMAIN,
+            path=settings.SESSION_COOKIE_PATH,
+            secure=settings.SESSION_COOKIE_SECURE or None,
+            httponly=settings.SESSION_COOKIE_HTTPONLY or None,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
+
+
+def flush_expiry_updates(force=False):
+    """Tulis perpanjangan sesi yang tertunda jika batch sudah penuh/cukup lama (atau force)"""
+    if force or expiry_batch.due():
+        return expiry_batch.flush()
+    return 0
@@ -0,0 +1,205 @@
+# tickets/signals.py
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.signals import request_finished
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_ticket_cache_version
+from .knowledge_base import forget_announcements, forget_popular_articles
+from .live import publish_reply
+from .models import Announcement, Article, Ticket, TicketReply, TicketStats
+from .roles import forget_portal_group, invalidate_portal_role, portal_group_name
+from .search import get_backend
+from .sessions import flush_expiry_updates
+
+
+def _stats_key(ticket):
+    # Pakai __dict__ agar field yang di-defer tidak memicu query tambahan
+    values = ticket.__dict__
+    return (values.get('created_by_id'), values.get('status'), values.get('priority'))
+
+
+STATS_FIELDS = {'created_by', 'status', 'priority'}
+
+
+@receiver(pre_save, sender=Ticket)
+def read_ticket_stats_key(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Nilai lama dibaca ulang dari database di dalam transaksi Ticket.save(),
+    # bukan dari instance yang bisa sudah basi (diubah request lain sejak dimuat)
+    instance._stats_key = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not STATS_FIELDS.intersection(update_fields):
+        instance._stats_key = _stats_key(instance)
+        return
+    instance._stats_key = (
+        Ticket.objects
+        .select_for_update()
+        .filter(pk=instance.pk)
+        .values_list('created_by_id', 'status', 'priority')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def bump_cache_on_ticket_change(sender, instance, **kwargs):
+    # Didaftarkan sebelum update_stats_on_save, jadi _stats_key masih berisi pemilik lama
+    bump_ticket_cache_version(instance.created_by_id)
+    old_key = getattr(instance, '_stats_key', None)
+    if old_key and old_key[0] != instance.created_by_id:
+        bump_ticket_cache_version(old_key[0])
+
+
+@receiver(post_save, sender=Ticket)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    old_key = None if created else getattr(instance, '_stats_key', None)
+    instance._stats_key = None
+    if raw:
+        return
+
+    new_key = _stats_key(instance)
+    if old_key is not None:
+        # Field yang di-defer tidak ikut disimpan, jadi nilainya tetap yang lama
+        new_key = tuple(old if new is None else new for old, new in zip(old_key, new_key))
+        if old_key == new_key:
+            return
+        TicketStats.apply_delta(*old_key, delta=-1)
+    elif not created:
+        # Nilai lama tidak diketahui: hitung ulang saja
+        TicketStats.rebuild_for(instance.created_by_id)
+        return
+
+    if not TicketStats.apply_delta(*new_key, delta=1):
+        # Baris statistik belum ada: hitung penuh (tiket ini sudah tersimpan)
+        TicketStats.rebuild_for(new_key[0])
+
+
+@receiver(post_delete, sender=Ticket)
+def update_stats_on_delete(sender, instance, **kwargs):
+    # Jika baris belum ada, biarkan dibuat ulang saat dashboard dibuka
+    TicketStats.apply_delta(instance.created_by_id, instance.status, instance.priority, delta=-1)
+
+
+@receiver(post_save, sender=TicketReply)
+def update_ticket_on_reply(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    Ticket.objects.filter(pk=instance.ticket_id).update(
+        reply_count=F('reply_count') + 1,
+        last_reply_at=instance.created_at,
+        last_reply_by_staff=instance.user.is_staff,
+    )
+
+
+def _deleted_with_ticket(origin):
+    # Balasan ikut terhapus karena tiketnya dihapus (cascade)
+    return isinstance(origin, Ticket) or getattr(origin, 'model', None) is Ticket
+
+
+@receiver(post_delete, sender=TicketReply)
+def update_ticket_on_reply_delete(sender, instance, origin=None, **kwargs):
+    # Tiket ikut terhapus, tidak perlu diperbarui
+    if _deleted_with_ticket(origin):
+        return
+
+    latest = TicketReply.objects.filter(ticket=OuterRef('pk')).order_by('-created_at', '-id')
+    Ticket.objects.filter(pk=instance.ticket_id).update(
+        reply_count=F('reply_count') - 1,
+        last_reply_at=Subquery(latest.values('created_at')[:1]),
+        last_reply_by_staff=Coalesce(Subquery(latest.values('user__is_staff')[:1]), Value(False)),
+    )
+
+
+@receiver(post_save, sender=Ticket)
+def index_ticket(sender, instance, **kwargs):
+    get_backend().index_ticket(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def unindex_ticket(sender, instance, **kwargs):
+    get_backend().remove_ticket(instance.pk)
+
+
+@receiver(post_save, sender=TicketReply)
+def index_reply(sender, instance, **kwargs):
+    get_backend().index_reply(instance)
+
+
+@receiver(post_save, sender=TicketReply)
+def push_reply_to_watchers(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish_reply(instance)
+
+
+@receiver(post_delete, sender=TicketReply)
+def unindex_reply(sender, instance, **kwargs):
+    get_backend().remove_reply(instance.pk)
+
+
+@receiver(post_save, sender=TicketReply)
+@receiver(post_delete, sender=TicketReply)
+def bump_cache_on_reply_change(sender, instance, origin=None, **kwargs):
+    # Cascade dari tiket: versi pemilik sudah dinaikkan oleh handler tiket
+    if _deleted_with_ticket(origin):
+        return
+    if TicketReply.ticket.is_cached(instance):
+        owner_id = instance.ticket.created_by_id
+    else:
+        owner_id = Ticket.objects.filter(pk=instance.ticket_id).values_list('created_by_id', flat=True).first()
+    if owner_id is not None:
+        bump_ticket_cache_version(owner_id)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def invalidate_role_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # group.user_set.add/remove/clear: instance adalah Group
+        if action == 'pre_clear':
+            invalidate_portal_role(instance.user_set.values_list('pk', flat=True))
+        elif action in ('post_add', 'post_remove'):
+            invalidate_portal_role(pk_set)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_portal_role([instance.pk])
+
+
+@receiver(post_save, sender=Group)
+def invalidate_role_on_group_rename(sender, instance, created, **kwargs):
+    # Nama lama tidak diketahui di sini, jadi semua anggota grup yang diubah di-invalidate
+    forget_portal_group()
+    if not created:
+        invalidate_portal_role(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_role_on_group_delete(sender, instance, **kwargs):
+    if instance.name == portal_group_name():
+        forget_portal_group()
+        invalidate_portal_role(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=get_user_model())
+def invalidate_role_on_user_delete(sender, instance, **kwargs):
+    invalidate_portal_role([instance.pk])
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def refresh_popular_on_article_change(sender, instance, **kwargs):
+    # Judul/status terbit di daftar populer ikut berubah; dihitung ulang saat dibaca berikutnya
+    forget_popular_articles()
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def refresh_announcements_on_change(sender, instance, **kwargs):
+    forget_announcements()
+
+
+@receiver(request_finished)
+def flush_session_expiry(sender, **kwargs):
+    # Hanya menulis jika batch perpanjangan sesi sudah penuh/cukup lama
+    flush_expiry_updates()
@@ -0,0 +1,69 @@
+// Balasan baru muncul otomatis di halaman detail tiket.
+// Pakai Server-Sent Events; jika tidak didukung atau koneksi terus gagal, pakai long-poll.
+(function () {
+    const list = document.getElementById('reply-list');
+    if (!list) return;
+
+    const card = document.getElementById('replies-card');
+    const counter = document.getElementById('reply-count');
+    let lastId = 0;
+    list.querySelectorAll('[data-reply-id]').forEach(item => {
+        lastId = Math.max(lastId, Number(item.dataset.replyId));
+    });
+
+    function appendReply(reply) {
+        if (reply.id <= lastId) return;
+        lastId = reply.id;
+
+        const previous = list.querySelector('.message-content.last');
+        if (previous) previous.classList.remove('last');
+
+        const wrapper = document.createElement('div');
+        wrapper.innerHTML = reply.html.trim();
+        const item = wrapper.firstElementChild;
+        item.classList.add('last');
+        list.appendChild(item);
+
+        card.hidden = false;
+        counter.textContent = list.querySelectorAll('[data-reply-id]').length;
+    }
+
+    async function longPoll() {
+        while (true) {
+            try {
+                const response = await fetch(`${list.dataset.pollUrl}?after=${lastId}`, {
+                    headers: { 'Accept': 'application/json' },
+                    credentials: 'same-origin',
+                });
+                if (response.status === 403 || response.status === 404) return;
+                if (!response.ok) throw new Error(response.statusText);
+                const data = await response.json();
+                data.replies.forEach(appendReply);
+            } catch (error) {
+                // Server sibuk/terputus: tunggu sebentar sebelum mencoba lagi
+                await new Promise(resolve => setTimeout(resolve, 5000));
+            }
+        }
+    }
+
+    if (!window.EventSource) {
+        longPoll();
+        return;
+    }
+
+    let failures = 0;
+    const source = new EventSource(`${list.dataset.streamUrl}?after=${lastId}`);
+    source.addEventListener('reply', event => {
+        failures = 0;
+        appendReply(JSON.parse(event.data));
+    });
+    source.addEventListener('open', () => { failures = 0; });
+    source.addEventListener('error', () => {
+        // EventSource menyambung ulang sendiri; setelah beberapa kali gagal beralih ke long-poll
+        failures += 1;
+        if (failures >= 3 || source.readyState === EventSource.CLOSED) {
+            source.close();
+            longPoll();
+        }
+    });
+})();
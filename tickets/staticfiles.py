@@ -0,0 +1,277 @@
+# tickets/staticfiles.py
+"""
+Pipeline aset statis: nama file ber-hash, minify, dan varian terkompresi.
+
+- CompressedManifestStaticFilesStorage (STORAGES['staticfiles']): saat
+  `collectstatic`, CSS/JS ber-hash di-minify lalu dibuatkan varian .gz (dan
+  .br jika paket `brotli` terpasang).
+- StaticAssetMiddleware: melayani STATIC_ROOT langsung dari aplikasi. File
+  ber-hash diberi Cache-Control immutable satu tahun, varian dipilih menurut
+  Accept-Encoding, dan ETag/Last-Modified dijawab dengan 304.
+"""
+import gzip
+import json
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml', '.map', '.ico')
+# Varian terkompresi hanya disimpan jika cukup menghemat
+MIN_COMPRESSION_RATIO = 0.95
+
+_CSS_STRINGS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+_CSS_COMMENTS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*(?!!).*?\*/)', re.S)
+
+
+def minify_css(text):
+    """Minify konservatif: hapus komentar & spasi yang tidak bermakna, string tidak disentuh"""
+    text = _CSS_COMMENTS.sub(lambda m: m.group(0) if m.group(0)[0] in '"\'' else ' ', text)
+    parts = _CSS_STRINGS.split(text)
+    for i in range(0, len(parts), 2):
+        part = re.sub(r'\s+', ' ', parts[i])
+        part = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+        part = re.sub(r':\s+', ':', part)
+        # Hanya di luar string: ';}' di dalam content/url tetap utuh
+        parts[i] = part.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def minify_js(text):
+    """
+    Minify konservatif tanpa parser: hapus indentasi, baris kosong, dan baris
+    yang hanya berisi komentar //. Isi template literal multi-baris dibiarkan.
+    """
+    lines = []
+    in_template = False
+    for line in text.splitlines():
+        if in_template:
+            lines.append(line)
+        else:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('//'):
+                lines.append(stripped)
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def compress_file(path):
+    """Buat path.gz (dan path.br) di sebelah file; mengembalikan encoding yang dibuat"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    variants = {'gzip': ('.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0))}
+    if brotli is not None:
+        variants['br'] = ('.br', lambda: brotli.compress(data, quality=11))
+
+    created = []
+    for encoding, (suffix, compress) in variants.items():
+        compressed = compress()
+        if len(compressed) < len(data) * MIN_COMPRESSION_RATIO:
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            created.append(encoding)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return created
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    _post_processing = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        self._post_processing = True
+        try:
+            yield from super().post_process(paths, dry_run, **options)
+        finally:
+            self._post_processing = False
+        if dry_run:
+            return
+
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                compress_file(self.path(name))
+
+    def _save(self, name, content):
+        # Selama post_process yang disimpan hanya file ber-hash: minify di sini.
+        # Hash tetap dihitung dari sumber, jadi tetap unik per isi file.
+        minify = MINIFIERS.get(os.path.splitext(name)[1]) if self._post_processing else None
+        if minify is not None:
+            content.seek(0)
+            text = content.read()
+            if isinstance(text, bytes):
+                text = text.decode('utf-8')
+            content = ContentFile(minify(text).encode('utf-8'))
+        return super()._save(name, content)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # collectstatic belum dijalankan (development/test): pakai nama asli
+            return name
+
+
+@dataclass
+class StaticAsset:
+    path: str
+    content_type: str
+    size: int
+    mtime: float
+    immutable: bool
+    # encoding -> (path, size)
+    variants: dict = field(default_factory=dict)
+
+
+def _accepted_encodings(header):
+    """Encoding yang diterima klien (q > 0) dari header Accept-Encoding"""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticAssetMiddleware:
+    """Layani file di STATIC_ROOT; request lain diteruskan apa adanya"""
+    sync_capable = True
+    async_capable = True
+    # Urutan preferensi jika klien menerima beberapa encoding
+    ENCODINGS = ('br', 'gzip')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.prefix = urlsplit(settings.STATIC_URL or '/static/').path
+        if not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        self.root = settings.STATIC_ROOT
+        self._assets = None
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        # Aset statis kecil: dibaca langsung, tanpa iterator sync di event loop
+        response = self.serve(request, stream=False)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    @property
+    def assets(self):
+        # Index dibuat sekali per proses: tidak ada stat filesystem per request
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    self._assets = self.scan()
+        return self._assets
+
+    def scan(self):
+        if not self.root or not os.path.isdir(self.root):
+            return {}
+        hashed = set()
+        manifest_path = os.path.join(self.root, ManifestStaticFilesStorage.manifest_name)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                hashed = set(json.load(f).get('paths', {}).values())
+
+        assets = {}
+        for directory, _, files in os.walk(self.root):
+            for filename in files:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                stat = os.stat(path)
+                content_type, _ = mimetypes.guess_type(filename)
+                if content_type and (content_type.startswith('text/') or content_type in ('application/javascript', 'application/json', 'image/svg+xml')):
+                    content_type += '; charset=utf-8'
+                asset = StaticAsset(
+                    path=path,
+                    content_type=content_type or 'application/octet-stream',
+                    size=stat.st_size,
+                    mtime=stat.st_mtime,
+                    immutable=name in hashed,
+                )
+                for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+                    if os.path.exists(path + suffix):
+                        asset.variants[encoding] = (path + suffix, os.path.getsize(path + suffix))
+                assets[name] = asset
+        return assets
+
+    def serve(self, request, stream=True):
+        if request.method not in ('GET', 'HEAD') or not request.path_info.startswith(self.prefix):
+            return None
+        asset = self.assets.get(request.path_info[len(self.prefix):])
+        if asset is None:
+            return None
+
+        path, size, encoding = asset.path, asset.size, None
+        accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        for candidate in self.ENCODINGS:
+            if candidate in asset.variants and candidate in accepted:
+                encoding = candidate
+                path, size = asset.variants[candidate]
+                break
+
+        etag = f'"{int(asset.mtime):x}-{size:x}{"-" + encoding if encoding else ""}"'
+        response = get_conditional_response(request, etag=etag, last_modified=int(asset.mtime))
+        if response is None:
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=asset.content_type)
+            elif stream:
+                response = FileResponse(open(path, 'rb'), content_type=asset.content_type)
+                # FileResponse menambahkan nama file (.gz/.br) sebagai Content-Disposition
+                del response['Content-Disposition']
+            else:
+                with open(path, 'rb') as f:
+                    response = HttpResponse(f.read(), content_type=asset.content_type)
+            response['Content-Length'] = size
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(asset.mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if asset.variants:
+            response['Vary'] = 'Accept-Encoding'
+        if asset.immutable:
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            # Nama tanpa hash bisa berubah isinya: cache singkat lalu revalidasi
+            response['Cache-Control'] = f"public, max-age={getattr(settings, 'STATIC_UNHASHED_MAX_AGE', 60)}"
+        return response
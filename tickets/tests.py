@@ -1,3 +1,1474 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from importlib import import_module
+from io import StringIO
+from types import ModuleType
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.mail import EmailMessage
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, include, path, reverse
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from config.database import sqlite_database
+
+from .caching import fragment_cache_seconds, mark_ticket_read, ticket_cache_version, unread_count
+from .importing import TicketImporter, read_jsonl
+from .knowledge_base import FLUSH_LOCK_KEY, flush_article_views, pending_views, popular_articles, record_article_view
+from .mail_pool import SMTPConnectionPool
+from .metrics import MetricsRegistry, registry as metrics_registry
+from .models import Article, OutboundEmail, Ticket, TicketReadMarker, TicketReply, TicketStats
+from .outbox import backoff_delay, claim_due, deliver_batch
+from .pagination import EstimatedCountPaginator, decode_cursor, decode_offset, encode_cursor, encode_offset, paginate_keyset, paginate_ranked
+from .pubsub import get_broker
+from .roles import auser_has_portal_role, forget_portal_group, portal_group_id
+from .search import get_backend as get_search_backend
+from .seeding import seed_portal_data
+from .sessions import SessionStore, expiry_batch, flush_expiry_updates
+from .staticfiles import StaticAssetMiddleware, minify_css
+from .streaming import ROWS_MARKER, stream_template
+from .urls import build_urlpatterns
+
+# URLconf test dengan endpoint balasan live (bawaannya tidak dipasang di bawah WSGI)
+urlpatterns = [path('', include(build_urlpatterns(live_updates=True)))]
+# Sama dengan config.urls dengan PORTAL_ASYNC_VIEWS aktif
+ASYNC_URLCONF = ModuleType('async_urls')
+ASYNC_URLCONF.urlpatterns = [path('', include(build_urlpatterns(use_async_views=True)))]
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Server SMTP minimal untuk test: menyimpan pesan di memori server"""
+
+    def send(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.send('220 fake ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.send('250 fake')
+            elif verb == 'MAIL':
+                recipients = []
+                self.send('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip('<> ')
+                if address in server.reject:
+                    self.send('550 no such user')
+                else:
+                    recipients.append(address)
+                    self.send('250 OK')
+            elif verb == 'DATA':
+                self.send('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline().rstrip(b'\r\n') != b'.':
+                    pass
+                with server.lock:
+                    server.messages.append(recipients)
+                    drop = len(server.messages) in server.drop_after
+                self.send('250 OK')
+                if drop:
+                    # Simulasi server memutus koneksi di tengah sesi
+                    return
+            elif verb == 'RSET' or verb == 'NOOP':
+                self.send('250 OK')
+            elif verb == 'QUIT':
+                self.send('221 Bye')
+                return
+            else:
+                self.send('502 not implemented')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.reject = set()
+        self.drop_after = set()
+
+
+class SMTPConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeSMTPServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_messages(self, count):
+        return [
+            EmailMessage(f"Pesan {i}", 'isi', 'support@example.com', [f"user{i}@example.com"])
+            for i in range(count)
+        ]
+
+    def test_batch_reuses_single_connection(self):
+        pool = SMTPConnectionPool(size=1, batch_size=10)
+        results = pool.send(self.make_messages(25))
+        results += pool.send(self.make_messages(5))
+        pool.close()
+
+        self.assertEqual(results, [None] * 30)
+        self.assertEqual(len(self.server.messages), 30)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(pool.stats.sent, 30)
+        self.assertGreater(pool.stats.throughput, 0)
+
+    def test_rejected_message_does_not_fail_batch(self):
+        self.server.reject.add('user1@example.com')
+        pool = SMTPConnectionPool(size=1, batch_size=10)
+        results = pool.send(self.make_messages(3))
+        pool.close()
+
+        self.assertIsNone(results[0])
+        self.assertIsNotNone(results[1])
+        self.assertIsNone(results[2])
+        self.assertEqual(len(self.server.messages), 2)
+
+    def test_reconnects_after_server_disconnect(self):
+        self.server.drop_after.add(2)
+        pool = SMTPConnectionPool(size=1, batch_size=10)
+        results = pool.send(self.make_messages(4))
+        pool.close()
+
+        # Pesan ketiga gagal karena koneksi putus, sisanya lewat koneksi baru
+        self.assertEqual([r is None for r in results], [True, True, False, True])
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(pool.stats.reconnects, 1)
+
+    def test_idle_connection_is_reopened(self):
+        pool = SMTPConnectionPool(size=1, batch_size=10, idle_timeout=0)
+        pool.send(self.make_messages(1))
+        pool.send(self.make_messages(1))
+        pool.close()
+
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(pool.stats.reconnects, 1)
+
+
+class QueryPlanTests(TestCase):
+    def test_portal_views_use_indexes(self):
+        # Gagal (CommandError) jika ada query view yang full scan / sort tanpa index
+        call_command('check_query_plans', users=5, tickets=40, stdout=StringIO())
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    # Koneksi ke file SQLite sementara, bukan database test; alias-nya tetap 'default'
+    databases = {'default'}
+
+    def open_profile(self, profile):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        handler = ConnectionHandler({'default': sqlite_database(os.path.join(directory.name, 'uji.sqlite3'), profile)})
+        self.addCleanup(handler.close_all)
+        return handler['default']
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_production_profile_applies_pragmas_on_connect(self):
+        connection = self.open_profile('production')
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(connection, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(connection, 'cache_size'), -20000)
+        self.assertEqual(self.pragma(connection, 'temp_store'), 2)  # MEMORY
+        self.assertEqual(self.pragma(connection, 'mmap_size'), 128 * 1024 * 1024)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        self.assertEqual((connection.settings_dict['CONN_MAX_AGE'], connection.settings_dict['CONN_HEALTH_CHECKS']), (600, True))
+
+    def test_default_profile_keeps_django_defaults(self):
+        connection = self.open_profile('default')
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'delete')
+        self.assertIsNone(connection.transaction_mode)
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], 0)
+
+
+class PortalTestCase(TestCase):
+    """User portal yang sudah login + helper pembuat tiket"""
+
+    def setUp(self):
+        # Kunci cache memakai ID user/tiket yang bisa terpakai ulang antar test
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        forget_portal_group()
+        self.user = self.make_user('pelanggan')
+        self.client.force_login(self.user)
+
+    def make_user(self, username, portal=True, **extra):
+        user = get_user_model().objects.create_user(username, f"{username}@example.com", 'rahasia-123', **extra)
+        if portal:
+            user.groups.add(portal_group_id())
+        return user
+
+    def make_ticket(self, user=None, **fields):
+        fields.setdefault('title', 'Printer macet')
+        fields.setdefault('description', 'Kertas selalu tersangkut')
+        return Ticket.objects.create(created_by=user or self.user, **fields)
+
+
+class TicketSearchTests(PortalTestCase):
+    def search_page(self, **params):
+        response = self.client.get(reverse('my-tickets'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['page']
+
+    @override_settings(MY_TICKETS_PAGE_SIZE=5)
+    def test_filters_apply_before_paging(self):
+        closed = {self.make_ticket(title=f"Printer rusak {i}", status=Ticket.Status.CLOSED).pk for i in range(8)}
+        # Lebih banyak tiket aktif yang cocok dan lebih baru dari tiket closed
+        for i in range(60):
+            self.make_ticket(title=f"Printer macet {i}")
+
+        first = self.search_page(search='printer', status='closed')
+        self.assertEqual(len(first), 5)
+        self.assertTrue(first.has_next)
+        self.assertFalse(first.has_previous)
+
+        second = self.search_page(search='printer', status='closed', after=first.next_cursor)
+        self.assertEqual(len(second), 3)
+        self.assertFalse(second.has_next)
+        self.assertTrue(second.has_previous)
+        self.assertEqual({t.pk for t in first} | {t.pk for t in second}, closed)
+
+        back = self.search_page(search='printer', status='closed', before=second.previous_cursor)
+        self.assertEqual([t.pk for t in back], [t.pk for t in first])
+
+    def test_numeric_query_pins_ticket_id(self):
+        tickets = [self.make_ticket(title=f"Printer {i}") for i in range(3)]
+        other = self.make_ticket(user=self.make_user('lain'))
+
+        page = self.search_page(search=str(tickets[1].pk))
+        self.assertEqual(page.object_list[0].pk, tickets[1].pk)
+        # ID milik user lain tidak pernah muncul
+        self.assertNotIn(other.pk, [t.pk for t in self.search_page(search=str(other.pk))])
+
+    def test_index_follows_ticket_and_reply_changes(self):
+        backend = get_search_backend()
+        ticket = self.make_ticket(title='Monitor berkedip')
+        self.assertEqual(backend.search('monitor', owner_id=self.user.pk), [ticket.pk])
+
+        ticket.title = 'Layar berkedip'
+        ticket.save()
+        self.assertEqual(backend.search('monitor', owner_id=self.user.pk), [])
+        self.assertEqual(backend.search('layar', owner_id=self.user.pk), [ticket.pk])
+
+        reply = TicketReply.objects.create(ticket=ticket, user=self.user, message='Kabel HDMI longgar')
+        self.assertEqual(backend.search('hdmi', owner_id=self.user.pk), [ticket.pk])
+        self.assertEqual(backend.search_replies('hdmi'), [reply.pk])
+
+        reply.delete()
+        self.assertEqual(backend.search('hdmi', owner_id=self.user.pk), [])
+        ticket.delete()
+        self.assertEqual(backend.search('layar', owner_id=self.user.pk), [])
+
+    @override_settings(ADMIN_SEARCH_RESULT_LIMIT=3)
+    def test_admin_search_warns_when_results_are_capped(self):
+        for i in range(4):
+            self.make_ticket(title=f"Monitor {i}")
+        self.client.force_login(self.make_user('admin', portal=False, is_staff=True, is_superuser=True))
+        changelist = reverse('admin:tickets_ticket_changelist')
+
+        response = self.client.get(changelist, {'q': 'monitor'})
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+        self.assertIn('hanya menampilkan 3 tiket', ' '.join(str(m) for m in response.context['messages']))
+
+        response = self.client.get(changelist, {'q': 'printer'})
+        self.assertEqual(list(response.context['messages']), [])
+
+
+class TicketCacheVersionTests(PortalTestCase):
+    def test_version_bumps_only_after_commit(self):
+        version = ticket_cache_version(self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.make_ticket()
+            self.assertEqual(ticket_cache_version(self.user.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(ticket_cache_version(self.user.pk), version)
+
+    def test_cached_list_fragment_is_replaced_after_write(self):
+        self.make_ticket(title='Keyboard rusak')
+        self.assertContains(self.client.get(reverse('my-tickets')), 'Keyboard rusak')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_ticket(title='Mouse hilang')
+        self.assertContains(self.client.get(reverse('my-tickets')), 'Mouse hilang')
+
+        ticket = Ticket.objects.get(title='Mouse hilang')
+        with self.captureOnCommitCallbacks(execute=True):
+            TicketReply.objects.create(ticket=ticket, user=self.user, message='Sudah ketemu')
+        response = self.client.get(reverse('my-tickets'))
+        self.assertEqual(response.context['page'].object_list[0].reply_count, 1)
+
+    @override_settings(LOCAL_CACHE_MAX_SECONDS=7, FRAGMENT_CACHE_SECONDS=300)
+    def test_other_worker_write_is_seen_once_local_version_expires(self):
+        self.assertEqual(fragment_cache_seconds(), 7)
+        self.make_ticket(title='Keyboard rusak')
+        version = ticket_cache_version(self.user.pk)
+        self.assertContains(self.client.get(reverse('dashboard')), 'Keyboard rusak')
+
+        # Worker lain menulis: versi di proses ini tidak ikut naik
+        with mock.patch('tickets.caching._bump_version'), self.captureOnCommitCallbacks(execute=True):
+            self.make_ticket(title='Mouse hilang')
+        self.assertNotContains(self.client.get(reverse('dashboard')), 'Mouse hilang')
+
+        # Versi lokal kedaluwarsa (paling lama LOCAL_CACHE_MAX_SECONDS)
+        caches['default'].delete(f"ticket-version:{self.user.pk}")
+        self.assertContains(self.client.get(reverse('dashboard')), 'Mouse hilang')
+        self.assertGreater(ticket_cache_version(self.user.pk), version)
+
+    def test_shared_cache_keeps_configured_fragment_timeout(self):
+        with tempfile.TemporaryDirectory() as location:
+            shared = {**settings.CACHES, 'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+            }}
+            with override_settings(CACHES=shared, FRAGMENT_CACHE_SECONDS=300):
+                self.assertEqual(fragment_cache_seconds(), 300)
+
+    def test_cascade_delete_does_not_look_up_owner_per_reply(self):
+        ticket = self.make_ticket()
+        for i in range(5):
+            TicketReply.objects.create(ticket=ticket, user=self.user, message=f"Balasan {i}")
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        with CaptureQueriesContext(connection) as queries:
+            ticket.delete()
+        owner_lookups = [
+            q['sql'] for q in queries
+            if q['sql'].startswith('SELECT') and 'FROM "tickets_ticket" ' in q['sql']
+        ]
+        self.assertEqual(owner_lookups, [])
+
+
+def shared_session_cache(location):
+    """CACHES dengan alias session di backend file (dipakai bersama antar proses)"""
+    return {
+        **settings.CACHES,
+        'sessions': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+    }
+
+
+class SessionEngineTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.logout()
+        self.addCleanup(expiry_batch.flush)
+
+    def login(self, remember):
+        data = {'username': self.user.username, 'password': 'rahasia-123'}
+        if remember:
+            data['remember_me'] = 'on'
+        self.assertRedirects(self.client.post(reverse('login'), data), reverse('dashboard'))
+        return SessionStore(self.client.cookies[settings.SESSION_COOKIE_NAME].value)
+
+    def test_remember_me_controls_expiry(self):
+        session = self.login(remember=False)
+        self.assertTrue(session.get_expire_at_browser_close())
+
+        self.client.logout()
+        session = self.login(remember=True)
+        self.assertFalse(session.get_expire_at_browser_close())
+        self.assertEqual(session.get_expiry_age(), 1209600)
+
+    def test_process_local_cache_falls_back_to_database(self):
+        session = self.login(remember=True)
+        with CaptureQueriesContext(connection) as queries:
+            SessionStore(session.session_key).load()
+        self.assertTrue(any('django_session' in q['sql'] for q in queries))
+
+        self.client.logout()
+        self.assertFalse(SessionStore(session.session_key).exists(session.session_key))
+
+    def test_shared_cache_serves_reads_and_batches_renewal(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES=shared_session_cache(location), SESSION_RENEW_SECONDS=1,
+        ):
+            session = self.login(remember=True)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+            self.assertFalse(any('django_session' in q['sql'] for q in queries))
+
+            before = Session.objects.get(pk=session.session_key).expire_date
+            time.sleep(1.1)
+            response = self.client.get(reverse('dashboard'))
+            self.assertEqual(response.cookies[settings.SESSION_COOKIE_NAME]['max-age'], 1209600)
+            # Database belum ditulis sampai batch di-flush
+            self.assertEqual(len(expiry_batch), 1)
+            self.assertEqual(Session.objects.get(pk=session.session_key).expire_date, before)
+
+            self.assertEqual(flush_expiry_updates(force=True), 1)
+            self.assertGreater(Session.objects.get(pk=session.session_key).expire_date, before)
+
+    def test_renewal_without_shared_cache_saves_directly(self):
+        with override_settings(SESSION_RENEW_SECONDS=1):
+            session = self.login(remember=True)
+            before = Session.objects.get(pk=session.session_key).expire_date
+            time.sleep(1.1)
+            self.client.get(reverse('dashboard'))
+            self.assertEqual(len(expiry_batch), 0)
+            self.assertGreater(Session.objects.get(pk=session.session_key).expire_date, before)
+
+    def test_purge_deletes_only_expired_sessions_in_chunks(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f"lama{i:04d}", session_data='', expire_date=now - timedelta(days=1)) for i in range(7)]
+            + [Session(session_key='masih-aktif', session_data='', expire_date=now + timedelta(days=1))]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            deleted = SessionStore.clear_expired(chunk_size=3)
+        self.assertEqual(deleted, 7)
+        self.assertEqual(sum(q['sql'].startswith('DELETE') for q in queries), 3)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['masih-aktif'])
+
+        out = StringIO()
+        call_command('purge_sessions', stdout=out)
+        self.assertIn('0 sesi kedaluwarsa dihapus', out.getvalue())
+
+
+class LiveRepliesTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ticket = self.make_ticket()
+
+    def test_disabled_by_default_under_wsgi(self):
+        response = self.client.get(reverse('ticket-detail', args=[self.ticket.pk]))
+        self.assertNotContains(response, 'ticket_live.js')
+        with self.assertRaises(NoReverseMatch):
+            reverse('ticket-reply-stream', args=[self.ticket.pk])
+
+    def test_publish_skips_rendering_without_subscribers(self):
+        with mock.patch('tickets.live.reply_event') as reply_event, self.captureOnCommitCallbacks(execute=True):
+            TicketReply.objects.create(ticket=self.ticket, user=self.user, message='Tidak ada yang menonton')
+        reply_event.assert_not_called()
+
+
+@override_settings(ROOT_URLCONF='tickets.tests', REPLY_LIVE_UPDATES=True)
+class LiveRepliesEnabledTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ticket = self.make_ticket()
+
+    def test_detail_page_loads_live_script(self):
+        response = self.client.get(reverse('ticket-detail', args=[self.ticket.pk]))
+        self.assertContains(response, 'ticket_live.js')
+        self.assertContains(response, reverse('ticket-reply-stream', args=[self.ticket.pk]))
+
+    @override_settings(REPLY_LONG_POLL_SECONDS=0.1)
+    def test_long_poll_returns_replies_after_last_id(self):
+        first = TicketReply.objects.create(ticket=self.ticket, user=self.user, message='Pertama')
+        second = TicketReply.objects.create(ticket=self.ticket, user=self.user, message='Kedua')
+        url = reverse('ticket-reply-poll', args=[self.ticket.pk])
+
+        data = self.client.get(url, {'after': first.pk}).json()
+        self.assertEqual([reply['id'] for reply in data['replies']], [second.pk])
+        self.assertEqual(data['last_id'], second.pk)
+
+        # Tidak ada yang baru: kembali kosong setelah timeout
+        self.assertEqual(self.client.get(url, {'after': second.pk}).json()['replies'], [])
+
+    def test_other_users_ticket_is_not_streamed(self):
+        other = self.make_ticket(user=self.make_user('lain'))
+        response = self.client.get(reverse('ticket-reply-poll', args=[other.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_non_portal_user_is_rejected_with_async_role_check(self):
+        outsider = await sync_to_async(self.make_user)('tamu', portal=False)
+        await self.async_client.aforce_login(outsider)
+        with mock.patch('tickets.live.auser_has_portal_role', wraps=auser_has_portal_role) as role_check:
+            response = await self.async_client.get(reverse('ticket-reply-poll', args=[self.ticket.pk]))
+        self.assertEqual(response.status_code, 403)
+        role_check.assert_awaited_once()
+
+    @override_settings(REPLY_STREAM_MAX_SECONDS=0.2, REPLY_STREAM_HEARTBEAT_SECONDS=0.1)
+    async def test_stream_sends_missed_replies_with_event_ids(self):
+        reply = await TicketReply.objects.acreate(ticket=self.ticket, user=self.user, message='Terlewat')
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse('ticket-reply-stream', args=[self.ticket.pk]),
+            headers={'Last-Event-ID': '0'},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn(f"id: {reply.pk}\nevent: reply\n", body)
+        self.assertIn('Terlewat', body)
+
+    async def test_subscriber_receives_committed_reply(self):
+        with get_broker().subscribe(self.ticket.pk) as subscription:
+            reply = await sync_to_async(self.create_reply_and_commit)()
+            event = await subscription.get(timeout=1)
+        self.assertEqual(event['id'], reply.pk)
+        self.assertIn('Langsung sampai', event['html'])
+
+    def create_reply_and_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return TicketReply.objects.create(ticket=self.ticket, user=self.user, message='Langsung sampai')
+
+
+class TicketImportTests(PortalTestCase):
+    def run_import(self, reader, text, chunk_size=2):
+        errors = []
+        importer = TicketImporter(chunk_size=chunk_size, on_error=lambda line_no, message: errors.append(line_no))
+        for line_no, record in reader(StringIO(text)):
+            importer.add(line_no, record)
+        importer.finish()
+        return importer, errors
+
+    def test_jsonl_import_keeps_history_and_derived_data(self):
+        importer, errors = self.run_import(read_jsonl, '\n'.join([
+            '{"ref": 1, "title": "VPN putus", "created_by": "pelanggan", "status": "closed",'
+            ' "created_at": "2023-01-02T08:00:00+00:00", "replies": [{"user": "pelanggan", "message": "Sudah normal"}]}',
+            '{"ref": 2, "title": "Printer macet", "created_by": "pelanggan@example.com", "department": "IT"}',
+            '{"type": "reply", "ticket_ref": 2, "user": "pelanggan", "message": "Kertas A4",'
+            ' "created_at": "2023-01-05T09:30:00+00:00"}',
+            # Ref 1 sudah di-flush di chunk sebelumnya
+            '{"type": "reply", "ticket_ref": 1, "user": "pelanggan", "message": "Terima kasih"}',
+        ]))
+        self.assertEqual(errors, [])
+        self.assertEqual((importer.tickets_imported, importer.replies_imported), (2, 3))
+
+        vpn = Ticket.objects.get(title='VPN putus')
+        self.assertEqual(vpn.created_at.year, 2023)
+        self.assertEqual(vpn.status, Ticket.Status.CLOSED)
+        self.assertEqual(vpn.reply_count, 2)
+        self.assertEqual(Ticket.objects.get(title='Printer macet').department.name, 'IT')
+        self.assertEqual(TicketStats.objects.get(user=self.user).closed, 1)
+        self.assertEqual(get_search_backend().search('kertas', owner_id=self.user.pk), [Ticket.objects.get(title='Printer macet').pk])
+
+    def test_bad_records_are_rejected_without_stopping_import(self):
+        importer, errors = self.run_import(read_jsonl, '\n'.join([
+            '{"title": "Bulan ke-13", "created_by": "pelanggan", "created_at": "2024-13-01T00:00:00"}',
+            '["bukan", "objek"]',
+            '{"title": "Status angka", "created_by": "pelanggan", "priority": 3}',
+            '{"title": "User daftar", "created_by": ["pelanggan"]}',
+            '{"title": "Tanggal angka", "created_by": "pelanggan", "created_at": 1700000000}',
+            '{"title": "Balasan rusak", "created_by": "pelanggan", "replies": "halo"}',
+            '{"type": "reply", "ticket_ref": 99, "user": "pelanggan", "message": "Yatim"}',
+            '{bukan json',
+            '{"title": "Tidak dikenal", "created_by": "hantu"}',
+            '{"title": "Lolos", "created_by": "pelanggan"}',
+        ]))
+        self.assertEqual(errors, list(range(1, 10)))
+        self.assertEqual(importer.errors, 9)
+        self.assertEqual(list(Ticket.objects.values_list('title', flat=True)), ['Lolos'])
+
+    def test_csv_import_through_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('type,ref,ticket_ref,title,created_by,priority,user,message\n')
+            f.write('ticket,10,,Email tidak masuk,pelanggan,high,,\n')
+            f.write('reply,,10,,,,pelanggan,Sudah dicek\n')
+            f.write('ticket,11,,Tanpa pemilik,,,,\n')
+        self.addCleanup(os.remove, f.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_tickets', f.name, stdout=stdout, stderr=stderr)
+
+        ticket = Ticket.objects.get()
+        self.assertEqual((ticket.priority, ticket.reply_count), (Ticket.Priority.HIGH, 1))
+        self.assertIn('Baris 4', stderr.getvalue())
+        self.assertIn('1 baris dilewati', stdout.getvalue())
+
+    def test_rerun_after_partial_failure_does_not_duplicate(self):
+        text = '\n'.join([
+            '{"ref": "a1", "title": "VPN putus", "created_by": "pelanggan", "created_at": "2023-01-02T08:00:00+00:00",'
+            ' "replies": [{"user": "pelanggan", "message": "Masih putus", "created_at": "2023-01-02T09:00:00+00:00"}]}',
+            '{"ref": "a2", "title": "Printer macet", "created_by": "pelanggan"}',
+            '{"type": "reply", "ticket_ref": "a1", "user": "pelanggan", "message": "Terima kasih",'
+            ' "created_at": "2023-01-03T10:00:00+00:00"}',
+            '{"ref": "a3", "title": "Email penuh", "created_by": "pelanggan", "status": "closed"}',
+        ])
+        refresh = Ticket.refresh_reply_summary
+        calls = []
+
+        def fail_second_chunk(queryset=None):
+            calls.append(queryset)
+            if len(calls) == 2:
+                raise RuntimeError('koneksi database putus')
+            return refresh(queryset)
+
+        with mock.patch.object(Ticket, 'refresh_reply_summary', side_effect=fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.run_import(read_jsonl, text)
+        # Chunk pertama sudah commit, lengkap dengan statistiknya
+        self.assertEqual(list(Ticket.objects.values_list('external_ref', flat=True)), ['a1'])
+        self.assertEqual(TicketStats.objects.get(user=self.user).total, 1)
+
+        importer, errors = self.run_import(read_jsonl, text)
+        self.assertEqual(errors, [])
+        self.assertEqual((importer.tickets_imported, importer.tickets_skipped), (2, 1))
+        self.assertEqual((importer.replies_imported, importer.replies_skipped), (1, 1))
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.assertEqual(Ticket.objects.get(external_ref='a1').reply_count, 2)
+        self.assertEqual(TicketStats.objects.get(user=self.user).total, 3)
+
+        importer, _ = self.run_import(read_jsonl, text)
+        self.assertEqual((importer.tickets_imported, importer.replies_imported), (0, 0))
+        self.assertEqual((importer.tickets_skipped, importer.replies_skipped), (3, 2))
+        self.assertEqual(TicketReply.objects.count(), 2)
+
+    def test_duplicate_ref_in_one_file_is_rejected(self):
+        importer, errors = self.run_import(read_jsonl, '\n'.join([
+            '{"ref": 7, "title": "Pertama", "created_by": "pelanggan"}',
+            '{"ref": "7", "title": "Kedua", "created_by": "pelanggan"}',
+        ]), chunk_size=10)
+        self.assertEqual(errors, [2])
+        self.assertEqual(list(Ticket.objects.values_list('title', flat=True)), ['Pertama'])
+
+
+class TicketStatsTests(PortalTestCase):
+    def assertStatsMatchRebuild(self, user):
+        stats = TicketStats.objects.get(user=user)
+        counters = {field: getattr(stats, field) for field in TicketStats.COUNTER_FIELDS}
+        self.assertEqual(counters, TicketStats.compute_for(user.pk))
+
+    def test_counters_follow_create_update_and_delete(self):
+        ticket = self.make_ticket(priority=Ticket.Priority.HIGH)
+        self.make_ticket()
+        self.assertEqual(TicketStats.objects.get(user=self.user).total, 2)
+
+        ticket.status = Ticket.Status.CLOSED
+        ticket.save()
+        self.assertStatsMatchRebuild(self.user)
+
+        ticket.delete()
+        self.assertStatsMatchRebuild(self.user)
+
+    def test_saving_stale_instance_does_not_double_count(self):
+        ticket = self.make_ticket()
+        first = Ticket.objects.get(pk=ticket.pk)
+        stale = Ticket.objects.get(pk=ticket.pk)
+
+        first.status = Ticket.Status.CLOSED
+        first.save()
+        # Masih mengira status lama WAITING
+        stale.status = Ticket.Status.CLOSED
+        stale.title = 'Printer macet lagi'
+        stale.save()
+        self.assertStatsMatchRebuild(self.user)
+
+        stale.status = Ticket.Status.IN_PROGRESS
+        stale.save()
+        self.assertStatsMatchRebuild(self.user)
+
+    def test_owner_change_moves_ticket_between_users(self):
+        other = self.make_user('lain')
+        self.make_ticket(user=other)
+        ticket = self.make_ticket()
+
+        ticket.created_by = other
+        ticket.save()
+        self.assertStatsMatchRebuild(self.user)
+        self.assertStatsMatchRebuild(other)
+
+    def test_deferred_fields_keep_their_stored_values(self):
+        ticket = self.make_ticket(priority=Ticket.Priority.LOW)
+        partial = Ticket.objects.only('id', 'status').get(pk=ticket.pk)
+        partial.status = Ticket.Status.IN_PROGRESS
+        partial.save()
+        self.assertStatsMatchRebuild(self.user)
+
+    def test_save_without_stats_fields_skips_reread(self):
+        ticket = self.make_ticket()
+        with CaptureQueriesContext(connection) as queries:
+            ticket.title = 'Judul baru'
+            ticket.save(update_fields=['title'])
+        self.assertFalse([q for q in queries if 'tickets_ticketstats' in q['sql']])
+        self.assertStatsMatchRebuild(self.user)
+
+
+class TicketExportTests(PortalTestCase):
+    def export(self, *args):
+        with tempfile.NamedTemporaryFile('r', suffix='.jsonl', encoding='utf-8') as f:
+            call_command('export_tickets', '--format', 'jsonl', '--output', f.name, *args, stdout=StringIO())
+            return [json.loads(line)['title'] for line in f]
+
+    @override_settings(TIME_ZONE='Asia/Jakarta')
+    def test_date_range_uses_local_day_bounds(self):
+        jakarta = timezone.get_default_timezone()
+        for title, moment in (
+            ('Sebelum', datetime(2024, 2, 29, 23, 59)),
+            ('Awal', datetime(2024, 3, 1, 0, 0)),
+            ('Akhir', datetime(2024, 3, 1, 23, 59, 59)),
+            ('Sesudah', datetime(2024, 3, 2, 0, 0)),
+        ):
+            ticket = self.make_ticket(title=title)
+            Ticket.objects.filter(pk=ticket.pk).update(created_at=timezone.make_aware(moment, jakarta))
+
+        self.assertEqual(self.export('--since', '2024-03-01', '--until', '2024-03-01'), ['Awal', 'Akhir'])
+        self.assertEqual(self.export('--since', '2024-03-02'), ['Sesudah'])
+
+    def test_invalid_date_is_reported(self):
+        with self.assertRaisesMessage(CommandError, 'Tanggal tidak valid: 2024-13-01'):
+            self.export('--since', '2024-13-01')
+
+
+class TicketAdminTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.make_user('admin', portal=False, is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin)
+
+    def test_estimated_count_skips_count_on_large_unfiltered_lists(self):
+        tickets = [self.make_ticket(title=f"Tiket {i}") for i in range(5)]
+        tickets[0].delete()
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_limit', 3):
+            paginator = EstimatedCountPaginator(Ticket.objects.order_by('-id'), 2)
+            with CaptureQueriesContext(connection) as queries:
+                # MAX(rowid) di SQLite: perkiraan, termasuk baris yang sudah dihapus
+                self.assertEqual(paginator.count, tickets[-1].pk)
+            self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+            filtered = EstimatedCountPaginator(Ticket.objects.filter(title__endswith='1').order_by('-id'), 2)
+            self.assertEqual(filtered.count, 1)
+        # Di bawah batas hasilnya tetap tepat
+        self.assertEqual(EstimatedCountPaginator(Ticket.objects.order_by('-id'), 2).count, 4)
+
+    def test_paginated_reply_inline_round_trip(self):
+        ticket = self.make_ticket()
+        TicketReply.objects.bulk_create(
+            TicketReply(ticket=ticket, user=self.user, message=f"Balasan {i}") for i in range(60)
+        )
+        url = f"{reverse('admin:tickets_ticket_change', args=[ticket.pk])}?reply_page=2"
+        response = self.client.get(url)
+        formset = response.context['inline_admin_formsets'][0].formset
+        # Halaman 2 (terbaru dulu, 50 per halaman): 10 balasan tertua
+        self.assertEqual([form.instance.message for form in formset.initial_forms][-1], 'Balasan 0')
+        self.assertEqual(len(formset.initial_forms), 10)
+        self.assertContains(response, 'Balasan 51&ndash;60 dari 60')
+
+        prefix = formset.prefix
+        data = {
+            'title': ticket.title, 'description': ticket.description, 'status': Ticket.Status.IN_PROGRESS,
+            'priority': ticket.priority, 'department': '', 'created_by': self.user.pk, 'reply_to_email': '',
+            f"{prefix}-TOTAL_FORMS": len(formset.initial_forms) + 1,
+            f"{prefix}-INITIAL_FORMS": len(formset.initial_forms),
+            f"{prefix}-MIN_NUM_FORMS": 0,
+            f"{prefix}-MAX_NUM_FORMS": 1000,
+        }
+        for i, form in enumerate(formset.initial_forms):
+            data[f"{prefix}-{i}-id"] = form.instance.pk
+            data[f"{prefix}-{i}-ticket"] = ticket.pk
+            data[f"{prefix}-{i}-message"] = form.instance.message
+        edited = formset.initial_forms[0].instance
+        data[f"{prefix}-0-message"] = 'Balasan diperbaiki'
+        data[f"{prefix}-10-ticket"] = ticket.pk
+        data[f"{prefix}-10-message"] = 'Balasan dari admin'
+
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        edited.refresh_from_db()
+        self.assertEqual(edited.message, 'Balasan diperbaiki')
+        self.assertEqual(ticket.replies.count(), 61)
+        self.assertEqual(ticket.replies.get(message='Balasan dari admin').user, self.admin)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, Ticket.Status.IN_PROGRESS)
+
+
+class SeedingTests(TestCase):
+    def test_seeding_indexes_only_new_tickets(self):
+        with mock.patch.object(type(get_search_backend()), 'rebuild') as rebuild:
+            seeded = seed_portal_data(users=2, departments=1, tickets_per_user=3, replies_per_ticket=1, prefix='uji')
+        rebuild.assert_not_called()
+        self.assertEqual(len(get_search_backend().search('printer', owner_id=seeded.users[0].pk)), 1)
+
+    def test_benchmark_requires_at_least_one_iteration(self):
+        with self.assertRaisesMessage(CommandError, '--iterations minimal 1'):
+            call_command('bench_portal', iterations=0, stdout=StringIO())
+
+
+class ProcessLocalCacheTests(PortalTestCase):
+    def cached_timeouts(self):
+        backend = type(caches['default'])
+        caches['default'].clear()
+        with mock.patch.object(backend, 'set', autospec=True, side_effect=backend.set) as cache_set:
+            self.client.get(reverse('dashboard'))
+        # args: (cache, key, value, timeout)
+        return {call.args[1]: call.args[3] for call in cache_set.call_args_list}
+
+    @override_settings(LOCAL_CACHE_MAX_SECONDS=7)
+    def test_signal_invalidated_entries_expire_quickly_without_shared_cache(self):
+        timeouts = self.cached_timeouts()
+        self.assertEqual(timeouts[f"portal-role:{self.user.pk}"], 7)
+        self.assertEqual(timeouts['kb:announcements'], 7)
+
+    def test_shared_cache_keeps_configured_timeouts(self):
+        with tempfile.TemporaryDirectory() as location:
+            shared = {**settings.CACHES, 'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+            }}
+            with override_settings(CACHES=shared, PORTAL_ROLE_CACHE_SECONDS=120):
+                timeouts = self.cached_timeouts()
+        self.assertEqual(timeouts[f"portal-role:{self.user.pk}"], 120)
+        self.assertIsNone(timeouts['kb:announcements'])
+
+    def test_portal_group_id_is_memoized_per_process(self):
+        forget_portal_group()
+        caches['default'].clear()
+        with self.assertNumQueries(1):
+            group_id = portal_group_id()
+        with self.assertNumQueries(0):
+            self.assertEqual(portal_group_id(), group_id)
+        # Hanya keanggotaan per user yang disimpan di cache
+        self.assertEqual([key for key in self.cached_timeouts() if 'group' in key], [])
+
+    def test_group_change_is_seen_on_next_request(self):
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        self.user.groups.clear()
+        self.assertNotEqual(self.client.get(reverse('dashboard')).status_code, 200)
+
+
+@override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+class AsyncPortalViewTests(PortalTestCase):
+    async def asetUp(self):
+        await self.async_client.aforce_login(self.user)
+
+    async def test_portal_pages_render(self):
+        await self.asetUp()
+        ticket = await sync_to_async(self.make_ticket)()
+        for url in (
+            reverse('dashboard'),
+            reverse('my-tickets'),
+            reverse('my-tickets') + '?search=printer',
+            reverse('ticket-detail', args=[ticket.pk]),
+        ):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertContains(response, 'Printer macet')
+
+    async def test_full_list_streams_rows(self):
+        await self.asetUp()
+        await sync_to_async(self.make_ticket)(title='Tiket satu')
+        await sync_to_async(self.make_ticket)(title='Tiket dua')
+        response = await self.async_client.get(reverse('my-tickets'), {'view': 'all'})
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertLess(body.index('Tiket dua'), body.index('Tiket satu'))
+        self.assertIn('ETag', response)
+
+    async def test_unchanged_list_returns_not_modified(self):
+        await self.asetUp()
+        response = await self.async_client.get(reverse('my-tickets'))
+        cached = await self.async_client.get(reverse('my-tickets'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+    async def test_reply_posts_and_redirects(self):
+        await self.asetUp()
+        ticket = await sync_to_async(self.make_ticket)()
+        url = reverse('ticket-detail', args=[ticket.pk])
+        response = await self.async_client.post(url, {'message': 'Masih macet'})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(await ticket.replies.acount(), 1)
+
+
+@override_settings(MY_TICKETS_STREAM_CHUNK_SIZE=2)
+class StreamingPageTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(5):
+            self.make_ticket(title=f"Tiket {index}")
+
+    def get_chunks(self, **headers):
+        response = self.client.get(reverse('my-tickets'), {'view': 'all'}, headers=headers)
+        self.assertTrue(response.streaming)
+        return response, list(response.streaming_content)
+
+    def test_gzip_stream_is_valid_and_flushed_per_chunk(self):
+        _, plain = self.get_chunks()
+        # Kerangka, tiga chunk baris (5 tiket / 2), lalu sisa halaman
+        self.assertEqual(len(plain), 5)
+        response, compressed = self.get_chunks(accept_encoding='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(compressed)), b''.join(plain))
+
+        # Chunk pertama hanya header gzip; setiap chunk berikutnya langsung bisa
+        # didekompresi menjadi chunk HTML yang sama (Z_SYNC_FLUSH)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual(decompressor.decompress(compressed[0]), b'')
+        for html_chunk, gzip_chunk in zip(plain, compressed[1:]):
+            self.assertEqual(decompressor.decompress(gzip_chunk), html_chunk)
+
+    def test_streamed_parts_reassemble_into_full_render(self):
+        request = RequestFactory().get(reverse('my-tickets'), {'view': 'all'})
+        request.user = self.user
+        context = {'total_count': 5, 'search_query': '', 'status_filter': 'all', 'priority_filter': 'all'}
+        rows = [
+            render_to_string('tickets/partials/ticket_row.html', {'ticket': ticket})
+            for ticket in Ticket.objects.order_by('-created_at', '-id')
+        ]
+
+        response = stream_template(request, 'tickets/my_tickets.html', context, iter(rows))
+        streamed = b''.join(response.streaming_content).decode()
+        full = render_to_string('tickets/my_tickets.html', {**context, 'rows_marker': mark_safe(''.join(rows))}, request)
+        self.assertEqual(streamed, full)
+        self.assertNotIn(str(ROWS_MARKER), streamed)
+        self.assertLess(streamed.index('Tiket 4'), streamed.index('Tiket 0'))
+
+
+@override_settings(ARTICLE_VIEW_FLUSH_SECONDS=0)
+class ArticleViewCounterTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.article = Article.objects.create(title='Reset password', slug='reset-password', category='Akun', body='Langkah')
+        self.other = Article.objects.create(title='VPN', slug='vpn', category='Jaringan', body='Langkah', views=2)
+
+    def open_article(self, article, times=1):
+        for _ in range(times):
+            self.assertEqual(self.client.get(reverse('article-detail', args=[article.slug])).status_code, 200)
+
+    def test_views_are_buffered_until_flush(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.open_article(self.article, times=3)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE') and 'tickets_article' in q['sql']])
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.views, pending_views(self.article.pk)), (0, 3))
+        self.assertEqual([a['slug'] for a in popular_articles()], ['vpn', 'reset-password'])
+
+        self.assertEqual(flush_article_views(), 3)
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.views, pending_views(self.article.pk)), (3, 0))
+        # Daftar populer dihitung ulang setelah flush
+        self.assertEqual([a['slug'] for a in popular_articles()], ['reset-password', 'vpn'])
+        self.assertEqual(flush_article_views(), 0)
+
+    def test_view_during_flush_is_kept_for_next_flush(self):
+        self.open_article(self.article, times=2)
+        backend = type(caches['default'])
+        get_many = backend.get_many
+
+        def snapshot_then_view(cache, keys, *args, **kwargs):
+            values = get_many(cache, keys, *args, **kwargs)
+            record_article_view(self.article.pk)
+            return values
+
+        with mock.patch.object(backend, 'get_many', autospec=True, side_effect=snapshot_then_view):
+            self.assertEqual(flush_article_views(), 2)
+        self.assertEqual(pending_views(self.article.pk), 1)
+        self.assertEqual(flush_article_views(), 1)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views, 3)
+
+    @override_settings(ARTICLE_VIEW_FLUSH_SECONDS=60)
+    def test_request_flushes_at_most_once_per_interval(self):
+        self.open_article(self.article, times=3)
+        self.article.refresh_from_db()
+        # View pertama memicu flush; sisanya menunggu interval berikutnya
+        self.assertEqual((self.article.views, pending_views(self.article.pk)), (1, 2))
+        caches['default'].add(FLUSH_LOCK_KEY, 1)
+        self.assertIsNone(flush_article_views())
+
+
+class FakePool:
+    """Pengganti SMTPConnectionPool: hasil per pesan diambil dari `errors`"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send(self, messages):
+        self.sent.extend(messages)
+        return [self.errors.pop(0) if self.errors else None for _ in messages]
+
+
+@override_settings(REPLY_DIGEST_WINDOW_SECONDS=0, OUTBOX_BACKOFF_SECONDS=30, OUTBOX_MAX_BACKOFF_SECONDS=100, OUTBOX_MAX_ATTEMPTS=3)
+class OutboxTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = self.make_user('agen', portal=False, is_staff=True)
+        self.ticket = self.make_ticket()
+
+    def reply(self, message='Sudah kami cek'):
+        return TicketReply.objects.create(ticket=self.ticket, user=self.agent, message=message)
+
+    def test_reply_is_queued_not_sent(self):
+        self.reply()
+        TicketReply.objects.create(ticket=self.ticket, user=self.user, message='Balasan pemilik')
+        outbound = OutboundEmail.objects.get()
+        self.assertEqual(outbound.recipients, [self.user.email])
+        self.assertEqual(outbound.status, OutboundEmail.Status.PENDING)
+        self.assertIn('Sudah kami cek', outbound.body)
+
+    def test_claimed_email_is_leased_until_it_expires(self):
+        self.reply()
+        self.assertEqual(len(claim_due(10)), 1)
+        self.assertEqual(claim_due(10), [])
+
+        # Worker mati sebelum selesai: setelah lease habis email diambil lagi
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(claim_due(10)), 1)
+
+    def test_delivery_marks_sent(self):
+        self.reply()
+        pool = FakePool()
+        self.assertEqual(deliver_batch(pool=pool), (1, 0))
+        outbound = OutboundEmail.objects.get()
+        self.assertEqual((outbound.status, outbound.attempts), (OutboundEmail.Status.SENT, 1))
+        self.assertEqual(pool.sent[0].to, [self.user.email])
+        self.assertEqual(deliver_batch(pool=pool), (0, 0))
+
+    def test_failures_back_off_then_dead_letter(self):
+        self.assertEqual([backoff_delay(n).total_seconds() for n in (1, 2, 3, 4)], [30, 60, 100, 100])
+
+        self.reply()
+        started = timezone.now()
+        self.assertEqual(deliver_batch(pool=FakePool([OSError('koneksi ditolak')])), (0, 1))
+        outbound = OutboundEmail.objects.get()
+        self.assertEqual((outbound.status, outbound.attempts), (OutboundEmail.Status.PENDING, 1))
+        self.assertEqual(outbound.last_error, 'koneksi ditolak')
+        self.assertGreaterEqual(outbound.next_attempt_at, started + timedelta(seconds=30))
+        # Belum jatuh tempo
+        self.assertEqual(deliver_batch(pool=FakePool()), (0, 0))
+
+        for _ in range(2):
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            deliver_batch(pool=FakePool([OSError('masih gagal')]))
+        outbound.refresh_from_db()
+        self.assertEqual((outbound.status, outbound.attempts), (OutboundEmail.Status.DEAD, 3))
+        self.assertEqual(claim_due(10), [])
+
+
+@override_settings(REPLY_DIGEST_WINDOW_SECONDS=120)
+class ReplyDigestTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = self.make_user('agen', portal=False, is_staff=True)
+        self.ticket = self.make_ticket()
+
+    def reply(self, message, ticket=None):
+        return TicketReply.objects.create(ticket=ticket or self.ticket, user=self.agent, message=message)
+
+    def test_replies_within_window_are_coalesced(self):
+        started = timezone.now()
+        self.reply('Balasan pertama')
+        self.reply('Balasan kedua')
+        self.reply('Balasan ketiga')
+
+        digest = OutboundEmail.objects.get()
+        self.assertEqual(digest.digest_count, 3)
+        self.assertIn('(3 balasan baru)', digest.subject)
+        body = digest.body
+        self.assertLess(body.index('Balasan pertama'), body.index('Balasan kedua'))
+        self.assertLess(body.index('Balasan kedua'), body.index('Balasan ketiga'))
+        self.assertGreaterEqual(digest.next_attempt_at, started + timedelta(seconds=120))
+
+    def test_other_ticket_gets_its_own_digest(self):
+        self.reply('Untuk tiket pertama')
+        self.reply('Untuk tiket kedua', ticket=self.make_ticket(title='VPN lambat'))
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+
+    def test_claimed_digest_is_not_modified(self):
+        self.reply('Sebelum dikirim')
+        OutboundEmail.objects.update(next_attempt_at=timezone.now(), digest_until=timezone.now() + timedelta(seconds=60))
+        claimed = claim_due(10)
+        self.assertEqual(len(claimed), 1)
+
+        self.reply('Sesudah diambil worker')
+        claimed[0].refresh_from_db()
+        self.assertNotIn('Sesudah diambil worker', claimed[0].body)
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+        self.assertEqual(OutboundEmail.objects.latest('id').digest_count, 1)
+
+    def test_digest_is_opt_in(self):
+        # Dengan nilai bawaan proyek setiap balasan langsung jadi email sendiri
+        default_window = import_module(os.environ['DJANGO_SETTINGS_MODULE']).REPLY_DIGEST_WINDOW_SECONDS
+        with self.settings(REPLY_DIGEST_WINDOW_SECONDS=default_window):
+            started = timezone.now()
+            self.reply('Balasan pertama')
+            self.reply('Balasan kedua')
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+        self.assertTrue(all(email.digest_count == 1 for email in OutboundEmail.objects.all()))
+        self.assertTrue(all(email.next_attempt_at < started + timedelta(seconds=5) for email in OutboundEmail.objects.all()))
+
+
+class ReplySummaryTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = self.make_user('agen', portal=False, is_staff=True)
+        self.ticket = self.make_ticket()
+
+    def summary(self):
+        self.ticket.refresh_from_db()
+        return self.ticket.reply_count, self.ticket.last_reply_at, self.ticket.last_reply_by_staff
+
+    def test_summary_follows_replies(self):
+        self.assertEqual(self.summary(), (0, None, False))
+
+        staff_reply = TicketReply.objects.create(ticket=self.ticket, user=self.agent, message='Dari staff')
+        self.assertEqual(self.summary(), (1, staff_reply.created_at, True))
+
+        own_reply = TicketReply.objects.create(ticket=self.ticket, user=self.user, message='Dari pemilik')
+        self.assertEqual(self.summary(), (2, own_reply.created_at, False))
+
+        # Menghapus balasan terakhir mengembalikan ringkasan ke balasan sebelumnya
+        own_reply.delete()
+        self.assertEqual(self.summary(), (1, staff_reply.created_at, True))
+        staff_reply.delete()
+        self.assertEqual(self.summary(), (0, None, False))
+
+    def test_refresh_matches_signal_maintained_values(self):
+        TicketReply.objects.create(ticket=self.ticket, user=self.agent, message='Satu')
+        TicketReply.objects.create(ticket=self.ticket, user=self.user, message='Dua')
+        expected = self.summary()
+
+        Ticket.objects.update(reply_count=0, last_reply_at=None, last_reply_by_staff=True)
+        Ticket.refresh_reply_summary()
+        self.assertEqual(self.summary(), expected)
+
+    def test_list_does_not_count_replies_per_row(self):
+        for index in range(3):
+            ticket = self.make_ticket(title=f"Tiket {index}")
+            TicketReply.objects.create(ticket=ticket, user=self.agent, message='Balasan')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('my-tickets'))
+        self.assertFalse([q for q in queries if 'tickets_ticketreply' in q['sql']])
+
+
+class KeysetPaginationTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        moment = timezone.now()
+        self.tickets = []
+        for index in range(7):
+            ticket = self.make_ticket(title=f"Tiket {index}")
+            # Dua tiket per timestamp: urutan harus tetap stabil lewat id
+            Ticket.objects.filter(pk=ticket.pk).update(created_at=moment - timedelta(minutes=index // 2))
+            self.tickets.append(ticket)
+        self.newest_first = list(Ticket.objects.order_by('-created_at', '-id'))
+
+    def page(self, **kwargs):
+        return paginate_keyset(Ticket.objects.all(), page_size=3, **kwargs)
+
+    def test_cursor_round_trips(self):
+        ticket = self.newest_first[0]
+        self.assertEqual(decode_cursor(encode_cursor(ticket)), (ticket.created_at, ticket.pk))
+        self.assertIsNone(decode_cursor('bukan-cursor'))
+        self.assertIsNone(decode_cursor(''))
+
+    def test_forward_and_back_visit_every_ticket_once(self):
+        pages = [self.page()]
+        while pages[-1].has_next:
+            pages.append(self.page(after=pages[-1].next_cursor))
+        self.assertEqual([ticket for page in pages for ticket in page], self.newest_first)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous)
+
+        back = self.page(before=pages[2].previous_cursor)
+        self.assertEqual(list(back), list(pages[1]))
+        self.assertTrue(back.has_previous)
+        self.assertEqual(list(self.page(before=back.previous_cursor)), list(pages[0]))
+
+    def test_new_ticket_does_not_shift_next_page(self):
+        first = self.page()
+        self.make_ticket(title='Tiket baru')
+        self.assertEqual(list(self.page(after=first.next_cursor)), self.newest_first[3:6])
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        self.assertEqual(list(self.page(after='rusak')), self.newest_first[:3])
+
+    def test_ranked_offsets_round_trip(self):
+        self.assertEqual(decode_offset(encode_offset(40)), 40)
+        self.assertIsNone(decode_offset(encode_cursor(self.newest_first[0])))
+
+        fetch = lambda offset, limit: self.newest_first[offset:offset + limit]
+        first = paginate_ranked(fetch, page_size=3)
+        second = paginate_ranked(fetch, after=first.next_cursor, page_size=3)
+        self.assertEqual(list(second), self.newest_first[3:6])
+        self.assertEqual(list(paginate_ranked(fetch, before=second.previous_cursor, page_size=3)), list(first))
+
+
+class ConditionalGetTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ticket = self.make_ticket()
+
+    def test_unchanged_list_returns_not_modified(self):
+        url = reverse('my-tickets')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        cached = self.client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_ticket(title='Tiket baru')
+        changed = self.client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(changed.status_code, 200)
+        self.assertContains(changed, 'Tiket baru')
+
+    def test_write_from_other_worker_invalidates_list(self):
+        url = reverse('my-tickets')
+        etag = self.client.get(url)['ETag']
+        # Worker lain: versi cache di proses ini tidak ikut naik
+        with mock.patch('tickets.caching._bump_version'), self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.filter(pk=self.ticket.pk).update(title='Judul dari worker lain', updated_at=timezone.now())
+            self.make_ticket(title='Tiket dari worker lain')
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Judul dari worker lain')
+        self.assertContains(response, 'Tiket dari worker lain')
+
+    def test_detail_revalidates_on_new_reply(self):
+        url = reverse('ticket-detail', args=[self.ticket.pk])
+        response = self.client.get(url)
+        validators = {'If-None-Match': response['ETag'], 'If-Modified-Since': response['Last-Modified']}
+        self.assertEqual(self.client.get(url, headers=validators).status_code, 304)
+
+        agent = self.make_user('agen', portal=False, is_staff=True)
+        TicketReply.objects.create(ticket=self.ticket, user=agent, message='Balasan baru')
+        self.assertContains(self.client.get(url, headers=validators), 'Balasan baru')
+
+    def test_etag_is_per_user(self):
+        url = reverse('my-tickets')
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.make_user('lain'))
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_pending_flash_message_is_never_cached(self):
+        url = reverse('ticket-detail', args=[self.ticket.pk])
+        etag = self.client.get(url)['ETag']
+        response = self.client.post(url, {'message': ''})
+        self.assertNotIn('ETag', response)
+
+        response = self.client.post(url, {'message': 'Sudah saya coba'}, follow=True)
+        self.assertContains(response, 'Balasan Anda berhasil dikirim!')
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+
+class UnreadMarkerTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.agent = self.make_user('agen', portal=False, is_staff=True)
+        self.ticket = self.make_ticket()
+
+    def staff_reply(self, message='Sudah kami cek'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return TicketReply.objects.create(ticket=self.ticket, user=self.agent, message=message)
+
+    def test_staff_reply_is_unread_until_ticket_is_opened(self):
+        self.assertEqual(unread_count(self.user.pk), 0)
+        self.staff_reply()
+        self.assertEqual(unread_count(self.user.pk), 1)
+        self.assertContains(self.client.get(reverse('dashboard')), 'notification-badge')
+
+        self.client.get(reverse('ticket-detail', args=[self.ticket.pk]))
+        self.assertEqual(unread_count(self.user.pk), 0)
+        self.assertNotContains(self.client.get(reverse('dashboard')), 'notification-badge')
+
+        self.staff_reply('Ada kabar baru')
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+    def test_own_reply_is_not_unread(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            TicketReply.objects.create(ticket=self.ticket, user=self.user, message='Dari saya')
+        self.assertEqual(unread_count(self.user.pk), 0)
+
+    def test_reply_after_page_load_stays_unread(self):
+        self.staff_reply()
+        # Tiket dimuat sebelum balasan kedua masuk
+        loaded = Ticket.objects.get(pk=self.ticket.pk)
+        self.staff_reply('Masuk saat halaman dibuka')
+        mark_ticket_read(self.user.pk, loaded)
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+    def test_marking_read_again_does_not_write(self):
+        self.staff_reply()
+        self.ticket.refresh_from_db()
+        self.assertTrue(TicketReadMarker.mark_read(self.user.pk, self.ticket))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(TicketReadMarker.mark_read(self.user.pk, self.ticket))
+        self.assertFalse([q for q in queries if q['sql'].startswith(('UPDATE', 'INSERT'))])
+
+    def test_existing_staff_replies_are_backfilled_as_read(self):
+        self.staff_reply()
+        other = self.make_ticket(title='Belum dibalas')
+        TicketReadMarker.objects.all().delete()
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+        migration = import_module('tickets.migrations.0014_backfill_read_markers')
+        migration.backfill_read_markers(django_apps, None)
+        caches['default'].clear()
+        self.assertEqual(unread_count(self.user.pk), 0)
+        self.assertFalse(TicketReadMarker.objects.filter(ticket=other).exists())
+
+        self.staff_reply('Balasan setelah deploy')
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+    def test_imported_history_is_not_unread(self):
+        importer = TicketImporter()
+        importer.add(1, {'title': 'Tiket lama', 'created_by': 'pelanggan', 'replies': [
+            {'user': 'agen', 'message': 'Sudah selesai', 'created_at': '2023-05-01T10:00:00+00:00'},
+        ]})
+        importer.finish()
+        self.assertTrue(Ticket.objects.get(title='Tiket lama').last_reply_by_staff)
+        self.assertEqual(unread_count(self.user.pk), 0)
+
+
+class MetricsTests(PortalTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics_registry.reset()
+        self.addCleanup(metrics_registry.reset)
+
+    def requests_for(self, view):
+        return sum(value for (name, _, _), value in metrics_registry.requests.items() if name == view)
+
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = MetricsRegistry()
+        registry.record('dashboard', 'GET', 200, 0.02, 3, 0.001)
+        registry.record('dashboard', 'GET', 200, 0.3, 12, 0.01)
+        text = registry.render()
+        self.assertIn('tickets_http_requests_total{view="dashboard",method="GET",status="200"} 2', text)
+        self.assertIn('tickets_http_request_duration_seconds_bucket{view="dashboard",le="0.025"} 1', text)
+        self.assertIn('tickets_http_request_duration_seconds_bucket{view="dashboard",le="0.5"} 2', text)
+        self.assertIn('tickets_http_request_duration_seconds_bucket{view="dashboard",le="+Inf"} 2', text)
+        self.assertIn('tickets_http_request_sql_queries_sum{view="dashboard"} 15.000000', text)
+
+    def test_middleware_records_view_and_queries(self):
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(metrics_registry.requests[('dashboard', 'GET', '200')], 1)
+        self.assertGreater(metrics_registry.queries['dashboard'].sum, 0)
+
+    def test_streaming_response_is_recorded_after_last_chunk(self):
+        for index in range(3):
+            self.make_ticket(title=f"Tiket {index}")
+        response = self.client.get(reverse('my-tickets'), {'view': 'all'})
+        self.assertEqual(self.requests_for('my-tickets'), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            body = b''.join(response.streaming_content)
+        self.assertIn(b'Tiket 2', body)
+        self.assertEqual(self.requests_for('my-tickets'), 1)
+        # Query baris tiket berjalan saat streaming dan ikut terhitung
+        self.assertGreaterEqual(metrics_registry.queries['my-tickets'].sum, len(queries))
+
+    def test_endpoint_is_not_public_behind_local_proxy(self):
+        self.client.logout()
+        # Test client datang dari 127.0.0.1, sama seperti request lewat reverse proxy lokal
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(METRICS_TOKEN='rahasia-scrape')
+    def test_staff_or_token_can_scrape(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer salah'}).status_code, 403)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer rahasia-scrape'})
+        self.assertContains(response, 'tickets_http_requests_total')
+
+        self.client.force_login(self.make_user('admin', portal=False, is_staff=True))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+        with override_settings(METRICS_TOKEN=''):
+            self.client.logout()
+            self.assertEqual(self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer '}).status_code, 403)
+
+
+class StaticAssetTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        os.makedirs(os.path.join(root.name, 'css'))
+        self.files = {
+            'css/app.0123abcd.css': b'body{color:red}' * 20,
+            'css/app.0123abcd.css.gz': b'gzip-bytes',
+            'css/app.0123abcd.css.br': b'br-bytes',
+            'css/raw.css': b'p{margin:0}',
+        }
+        for name, data in self.files.items():
+            with open(os.path.join(root.name, name), 'wb') as f:
+                f.write(data)
+        with open(os.path.join(root.name, 'staticfiles.json'), 'w') as f:
+            json.dump({'paths': {'css/app.css': 'css/app.0123abcd.css'}}, f)
+
+        settings_override = override_settings(STATIC_ROOT=root.name, STATIC_URL='/static/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.middleware = StaticAssetMiddleware(lambda request: HttpResponse('view'))
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        response = self.middleware(self.factory.get(path, headers=headers))
+        body = b''.join(response) if response.status_code == 200 else b''
+        response.close()
+        return response, body
+
+    def test_minify_css_keeps_string_contents(self):
+        css = 'a::after {\n  content: ";}" ;\n}\n/* komentar */\nb { color: red; }\n/*! lisensi */'
+        self.assertEqual(minify_css(css), 'a::after{content:";}"}b{color:red}/*! lisensi */')
+        self.assertEqual(minify_css("q { quotes: '/* bukan komentar */'; }"), "q{quotes:'/* bukan komentar */'}")
+
+    def test_negotiates_best_accepted_variant(self):
+        path = '/static/css/app.0123abcd.css'
+        for accept, encoding, body in (
+            ('gzip, deflate, br', 'br', b'br-bytes'),
+            ('br;q=0, gzip', 'gzip', b'gzip-bytes'),
+            ('', None, self.files['css/app.0123abcd.css']),
+        ):
+            with self.subTest(accept=accept):
+                response, content = self.get(path, accept_encoding=accept)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(content, body)
+                self.assertEqual(int(response['Content-Length']), len(body))
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+                self.assertTrue(response['Content-Type'].startswith('text/css'))
+
+    def test_conditional_request_returns_304_per_variant(self):
+        path = '/static/css/app.0123abcd.css'
+        response, _ = self.get(path, accept_encoding='gzip')
+        revalidated, _ = self.get(path, accept_encoding='gzip', if_none_match=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['Content-Encoding'], 'gzip')
+        # ETag varian gzip tidak berlaku untuk representasi tanpa kompresi
+        plain, _ = self.get(path, if_none_match=response['ETag'])
+        self.assertEqual(plain.status_code, 200)
+
+    def test_unhashed_and_unknown_paths(self):
+        response, content = self.get('/static/css/raw.css')
+        self.assertEqual(content, b'p{margin:0}')
+        self.assertEqual(response['Cache-Control'], f"public, max-age={getattr(settings, 'STATIC_UNHASHED_MAX_AGE', 60)}")
+        self.assertNotIn('Vary', response)
+        response, content = self.get('/static/css/tidak-ada.css')
+        self.assertEqual(content, b'view')
@@ -1,38 +1,64 @@
 # tickets/urls.py
+from django.conf import settings
 from django.urls import path
 from django.shortcuts import redirect
-from . import views
+from . import async_views, views
+from .live import live_updates_enabled, reply_poll, reply_stream
+from .metrics import metrics_view
 
 def redirect_to_login(request):
     """Redirect root URL to login page"""
     return redirect('login')
 
-urlpatterns = [
-    # Root URL redirect ke login
-    path('', redirect_to_login, name='home'),
-    
-    # Halaman Login (custom view untuk user)
-    path('login/', views.user_login, name='login'),
-    # Halaman Registrasi user portal
-    path('register/', views.user_register, name='register'),
-    
-    # Halaman Logout (custom view yang menerima GET request)
-    path('logout/', views.user_logout, name='logout'),
-    
-    # Halaman Dashboard
-    path('dashboard/', views.dashboard, name='dashboard'),
-    
-    # Halaman Daftar Tiket
-    path('tiket/', views.my_tickets, name='my-tickets'),
-    
-    # Halaman Detail Tiket
-    path('tiket/<int:ticket_id>/', views.ticket_detail, name='ticket-detail'),
-    
-    # Halaman Form Kirim Tiket
-    path('kirim-tiket/', views.create_ticket, name='create-ticket'),
-    
-    # Halaman Sukses
-    path('tiket/sukses/<int:ticket_id>/', views.ticket_success, name='ticket-success'),
-
-    path('settings/', views.user_settings, name='user-settings'),
-]
\ No newline at end of file
+
+def build_urlpatterns(use_async_views=False, live_updates=False):
+    """
+    Pola URL portal; view baca utama memakai versi async jika dilayani lewat
+    ASGI. Endpoint balasan live hanya dipasang jika `live_updates` aktif.
+    """
+    read_views = async_views if use_async_views else views
+    live_patterns = [
+        # Balasan baru secara live (SSE) dan fallback long-poll
+        path('tiket/<int:ticket_id>/stream/', reply_stream, name='ticket-reply-stream'),
+        path('tiket/<int:ticket_id>/poll/', reply_poll, name='ticket-reply-poll'),
+    ] if live_updates else []
+    return [
+        # Root URL redirect ke login
+        path('', redirect_to_login, name='home'),
+
+        # Halaman Login (custom view untuk user)
+        path('login/', views.user_login, name='login'),
+        # Halaman Registrasi user portal
+        path('register/', views.user_register, name='register'),
+
+        # Halaman Logout (custom view yang menerima GET request)
+        path('logout/', views.user_logout, name='logout'),
+
+        # Halaman Dashboard
+        path('dashboard/', read_views.dashboard, name='dashboard'),
+
+        # Halaman Daftar Tiket
+        path('tiket/', read_views.my_tickets, name='my-tickets'),
+
+        # Halaman Detail Tiket
+        path('tiket/<int:ticket_id>/', read_views.ticket_detail, name='ticket-detail'),
+        *live_patterns,
+
+        # Halaman Form Kirim Tiket
+        path('kirim-tiket/', views.create_ticket, name='create-ticket'),
+
+        # Halaman Sukses
+        path('tiket/sukses/<int:ticket_id>/', read_views.ticket_success, name='ticket-success'),
+
+        path('settings/', views.user_settings, name='user-settings'),
+
+        # Knowledge Base
+        path('bantuan/', views.article_list, name='article-list'),
+        path('bantuan/<slug:slug>/', views.article_detail, name='article-detail'),
+
+        # Metric request dalam format Prometheus
+        path('metrics', metrics_view, name='metrics'),
+    ]
+
+
+urlpatterns = build_urlpatterns(getattr(settings, 'PORTAL_ASYNC_VIEWS', False), live_updates_enabled())
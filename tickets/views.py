@@ -1,40 +1,89 @@
 # tickets/views.py
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+import functools
+import hashlib
 from functools import wraps
 
+from asgiref.sync import iscoroutinefunction
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
-from django.contrib.auth.models import Group
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from .caching import fragment_cache_seconds, mark_ticket_read, ticket_cache_version, unread_count
 from .forms import TicketForm, UserProfileForm, CustomPasswordChangeForm, UserRegistrationForm
-from .models import Ticket, Department
+from .knowledge_base import active_announcements, pending_views, popular_articles, record_article_view
+from .live import live_updates_enabled
+from .models import Article, Ticket, Department, OutboundEmail, TicketStats
+from .pagination import paginate_keyset, paginate_ranked
+from .roles import auser_has_portal_role, portal_group_id, user_has_portal_role
+from .search import get_backend as get_search_backend
+from .streaming import render_rows, stream_template
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def _portal_group_name():
-    return getattr(settings, 'PORTAL_USER_GROUP', 'Portal Users')
+def _portal_etag(request, *parts):
+    """
+    ETag halaman portal. Token CSRF ikut dihitung karena form di halaman
+    memakainya: setelah login ulang, salinan lama di browser tidak boleh dipakai.
+    """
+    # Pastikan token sudah ada sebelum di-hash; jika baru dibuat saat render,
+    # ETag kunjungan pertama tidak akan pernah cocok dengan request berikutnya
+    get_token(request)
+    raw = '|'.join(str(part) for part in (request.user.pk, request.META.get('CSRF_COOKIE', ''), *parts))
+    return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
 
 
-def ensure_portal_group_exists():
-    Group.objects.get_or_create(name=_portal_group_name())
+def _has_pending_messages(request):
+    # len() tidak menandai pesan sebagai sudah dibaca
+    return len(messages.get_messages(request)) > 0
 
 
-def user_has_portal_role(user):
-    if not user.is_authenticated:
-        return False
-    # Admin (staff/superuser) boleh akses kedua dashboard
-    if user.is_staff or user.is_superuser:
-        return True
-    # User biasa harus tergabung dalam grup Portal Users
-    return user.groups.filter(name=_portal_group_name()).exists()
+def _not_modified(request, etag, last_modified=None):
+    """Response 304 jika validator dari browser masih cocok, None jika halaman perlu dirender"""
+    if request.method not in ('GET', 'HEAD') or _has_pending_messages(request):
+        return None
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        _set_validators(response, etag, last_modified)
+    return response
+
+
+def _set_validators(response, etag, last_modified=None):
+    # private + no-cache: browser boleh menyimpan, tapi wajib revalidasi setiap kali
+    patch_cache_control(response, private=True, no_cache=True)
+    if etag and response.status_code in (200, 304):
+        response.headers['ETag'] = etag
+        if last_modified:
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
 
 
 def portal_user_required(view_func):
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapped(request, *args, **kwargs):
+            # Ganti lazy request.user dengan user yang sudah dimuat secara async,
+            # supaya template/context processor tidak memicu query sync
+            request.user = await request.auser()
+            if not await auser_has_portal_role(request.user):
+                messages.error(request, 'Akses ini khusus untuk akun pengguna portal.')
+                return redirect('login')
+            return await view_func(request, *args, **kwargs)
+        return _async_wrapped
+
     @wraps(view_func)
     def _wrapped(request, *args, **kwargs):
         if not user_has_portal_role(request.user):
@@ -44,8 +93,6 @@ def portal_user_required(view_func):
     return _wrapped
 
 def user_login(request):
-    ensure_portal_group_exists()
-
     # Jika user sudah login dan memang user portal, langsung ke dashboard
     if request.user.is_authenticated and user_has_portal_role(request.user):
         return redirect('dashboard')
@@ -88,8 +135,6 @@ def user_login(request):
 
 def user_register(request):
     """Registrasi akun baru untuk dashboard user"""
-    ensure_portal_group_exists()
-
     if request.user.is_authenticated and user_has_portal_role(request.user):
         return redirect('dashboard')
 
@@ -98,8 +143,7 @@ def user_register(request):
         if form.is_valid():
             user = form.save()
             # Tambahkan user baru ke grup Portal Users
-            portal_group, _ = Group.objects.get_or_create(name=_portal_group_name())
-            user.groups.add(portal_group)
+            user.groups.add(portal_group_id())
 
             messages.success(request, 'Registrasi berhasil. Silakan login dengan akun Anda.')
             return redirect('login')
@@ -120,26 +164,26 @@ def user_logout(request):
 def dashboard(request):
     user = request.user
     # Ambil semua tiket user
-    user_tickets = Ticket.objects.filter(created_by=user).order_by('-created_at')
+    user_tickets = Ticket.objects.filter(created_by=user).select_related('department').order_by('-created_at')
     
-    waiting_tickets = user_tickets.filter(status='WAITING').count() 
-    in_progress_tickets = user_tickets.filter(status='IN_PROGRESS').count()
-    closed_tickets = user_tickets.filter(status='CLOSED').count()
-    # 2. Tambahkan hitungan total tiket
-    total_tickets = user_tickets.count()
+    # Hitungan per status dibaca dari satu baris TicketStats. Semua data dibuat
+    # lazy: jika fragmen template masih ada di cache, database tidak disentuh
+    stats = SimpleLazyObject(lambda: TicketStats.for_user(user))
     
     # Ambil tiket terbaru (limit 5)
     recent_tickets = user_tickets[:5]
     
     context = {
-        'waiting_tickets': waiting_tickets,
-        'in_progress_tickets': in_progress_tickets,
-        'closed_tickets': closed_tickets,
-        'total_tickets': total_tickets,
+        'waiting_tickets': lambda: stats.waiting,
+        'in_progress_tickets': lambda: stats.in_progress,
+        'closed_tickets': lambda: stats.closed,
+        'total_tickets': lambda: stats.total,
         'recent_tickets': recent_tickets,
-        'unread_count': 0, 
-        'announcements': [],  
-        'popular_articles': [],  
+        'ticket_version': ticket_cache_version(user.id),
+        'fragment_seconds': fragment_cache_seconds(),
+        'unread_count': lambda: unread_count(user.id),
+        'announcements': active_announcements(),
+        'popular_articles': popular_articles(),
     }
     return render(request, 'tickets/dashboard.html', context)
 @login_required
@@ -162,12 +206,14 @@ def create_ticket(request):
         if form.is_valid():
             new_ticket = form.save(commit=False) 
             new_ticket.created_by = user 
-            # Email balasan sudah otomatis tersimpan dari form
-            new_ticket.save() 
-            
             recipient_email = form.cleaned_data['reply_to_email'] 
-            
-            try:
+
+            # Tiket dan email konfirmasi disimpan dalam satu transaksi,
+            # email dikirim oleh worker `send_outbox`
+            with transaction.atomic():
+                # Email balasan sudah otomatis tersimpan dari form
+                new_ticket.save() 
+
                 subject = f"[Ticket ID: {new_ticket.id}] {new_ticket.title}"
                 message = (
                     f"Halo {new_ticket.created_by.username},\n\n"
@@ -184,15 +230,7 @@ def create_ticket(request):
                     f"Jika Anda memiliki pertanyaan lebih lanjut, silakan hubungi kami.\n\n"
                     f"Salam,\nTim Support"
                 )
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [recipient_email],  # Gunakan email dari form
-                    fail_silently=False,
-                )
-            except Exception as e:
-                print(f"Error sending confirmation email: {e}")
+                OutboundEmail.enqueue(subject, message, [recipient_email])  # Gunakan email dari form
             
             return redirect('ticket-success', ticket_id=new_ticket.id)
     
@@ -253,55 +291,195 @@ def user_settings(request):
     }
     return render(request, 'tickets/settings.html', context)
 
+def _my_tickets_total_field(search_query, status_filter, priority_filter):
+    """
+    Kolom TicketStats untuk jumlah tiket di judul halaman. None berarti jumlah
+    total tidak dihitung (pencarian/kombinasi filter).
+    """
+    if search_query or (status_filter != 'all' and priority_filter != 'all'):
+        return None
+    if status_filter != 'all':
+        return TicketStats.STATUS_FIELDS.get(status_filter.upper())
+    if priority_filter != 'all':
+        return TicketStats.PRIORITY_FIELDS.get(priority_filter.upper())
+    return 'total'
+
+
+def _my_tickets_total(user, search_query, status_filter, priority_filter):
+    """Jumlah tiket untuk judul halaman, diambil dari TicketStats jika filternya cukup sederhana"""
+    field = _my_tickets_total_field(search_query, status_filter, priority_filter)
+    return getattr(TicketStats.for_user(user), field) if field else None
+
+
+# Ringkasan tiket user untuk ETag dan kunci fragmen Tiket Saya. Dibaca dari
+# database, bukan dari versi cache: versi hanya naik di proses yang menulis,
+# sedangkan perubahan dari worker lain harus langsung membatalkan 304.
+MY_TICKETS_STATE = {
+    'count': Count('id'),
+    'replies': Sum('reply_count'),
+    'updated': Max('updated_at'),
+    'replied': Max('last_reply_at'),
+}
+
+
+def _state_token(state):
+    raw = '|'.join(str(state[key]) for key in MY_TICKETS_STATE)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def _my_tickets_state(user):
+    return _state_token(Ticket.objects.filter(created_by=user).aggregate(**MY_TICKETS_STATE))
+
+
+async def _amy_tickets_state(user):
+    return _state_token(await Ticket.objects.filter(created_by=user).aaggregate(**MY_TICKETS_STATE))
+
+
+# Nilai ?status= di URL -> kolom Ticket.status
+STATUS_FILTERS = {'open': 'OPEN', 'in_progress': 'IN_PROGRESS', 'closed': 'CLOSED'}
+
+
+def _status_value(status_filter):
+    return STATUS_FILTERS.get(status_filter)
+
+
+def _priority_value(priority_filter):
+    return priority_filter.upper() if priority_filter != 'all' else None
+
+
+def _search_ticket_ids(user, search_query, status_filter, priority_filter, offset=0, limit=20):
+    """
+    ID tiket user yang cocok dengan query dan filter, urut relevansi (index
+    full-text). Jika query berupa angka, tiket dengan ID tersebut paling atas.
+    """
+    pinned_id = None
+    if search_query.strip().isdigit() and len(search_query.strip()) < 19:
+        pinned_id = int(search_query)
+    return get_search_backend().search(
+        search_query,
+        owner_id=user.id,
+        status=_status_value(status_filter),
+        priority=_priority_value(priority_filter),
+        pinned_id=pinned_id,
+        limit=limit,
+        offset=offset,
+    )
+
+
+def _filter_tickets(tickets, status_filter, priority_filter):
+    # Filter berdasarkan status
+    status = _status_value(status_filter)
+    if status:
+        tickets = tickets.filter(status=status)
+
+    # Filter berdasarkan prioritas
+    priority = _priority_value(priority_filter)
+    if priority:
+        tickets = tickets.filter(priority=priority)
+    return tickets
+
+
+def _rank_order(tickets_by_id, ranked_ids):
+    # Tiket dalam urutan relevansi dari backend pencarian
+    return [tickets_by_id[ticket_id] for ticket_id in ranked_ids if ticket_id in tickets_by_id]
+
+
+def _page_size():
+    return getattr(settings, 'MY_TICKETS_PAGE_SIZE', 20)
+
+def _stream_context(search_query, status_filter, priority_filter, total_count):
+    return {
+        'total_count': total_count,
+        'search_query': search_query,
+        'status_filter': status_filter,
+        'priority_filter': priority_filter,
+    }
+
+
+def _stream_chunk_size():
+    return getattr(settings, 'MY_TICKETS_STREAM_CHUNK_SIZE', 100)
+
+
+def _stream_my_tickets(request, tickets, etag, search_query, status_filter, priority_filter):
+    """
+    Semua tiket dalam satu halaman: kerangka halaman dikirim lebih dulu, baris
+    tiket menyusul per chunk dari iterator (memori tetap kecil berapa pun jumlahnya)
+    """
+    filtered = _filter_tickets(tickets, status_filter, priority_filter).order_by('-created_at', '-id')
+    rows = render_rows(
+        'tickets/partials/ticket_row.html',
+        filtered.iterator(chunk_size=_stream_chunk_size()),
+        'ticket',
+        chunk_size=_stream_chunk_size(),
+        empty=render_to_string('tickets/partials/ticket_empty.html'),
+    )
+    total_count = _my_tickets_total(request.user, search_query, status_filter, priority_filter)
+    has_messages = _has_pending_messages(request)
+    response = stream_template(
+        request,
+        'tickets/my_tickets.html',
+        _stream_context(search_query, status_filter, priority_filter, total_count),
+        rows,
+    )
+    return _set_validators(response, None if has_messages else etag)
+
 # View untuk My Tickets (daftar semua tiket user)
 @login_required
 @portal_user_required
 def my_tickets(request):
     user = request.user
+
+    list_state = _my_tickets_state(user)
+    etag = _portal_etag(request, 'my-tickets', list_state, request.GET.urlencode())
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
     
     # Ambil semua tiket user
-    tickets = Ticket.objects.filter(created_by=user).order_by('-created_at')
+    tickets = Ticket.objects.filter(created_by=user).select_related('department')
     
-    # Filter berdasarkan search query
     search_query = request.GET.get('search', '')
-    if search_query:
-        # Coba konversi ke integer untuk pencarian ID
-        try:
-            ticket_id = int(search_query)
-            tickets = tickets.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(id=ticket_id)
-            )
-        except ValueError:
-            # Jika bukan angka, cari berdasarkan title dan description saja
-            tickets = tickets.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
-    
-    # Filter berdasarkan status
     status_filter = request.GET.get('status', 'all')
-    if status_filter != 'all':
-        if status_filter == 'open':
-            tickets = tickets.filter(status='OPEN')
-        elif status_filter == 'in_progress':
-            tickets = tickets.filter(status='IN_PROGRESS')
-        elif status_filter == 'closed':
-            tickets = tickets.filter(status='CLOSED')
-    
-    # Filter berdasarkan prioritas
     priority_filter = request.GET.get('priority', 'all')
-    if priority_filter != 'all':
-        tickets = tickets.filter(priority=priority_filter.upper())
-    
+
+    if request.GET.get('view') == 'all' and not search_query:
+        return _stream_my_tickets(request, tickets, etag, search_query, status_filter, priority_filter)
+
+    def build_page():
+        after = request.GET.get('after')
+        before = request.GET.get('before')
+        if search_query:
+            # Filter ikut di query full-text; halaman dipotong setelah filter
+            def fetch(offset, limit):
+                ranked_ids = _search_ticket_ids(user, search_query, status_filter, priority_filter, offset, limit)
+                return _rank_order(tickets.in_bulk(ranked_ids), ranked_ids)
+            return paginate_ranked(fetch, after=after, before=before, page_size=_page_size())
+        # Keyset pagination: hanya satu halaman yang diambil dari database
+        return paginate_keyset(
+            _filter_tickets(tickets, status_filter, priority_filter),
+            after=after,
+            before=before,
+            page_size=_page_size(),
+        )
+
+    # Halaman & jumlah tiket baru dihitung saat fragmen template tidak ada di cache
+    page = SimpleLazyObject(build_page)
+    total_count = functools.cache(lambda: _my_tickets_total(user, search_query, status_filter, priority_filter))
+
     context = {
-        'tickets': tickets,
+        'tickets': page,
+        'page': page,
+        'total_count': total_count,
         'search_query': search_query,
         'status_filter': status_filter,
         'priority_filter': priority_filter,
+        'list_state': list_state,
+        'fragment_seconds': fragment_cache_seconds(),
     }
-    return render(request, 'tickets/my_tickets.html', context)
+    # Halaman yang memuat flash message tidak diberi validator agar tidak ikut tersimpan
+    has_messages = _has_pending_messages(request)
+    response = render(request, 'tickets/my_tickets.html', context)
+    return _set_validators(response, None if has_messages else etag)
 
 # View untuk Ticket Detail
 @login_required
@@ -309,9 +487,19 @@ def my_tickets(request):
 def ticket_detail(request, ticket_id):
     user = request.user
     ticket = get_object_or_404(Ticket, id=ticket_id, created_by=user)
+    if request.method == 'GET':
+        mark_ticket_read(user.id, ticket)
+
+    # Validator dari kolom tiket saja (last_reply_at & reply_count didenormalisasi),
+    # dicek sebelum query balasan dan render template
+    last_modified = max(filter(None, [ticket.updated_at, ticket.last_reply_at]))
+    etag = _portal_etag(request, 'ticket', ticket.pk, last_modified.isoformat(), ticket.reply_count, ticket.status)
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
     
     # Ambil semua replies untuk ticket ini
-    replies = ticket.replies.all().order_by('created_at')
+    replies = ticket.replies.select_related('user').order_by('created_at')
     
     # Handle reply form
     if request.method == 'POST':
@@ -331,5 +519,33 @@ def ticket_detail(request, ticket_id):
     context = {
         'ticket': ticket,
         'replies': replies,
+        'live_updates': live_updates_enabled(),
     }
-    return render(request, 'tickets/ticket_detail.html', context)
\ No newline at end of file
+    has_messages = _has_pending_messages(request)
+    response = render(request, 'tickets/ticket_detail.html', context)
+    if request.method != 'GET' or has_messages:
+        return _set_validators(response, None)
+    return _set_validators(response, etag, last_modified)
+
+
+# Halaman Knowledge Base
+@login_required
+@portal_user_required
+def article_list(request):
+    articles = Article.objects.filter(is_published=True).order_by('category', 'title').only('title', 'slug', 'category', 'views')
+    return render(request, 'tickets/article_list.html', {
+        'articles': articles,
+        'popular_articles': popular_articles(),
+    })
+
+
+@login_required
+@portal_user_required
+def article_detail(request, slug):
+    article = get_object_or_404(Article, slug=slug, is_published=True)
+    # Counter di cache, ditulis ke database secara batch (tickets/knowledge_base.py)
+    record_article_view(article.pk)
+    return render(request, 'tickets/article_detail.html', {
+        'article': article,
+        'views': article.views + pending_views(article.pk),
+    })